@@ -3,7 +3,12 @@
 """
 import csv
 import math
-from typing import List, Tuple
+from typing import Iterable, Iterator, List, Tuple
+
+from columnar_dataset import ColumnarDataset
+from csv_offset_index import MappedCSV
+from dataset_snapshot import open_dataset
+from sort_index import SortIndex
 
 
 def index_range(page: int, page_size: int) -> Tuple[int, int]:
@@ -26,10 +31,25 @@ class Server:
     """Server class to paginate a database of popular baby names.
     """
     DATA_FILE = "Popular_Baby_Names.csv"
+    STORAGES = ("rows", "columnar", "mmap", "snapshot")
+
+    def __init__(self, storage: str = "rows"):
+        """Initializes a new Server instance.
 
-    def __init__(self):
-        """Initializes a new Server instance."""
+        Args:
+            storage (str): How the dataset is kept in memory: "rows" for
+                a list of lists of strings, "columnar" for typed
+                arrays that only rebuild the rows of the requested page,
+                "mmap" to map the CSV file and only parse the rows of
+                the requested page, or "snapshot" for typed columns
+                mapped from a binary snapshot compiled from the CSV file.
+        """
+        assert storage in self.STORAGES
+        self.__storage = storage
         self.__dataset = None
+        self.__columnar = None
+        self.__mapped = None
+        self.__sort_index = None
 
     def dataset(self) -> List[List]:
         """Cached dataset.
@@ -45,12 +65,91 @@ class Server:
 
         return self.__dataset
 
-    def get_page(self, page: int = 1, page_size: int = 10) -> List[List]:
+    def columnar_dataset(self) -> ColumnarDataset:
+        """Cached columnar dataset.
+
+        With the "snapshot" storage, the columns are mapped from the
+        snapshot of `DATA_FILE`, which is compiled on first use and
+        whenever the CSV file changes.
+
+        Returns:
+            ColumnarDataset: The dataset stored as typed columns.
+        """
+        if self.__columnar is None:
+            if self.__storage == "snapshot":
+                self.__columnar = open_dataset(self.DATA_FILE)
+            else:
+                self.__columnar = ColumnarDataset.from_csv(self.DATA_FILE)
+
+        return self.__columnar
+
+    def mapped_dataset(self) -> MappedCSV:
+        """Cached memory-mapped dataset.
+
+        The row offset index is persisted next to `DATA_FILE`, so only
+        the first process to map a given version of the file scans it.
+
+        Returns:
+            MappedCSV: The memory-mapped CSV file.
+        """
+        if self.__mapped is None:
+            self.__mapped = MappedCSV(self.DATA_FILE)
+
+        return self.__mapped
+
+    def __size(self) -> int:
+        """Returns the number of rows in the dataset."""
+        if self.__storage in ("columnar", "snapshot"):
+            return len(self.columnar_dataset())
+        if self.__storage == "mmap":
+            return len(self.mapped_dataset())
+        return len(self.dataset())
+
+    def __rows(self, start: int, end: int) -> List[List]:
+        """Returns the rows between two positions of the dataset."""
+        if self.__storage in ("columnar", "snapshot"):
+            return self.columnar_dataset().rows(start, end)
+        if self.__storage == "mmap":
+            return self.mapped_dataset().rows(start, end)
+        return self.dataset()[start:end]
+
+    def __rows_at(self, positions: Iterable[int]) -> List[List]:
+        """Returns the rows at the given positions of the dataset."""
+        if self.__storage in ("columnar", "snapshot"):
+            return [self.columnar_dataset().row(i) for i in positions]
+        if self.__storage == "mmap":
+            mapped = self.mapped_dataset()
+            return [mapped.rows(i, i + 1)[0] for i in positions]
+        dataset = self.dataset()
+        return [dataset[i] for i in positions]
+
+    def __iter_rows(self) -> Iterator[List]:
+        """Yields every row of the dataset, one chunk at a time."""
+        for start in range(0, self.__size(), 4096):
+            yield from self.__rows(start, start + 4096)
+
+    def sort_index(self) -> SortIndex:
+        """Cached sort permutations, each computed on its first use.
+
+        Returns:
+            SortIndex: The permutations of the rows of the dataset.
+        """
+        if self.__sort_index is None:
+            self.__sort_index = SortIndex(self.__iter_rows)
+
+        return self.__sort_index
+
+    def get_page(self, page: int = 1, page_size: int = 10,
+                 sort_by: str = None) -> List[List]:
         """Retrieves a page of the dataset based on given page number and size.
 
         Args:
             page (int): The page number (1-indexed).
             page_size (int): The number of items per page.
+            sort_by (str): The order of the rows: a column among `year`,
+                `gender`, `ethnicity`, `name`, `count` and `rank`,
+                prefixed by "-" for a descending order. Defaults to the
+                file order.
 
         Returns:
             List[List]: A list representing the data for the specified page.
@@ -62,9 +161,13 @@ class Server:
         # Get the start and end index for the requested page
         start, end = index_range(page, page_size)
 
-        # Retrieve the dataset and return the relevant slice
-        data = self.dataset()
-        if start >= len(data):
+        # Serve a sorted page as a slice of the cached permutation
+        if sort_by:
+            permutation = self.sort_index().permutation(sort_by)
+            return self.__rows_at(permutation[start:end])
+
+        # Return the relevant slice of the dataset
+        if start >= self.__size():
             return []
 
-        return data[start:end]
+        return self.__rows(start, end)
@@ -3,7 +3,15 @@
 """
 import csv
 import math
-from typing import Dict, List, Tuple
+from array import array
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from columnar_dataset import ColumnarDataset
+from csv_offset_index import MappedCSV
+from dataset_snapshot import open_dataset
+from secondary_index import SecondaryIndex
+from sort_index import SortIndex
 
 
 def index_range(page: int, page_size: int) -> Tuple[int, int]:
@@ -25,10 +33,26 @@ class Server:
     """Server class to paginate a database of popular baby names.
     """
     DATA_FILE = "Popular_Baby_Names.csv"
+    STORAGES = ("rows", "columnar", "mmap", "snapshot")
+
+    def __init__(self, storage: str = "rows"):
+        """Initializes a new Server instance.
 
-    def __init__(self):
-        """Initializes a new Server instance."""
+        Args:
+            storage (str): How the dataset is kept in memory: "rows" for
+                a list of lists of strings, "columnar" for typed
+                arrays that only rebuild the rows of the requested page,
+                "mmap" to map the CSV file and only parse the rows of
+                the requested page, or "snapshot" for typed columns
+                mapped from a binary snapshot compiled from the CSV file.
+        """
+        assert storage in self.STORAGES
+        self.__storage = storage
         self.__dataset = None
+        self.__columnar = None
+        self.__mapped = None
+        self.__secondary = None
+        self.__sort_index = None
 
     def dataset(self) -> List[List]:
         """Returns the cached dataset.
@@ -47,45 +71,164 @@ class Server:
 
         return self.__dataset
 
-    def get_page(self, page: int = 1, page_size: int = 10) -> List[List]:
+    def columnar_dataset(self) -> ColumnarDataset:
+        """Cached columnar dataset.
+
+        With the "snapshot" storage, the columns are mapped from the
+        snapshot of `DATA_FILE`, which is compiled on first use and
+        whenever the CSV file changes.
+
+        Returns:
+            ColumnarDataset: The dataset stored as typed columns.
+        """
+        if self.__columnar is None:
+            if self.__storage == "snapshot":
+                self.__columnar = open_dataset(self.DATA_FILE)
+            else:
+                self.__columnar = ColumnarDataset.from_csv(self.DATA_FILE)
+
+        return self.__columnar
+
+    def mapped_dataset(self) -> MappedCSV:
+        """Cached memory-mapped dataset.
+
+        The row offset index is persisted next to `DATA_FILE`, so only
+        the first process to map a given version of the file scans it.
+
+        Returns:
+            MappedCSV: The memory-mapped CSV file.
+        """
+        if self.__mapped is None:
+            self.__mapped = MappedCSV(self.DATA_FILE)
+
+        return self.__mapped
+
+    def __size(self) -> int:
+        """Returns the number of rows in the dataset."""
+        if self.__storage in ("columnar", "snapshot"):
+            return len(self.columnar_dataset())
+        if self.__storage == "mmap":
+            return len(self.mapped_dataset())
+        return len(self.dataset())
+
+    def __rows(self, start: int, end: int) -> List[List]:
+        """Returns the rows between two positions of the dataset."""
+        if self.__storage in ("columnar", "snapshot"):
+            return self.columnar_dataset().rows(start, end)
+        if self.__storage == "mmap":
+            return self.mapped_dataset().rows(start, end)
+        return self.dataset()[start:end]
+
+    def __rows_at(self, positions: Iterable[int]) -> List[List]:
+        """Returns the rows at the given positions of the dataset."""
+        if self.__storage in ("columnar", "snapshot"):
+            return [self.columnar_dataset().row(i) for i in positions]
+        if self.__storage == "mmap":
+            mapped = self.mapped_dataset()
+            return [mapped.rows(i, i + 1)[0] for i in positions]
+        dataset = self.dataset()
+        return [dataset[i] for i in positions]
+
+    def __iter_rows(self) -> Iterator[List]:
+        """Yields every row of the dataset, one chunk at a time."""
+        for start in range(0, self.__size(), 4096):
+            yield from self.__rows(start, start + 4096)
+
+    def secondary_index(self) -> SecondaryIndex:
+        """Cached secondary indexes, built on the first filtered query.
+
+        Returns:
+            SecondaryIndex: The indexes over the rows of the dataset.
+        """
+        if self.__secondary is None:
+            self.__secondary = SecondaryIndex.from_items(
+                enumerate(self.__iter_rows()))
+
+        return self.__secondary
+
+    def sort_index(self) -> SortIndex:
+        """Cached sort permutations, each computed on its first use.
+
+        Returns:
+            SortIndex: The permutations of the rows of the dataset.
+        """
+        if self.__sort_index is None:
+            self.__sort_index = SortIndex(self.__iter_rows)
+
+        return self.__sort_index
+
+    def __positions(self, sort_by: Optional[str],
+                    filters: Dict[str, object]) -> Optional[array]:
+        """Returns the positions to paginate, None for the file order."""
+        matches = None
+        if SecondaryIndex.criteria(filters):
+            matches = self.secondary_index().positions(filters)
+        if not sort_by:
+            return matches
+        if matches is None:
+            return self.sort_index().permutation(sort_by)
+        return self.sort_index().reorder(
+            matches, sort_by, SecondaryIndex.criteria(filters))
+
+    def get_page(self, page: int = 1, page_size: int = 10,
+                 sort_by: str = None, **filters: object) -> List[List]:
         """Retrieves a page of data from the dataset.
 
         Args:
             page (int): The page number.
             page_size (int): The number of items per page.
+            sort_by (str): The order of the rows: a column among `year`,
+                `gender`, `ethnicity`, `name`, `count` and `rank`,
+                prefixed by "-" for a descending order. Defaults to the
+                file order.
+            **filters: Values required for `year`, `gender` or
+                `ethnicity`, and a case insensitive `name_prefix`. Only
+                the matching rows are paginated.
 
         Returns:
             List[List]: The dataset for the given page.
+
+        Raises:
+            ValueError: If a filter is not one of those above.
         """
         assert isinstance(page, int) and page > 0
         assert isinstance(page_size, int) and page_size > 0
 
         start, end = index_range(page, page_size)
-        data = self.dataset()
 
-        if start >= len(data):
+        positions = self.__positions(sort_by, filters)
+        if positions is not None:
+            return self.__rows_at(positions[start:end])
+
+        if start >= self.__size():
             return []
 
-        return data[start:end]
+        return self.__rows(start, end)
 
-    def get_hyper(self, page: int = 1, page_size: int = 10) -> Dict:
+    def get_hyper(self, page: int = 1, page_size: int = 10,
+                  sort_by: str = None, **filters: object) -> Dict:
         """Returns pagination information and data for a given page.
 
         Args:
             page (int): The page number.
             page_size (int): The number of items per page.
+            sort_by (str): The order of the rows, as for `get_page`.
+            **filters: The same filters as `get_page`; the pagination
+                information then describes the matching rows only.
 
         Returns:
             Dict: A dictionary containing pagination information and data.
         """
         # Get the data for the current page
-        page_data = self.get_page(page, page_size)
+        page_data = self.get_page(page, page_size, sort_by, **filters)
 
         # Calculate the total number of pages
-        total_pages = math.ceil(len(self.dataset()) / page_size)
+        positions = self.__positions(sort_by, filters)
+        size = self.__size() if positions is None else len(positions)
+        total_pages = math.ceil(size / page_size)
 
         # Determine the next page number, or None if there's no next page
-        next_page = page + 1 if (page - 1) * page_size + page_size < len(self.dataset()) else None
+        next_page = page + 1 if page * page_size < size else None
 
         # Determine the previous page number, or None if no previous page
         prev_page = page - 1 if page > 1 else None
@@ -99,3 +242,69 @@ class Server:
             'prev_page': prev_page,
             'total_pages': total_pages,
         }
+
+    def iter_pages(self, page_size: int = 10, start_page: int = 1,
+                   sort_by: str = None, **filters: object) -> Iterator[Dict]:
+        """Lazily yields the pagination dictionary of consecutive pages.
+
+        The dataset size and the total number of pages are computed once
+        for the whole iteration, so every page only costs its own rows.
+
+        Args:
+            page_size (int): The number of items per page.
+            start_page (int): The first page to yield.
+            sort_by (str): The order of the rows, as for `get_page`.
+            **filters: The same filters as `get_page`.
+
+        Yields:
+            Dict: The same dictionary as `get_hyper` for every page from
+            `start_page` up to the last one.
+        """
+        assert isinstance(start_page, int) and start_page > 0
+        assert isinstance(page_size, int) and page_size > 0
+
+        positions = self.__positions(sort_by, filters)
+        size = self.__size() if positions is None else len(positions)
+        total_pages = math.ceil(size / page_size)
+        for page in range(start_page, total_pages + 1):
+            start, end = index_range(page, page_size)
+            if positions is None:
+                page_data = self.__rows(start, end)
+            else:
+                page_data = self.__rows_at(positions[start:end])
+            yield {
+                'page_size': len(page_data),
+                'page': page,
+                'data': page_data,
+                'next_page': page + 1 if page < total_pages else None,
+                'prev_page': page - 1 if page > 1 else None,
+                'total_pages': total_pages,
+            }
+
+    def iter_csv_pages(self, page_size: int = 10,
+                       start_page: int = 1) -> Iterator[List[List]]:
+        """Lazily yields pages of rows read straight from the CSV file.
+
+        Neither the cached dataset nor any storage is loaded: only one
+        page of rows is held in memory at a time, which makes it the
+        bulk export path for files of any size.
+
+        Args:
+            page_size (int): The number of items per page.
+            start_page (int): The first page to yield.
+
+        Yields:
+            List[List]: The rows of every page from `start_page` up to
+            the last one.
+        """
+        assert isinstance(start_page, int) and start_page > 0
+        assert isinstance(page_size, int) and page_size > 0
+
+        start, _ = index_range(start_page, page_size)
+        with open(self.DATA_FILE) as f:
+            reader = csv.reader(f)
+            rows = islice(reader, start + 1, None)  # Skip the header row
+            page_data = list(islice(rows, page_size))
+            while page_data:
+                yield page_data
+                page_data = list(islice(rows, page_size))
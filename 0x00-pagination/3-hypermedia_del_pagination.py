@@ -1,20 +1,56 @@
 #!/usr/bin/env python3
 """Deletion-resilient hypermedia pagination
 """
+import base64
 import csv
+import hashlib
+import hmac
 import math
-from typing import Dict, List
+import os
+import struct
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Tuple
+
+from columnar_dataset import ColumnarDataset, IndexedRows
+from dataset_snapshot import open_dataset
+from live_index import LiveIndex
+from secondary_index import SecondaryIndex
+from versioned_rows import RowSnapshot, VersionedRows
 
 
 class Server:
     """Server class to paginate a database of popular baby names.
     """
     DATA_FILE = "Popular_Baby_Names.csv"
+    STORAGES = ("rows", "snapshot")
+    # Number of snapshot versions kept alive for cursors in flight
+    SNAPSHOT_RETENTION = 32
+    # version, key of the next row, then a truncated HMAC-SHA256
+    CURSOR = struct.Struct(">QQ")
+    CURSOR_MAC_SIZE = 8
+
+    def __init__(self, cursor_secret: bytes = None, storage: str = "rows"):
+        """Initializes a new Server instance.
 
-    def __init__(self):
-        """Initializes a new Server instance."""
+        Args:
+            cursor_secret (bytes): The key signing pagination cursors.
+                Workers sharing cursors must share it; a random key is
+                used by default.
+            storage (str): How the indexed dataset is kept: "rows" for a
+                dictionary of lists of strings, or "snapshot" for typed
+                columns mapped from a binary snapshot compiled from the
+                CSV file, rebuilding only the rows that are read.
+        """
+        assert storage in self.STORAGES
+        self.__storage = storage
         self.__dataset = None
+        self.__columnar = None
         self.__indexed_dataset = None
+        self.__live_index = None
+        self.__versioned = None
+        self.__secondary = None
+        self.__snapshots = OrderedDict()
+        self.__cursor_secret = cursor_secret or os.urandom(32)
 
     def dataset(self) -> List[List]:
         """Cached dataset."""
@@ -26,38 +62,147 @@ class Server:
 
         return self.__dataset
 
+    def columnar_dataset(self) -> ColumnarDataset:
+        """Dataset mapped from the snapshot of `DATA_FILE`.
+
+        The snapshot is compiled on first use and whenever the CSV file
+        changes.
+        """
+        if self.__columnar is None:
+            self.__columnar = open_dataset(self.DATA_FILE)
+        return self.__columnar
+
     def indexed_dataset(self) -> Dict[int, List]:
         """Dataset indexed by sorting position, starting at 0."""
         if self.__indexed_dataset is None:
-            dataset = self.dataset()
-            self.__indexed_dataset = {
-                i: dataset[i] for i in range(len(dataset))
-            }
+            if self.__storage == "snapshot":
+                self.__indexed_dataset = IndexedRows(
+                    self.columnar_dataset())
+            else:
+                dataset = self.dataset()
+                self.__indexed_dataset = {
+                    i: dataset[i] for i in range(len(dataset))
+                }
         return self.__indexed_dataset
 
-    def get_hyper_index(self, index: int = None, page_size: int = 10) -> Dict:
+    def live_index(self) -> LiveIndex:
+        """Index of the positions of the dataset that were not deleted."""
+        if self.__live_index is None:
+            if self.__storage == "snapshot":
+                size = len(self.columnar_dataset())
+            else:
+                size = len(self.dataset())
+            self.__live_index = LiveIndex(size)
+        return self.__live_index
+
+    def delete(self, index: int) -> bool:
+        """Deletes a row from the indexed dataset.
+
+        Args:
+            index (int): The position of the row to delete.
+
+        Returns:
+            bool: True if the row existed and was deleted.
+        """
+        self.indexed_dataset().pop(index, None)
+        if self.__versioned is not None:
+            self.__versioned.delete(index)
+        if self.__secondary is not None:
+            self.__secondary.remove(index)
+        return self.live_index().delete(index)
+
+    def insert(self, row: List) -> int:
+        """Appends a row after all the rows of the indexed dataset.
+
+        Args:
+            row (List): The row to insert.
+
+        Returns:
+            int: The index of the new row.
+        """
+        index = self.live_index().append()
+        self.indexed_dataset()[index] = row
+        if self.__versioned is not None:
+            self.__versioned.append(index, row)
+        if self.__secondary is not None:
+            self.__secondary.add(index, row)
+        return index
+
+    def secondary_index(self) -> SecondaryIndex:
+        """Secondary indexes over the indexed dataset, built on first use.
+
+        Deleted rows are removed from the posting lists, which skip them
+        in near constant time when read.
+        """
+        if self.__secondary is None:
+            indexed_dataset = self.indexed_dataset()
+            self.__secondary = SecondaryIndex.from_items(
+                (i, indexed_dataset[i]) for i in sorted(indexed_dataset))
+        return self.__secondary
+
+    def __live_positions(self, index: int,
+                         filters: Dict[str, object]) -> Iterator[int]:
+        """Yields the live positions from an index, matching filters."""
+        live = self.live_index()
+        matches = self.secondary_index().matches(filters) \
+            if SecondaryIndex.criteria(filters) else None
+        if matches is None:
+            i = live.next_live(index)
+            while i is not None:
+                yield i
+                i = live.next_live(i + 1)
+        else:
+            yield from matches.iter_from(index)
+
+    def versioned_rows(self) -> VersionedRows:
+        """Copy-on-write versions of the live rows, built on first use."""
+        if self.__versioned is None:
+            indexed_dataset = self.indexed_dataset()
+            self.__versioned = VersionedRows(RowSnapshot.from_items(
+                (i, indexed_dataset[i]) for i in sorted(indexed_dataset)))
+        return self.__versioned
+
+    def get_hyper_index(self, index: int = None, page_size: int = 10,
+                        **filters: object) -> Dict:
         """Retrieves dictionary with pagination information based on index.
 
+        Deleted rows are skipped through the live index, so the page is
+        found in O(page_size + log n) whatever the number of deletions.
+        Rows removed from `indexed_dataset` directly, rather than with
+        `delete`, are recorded in the live index when first met.
+
         Args:
             index (int): The start index for the page.
             page_size (int): The number of items per page.
+            **filters: Values required for `year`, `gender` or
+                `ethnicity`, and a case insensitive `name_prefix`. Only
+                the matching rows are paginated, through the secondary
+                indexes.
 
         Returns:
             Dict: Pagination information with current index, page data,
             next index, and page size.
+
+        Raises:
+            ValueError: If a filter is not one of those above.
         """
-        assert index is not None and index >= 0 and index < len(self.indexed_dataset())
+        live = self.live_index()
+        assert index is not None and 0 <= index < live.size
 
+        indexed_dataset = self.indexed_dataset()
         # List to store page data
         page_data = []
+
         # Flag to track the next index
         next_index = None
 
-        # Find the page data starting from the given index
-        start = index
-        for i in range(start, len(self.indexed_dataset())):
-            if len(page_data) < page_size:
-                page_data.append(self.indexed_dataset()[i])
+        # Collect page_size live rows starting from the given index
+        for i in self.__live_positions(index, filters):
+            row = indexed_dataset.get(i)
+            if row is None:
+                self.delete(i)
+            elif len(page_data) < page_size:
+                page_data.append(row)
             else:
                 next_index = i
                 break
@@ -69,3 +214,83 @@ class Server:
             'page_size': len(page_data),
             'data': page_data,
         }
+
+    def get_hyper_cursor(self, cursor: str = None,
+                         page_size: int = 10) -> Dict:
+        """Retrieves a page of rows designated by an opaque cursor.
+
+        The first call, without a cursor, pins the current version of
+        the dataset. Every `next_cursor` carries that version and the
+        index of the next row, signed with the server secret, so the
+        following pages are read from the same snapshot, in O(log n)
+        per page, whatever the inserts and deletions in the meantime.
+        Once a version falls out of the `SNAPSHOT_RETENTION` most
+        recently used ones, the cursor continues on the latest version.
+
+        Args:
+            cursor (str): The cursor returned by the previous page.
+            page_size (int): The number of items per page.
+
+        Returns:
+            Dict: Pagination information with the current cursor, the
+            page data, the next cursor (None on the last page), the page
+            size and the version of the dataset read.
+
+        Raises:
+            ValueError: If the cursor is malformed or was not signed by
+            this server.
+        """
+        assert isinstance(page_size, int) and page_size > 0
+
+        if cursor is None:
+            snapshot = self.versioned_rows().snapshot()
+            key = 0
+        else:
+            version, key = self.__decode_cursor(cursor)
+            snapshot = self.__snapshots.get(version)
+            if snapshot is None:
+                snapshot = self.versioned_rows().snapshot()
+        self.__retain(snapshot)
+
+        page_data, next_key = snapshot.page(key, page_size)
+        next_cursor = None
+        if next_key is not None:
+            next_cursor = self.__encode_cursor(snapshot.version, next_key)
+        return {
+            'cursor': cursor,
+            'next_cursor': next_cursor,
+            'page_size': len(page_data),
+            'data': page_data,
+            'version': snapshot.version,
+        }
+
+    def __retain(self, snapshot: RowSnapshot):
+        """Keeps a snapshot among the most recently used versions."""
+        self.__snapshots[snapshot.version] = snapshot
+        self.__snapshots.move_to_end(snapshot.version)
+        while len(self.__snapshots) > self.SNAPSHOT_RETENTION:
+            self.__snapshots.popitem(last=False)
+
+    def __sign(self, payload: bytes) -> bytes:
+        """Returns the truncated signature of a cursor payload."""
+        digest = hmac.new(self.__cursor_secret, payload, hashlib.sha256)
+        return digest.digest()[:self.CURSOR_MAC_SIZE]
+
+    def __encode_cursor(self, version: int, key: int) -> str:
+        """Packs and signs a version and a row index into a cursor."""
+        payload = self.CURSOR.pack(version, key)
+        token = base64.urlsafe_b64encode(payload + self.__sign(payload))
+        return token.rstrip(b"=").decode("ascii")
+
+    def __decode_cursor(self, cursor: str) -> Tuple[int, int]:
+        """Checks and unpacks the version and row index of a cursor."""
+        try:
+            token = cursor.encode("ascii")
+            raw = base64.urlsafe_b64decode(token + b"=" * (-len(token) % 4))
+        except (AttributeError, UnicodeError, ValueError):
+            raise ValueError("malformed cursor")
+        payload, mac = raw[:self.CURSOR.size], raw[self.CURSOR.size:]
+        if len(raw) != self.CURSOR.size + self.CURSOR_MAC_SIZE or \
+                not hmac.compare_digest(mac, self.__sign(payload)):
+            raise ValueError("invalid cursor")
+        return self.CURSOR.unpack(payload)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Asynchronous hypermedia pagination.
+"""
+import asyncio
+from concurrent.futures import Executor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+Server = __import__('2-hypermedia_pagination').Server
+
+
+class AsyncServer:
+    """Asyncio front end of the hypermedia pagination Server.
+
+    Loading the dataset, and building the indexes behind sorted or
+    filtered pages, runs in an executor so it never blocks the event
+    loop. The first load is single-flight: concurrent first calls all
+    wait for the same load instead of parsing the file each.
+    """
+
+    def __init__(self, storage: str = "rows",
+                 executor: Optional[Executor] = None):
+        """Initializes a new AsyncServer instance.
+
+        Args:
+            storage (str): The dataset storage, as for `Server`.
+            executor (Executor): Where blocking work runs; defaults to
+                the event loop's default executor.
+        """
+        self.server = Server(storage)
+        self.__executor = executor
+        self.__loaded = False
+        self.__loading = None  # type: Optional[asyncio.Future]
+
+    async def __in_executor(self, function: Callable, *args) -> object:
+        """Runs a blocking function in the executor and awaits it."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, function, *args)
+
+    async def load(self):
+        """Loads the dataset in the executor, once for all callers.
+
+        A failed load is not cached: the next call tries again.
+        """
+        if self.__loaded:
+            return
+        if self.__loading is None:
+            self.__loading = asyncio.ensure_future(
+                self.__in_executor(self.server.get_hyper, 1, 1))
+        loading = self.__loading
+        try:
+            await asyncio.shield(loading)
+        except Exception:
+            if self.__loading is loading:
+                self.__loading = None
+            raise
+        self.__loaded = True
+
+    async def get_hyper(self, page: int = 1, page_size: int = 10,
+                        sort_by: str = None, **filters: object) -> Dict:
+        """Returns pagination information and data for a given page.
+
+        Args:
+            page (int): The page number.
+            page_size (int): The number of items per page.
+            sort_by (str): The order of the rows, as for `Server`.
+            **filters: The row filters, as for `Server`.
+
+        Returns:
+            Dict: The same dictionary as `Server.get_hyper`.
+        """
+        pages = await self.get_pages_many([(page, page_size)], sort_by,
+                                          **filters)
+        return pages[0]
+
+    async def get_pages_many(self, requests: Iterable[Tuple[int, int]],
+                             sort_by: str = None,
+                             **filters: object) -> List[Dict]:
+        """Serves many page requests in one batched call.
+
+        The dataset is loaded at most once for the whole batch. Plain
+        pages are only slices of the loaded dataset and are served
+        directly; sorted or filtered pages may have to build an index
+        first, so that batch runs as a single executor job.
+
+        Args:
+            requests (Iterable[Tuple[int, int]]): (page, page_size)
+                pairs, as passed to `Server.get_hyper`.
+            sort_by (str): The order of the rows, for every request.
+            **filters: The row filters, for every request.
+
+        Returns:
+            List[Dict]: The `Server.get_hyper` dictionary of every
+            request, in the same order.
+        """
+        await self.load()
+        requests = list(requests)
+
+        def serve() -> List[Dict]:
+            """Computes every page of the batch."""
+            get_hyper = self.server.get_hyper
+            return [get_hyper(page, page_size, sort_by, **filters)
+                    for page, page_size in requests]
+
+        if sort_by or filters:
+            return await self.__in_executor(serve)
+        return serve()
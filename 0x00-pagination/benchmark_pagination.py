@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""Benchmarks the pagination servers on synthetic baby names datasets.
+
+Every case runs in its own process so that its cold load time and peak
+resident set size are measured in isolation, and all results are
+written as JSON, to standard output or the file given by `-o`, to
+compare them between commits. Progress and comparisons go to standard
+error:
+
+    ./benchmark_pagination.py --rows 10000 100000 1000000 -o new.json
+    ./benchmark_pagination.py --rows 10000 --compare old.json
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GENDERS = ("FEMALE", "MALE")
+ETHNICITIES = ("ASIAN AND PACIFIC ISLANDER", "BLACK NON HISPANIC",
+               "HISPANIC", "WHITE NON HISPANIC")
+SYLLABLES = ("an", "be", "chi", "da", "el", "fa", "li", "ma", "no", "ra",
+             "sa", "ti", "va", "ya", "zo")
+# Module, storage and operations of every benchmarked case
+CASES = (
+    ("1-simple_pagination", "rows", ("get_page",)),
+    ("1-simple_pagination", "columnar", ("get_page",)),
+    ("1-simple_pagination", "mmap", ("get_page",)),
+    ("1-simple_pagination", "snapshot", ("get_page",)),
+    ("2-hypermedia_pagination", "rows", ("get_hyper",)),
+    ("2-hypermedia_pagination", "snapshot", ("get_hyper",)),
+    ("3-hypermedia_del_pagination", "rows",
+     ("get_hyper_index", "delete_heavy")),
+    ("3-hypermedia_del_pagination", "snapshot",
+     ("get_hyper_index", "delete_heavy")),
+)
+
+
+def generate_csv(path: str, rows: int, seed: int = 0):
+    """Writes a synthetic CSV shaped like Popular_Baby_Names.csv.
+
+    Args:
+        path (str): The file to write.
+        rows (int): The number of data rows.
+        seed (int): The seed of the random generator.
+    """
+    rng = random.Random(seed)
+    names = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+             .capitalize() for _ in range(5000)]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(["Year of Birth", "Gender", "Ethnicity",
+                         "Child's First Name", "Count", "Rank"])
+        for _ in range(rows):
+            writer.writerow([rng.randint(2011, 2016), rng.choice(GENDERS),
+                             rng.choice(ETHNICITIES), rng.choice(names),
+                             rng.randint(10, 400), rng.randint(1, 100)])
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Returns the p50 and p99 of latency samples, in microseconds.
+
+    Args:
+        samples (List[float]): The latencies, in seconds.
+
+    Returns:
+        Dict[str, float]: The p50 and p99 latencies.
+    """
+    ordered = sorted(samples)
+    return {
+        "p50_us": ordered[len(ordered) // 2] * 1e6,
+        "p99_us": ordered[min(len(ordered) - 1,
+                              int(len(ordered) * 0.99))] * 1e6,
+    }
+
+
+def latencies(call: Callable[[int], object],
+              arguments: List[int]) -> Dict[str, float]:
+    """Times a call for every argument.
+
+    Args:
+        call (Callable[[int], object]): The operation to time.
+        arguments (List[int]): The argument of every call.
+
+    Returns:
+        Dict[str, float]: The p50 and p99 latencies.
+    """
+    samples = []
+    clock = time.perf_counter
+    for argument in arguments:
+        start = clock()
+        call(argument)
+        samples.append(clock() - start)
+    return percentiles(samples)
+
+
+def peak_rss_kb() -> int:
+    """Returns the peak resident set size of the process, in KiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_case(module: str, storage: str, operation: str, data_file: str,
+             rows: int, page_size: int, samples: int) -> Dict:
+    """Runs one benchmark case in the current process.
+
+    Args:
+        module (str): The pagination module to benchmark.
+        storage (str): The storage of the Server.
+        operation (str): The operation to time.
+        data_file (str): The CSV file to paginate.
+        rows (int): The number of data rows of the file.
+        page_size (int): The number of items per page.
+        samples (int): The number of timed calls per depth.
+
+    Returns:
+        Dict: The measures of the case.
+    """
+    sys.path.insert(0, HERE)
+    Server = __import__(module).Server
+    Server.DATA_FILE = data_file
+    rng = random.Random(1)
+    pages = max(rows // page_size, 1)
+    result = {"module": module, "storage": storage,
+              "operation": operation, "rows": rows,
+              "page_size": page_size}
+
+    start = time.perf_counter()
+    server = Server(storage=storage)
+    if operation in ("get_hyper_index", "delete_heavy"):
+        server.get_hyper_index(0, page_size)
+    else:
+        getattr(server, operation)(1, page_size)
+    result["cold_load_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    warm = Server(storage=storage)
+    if operation in ("get_hyper_index", "delete_heavy"):
+        warm.get_hyper_index(0, page_size)
+    else:
+        getattr(warm, operation)(1, page_size)
+    result["warm_load_s"] = time.perf_counter() - start
+    del warm
+
+    shallow = [rng.randint(1, min(pages, 10)) for _ in range(samples)]
+    deep = [rng.randint(max(pages - 10, 1), pages) for _ in range(samples)]
+    if operation in ("get_hyper_index", "delete_heavy"):
+        if operation == "delete_heavy":
+            start = time.perf_counter()
+            for index in rng.sample(range(rows), rows // 2):
+                server.delete(index)
+            result["delete_s"] = time.perf_counter() - start
+
+        def call(page: int) -> object:
+            """Reads the page starting at the index of a page number."""
+            return server.get_hyper_index((page - 1) * page_size, page_size)
+    else:
+        operate = getattr(server, operation)
+        index_range = __import__(module).index_range
+        result["index_range"] = latencies(
+            lambda page: index_range(page, page_size), shallow)
+
+        def call(page: int) -> object:
+            """Reads a page by number."""
+            return operate(page, page_size)
+
+    result["shallow"] = latencies(call, shallow)
+    result["deep"] = latencies(call, deep)
+    result["peak_rss_kb"] = peak_rss_kb()
+    return result
+
+
+def git_commit() -> Optional[str]:
+    """Returns the commit of the working tree, if it is a git repo."""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict], baseline: List[Dict]):
+    """Prints the ratio of every latency and load time to a baseline.
+
+    Args:
+        results (List[Dict]): The results of this run.
+        baseline (List[Dict]): The results of a previous run.
+    """
+    def key(result: Dict) -> tuple:
+        """Identifies a case across runs."""
+        return (result["module"], result["storage"], result["operation"],
+                result["rows"], result["page_size"])
+
+    previous = {key(result): result for result in baseline}
+    for result in results:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        ratios = ["cold {:.2f}x".format(
+            result["cold_load_s"] / old["cold_load_s"])]
+        for depth in ("shallow", "deep"):
+            for measure in ("p50_us", "p99_us"):
+                ratios.append("{} {} {:.2f}x".format(
+                    depth, measure[:3],
+                    result[depth][measure] / max(old[depth][measure], 1e-9)))
+        print("{:<28} {:<8} {:<15} {:>9,}  {}".format(
+            *key(result)[:4], ", ".join(ratios)), file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Runs every case for every dataset size and writes the results.
+
+    Args:
+        argv (List[str]): The command line arguments.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--rows", type=int, nargs="+",
+                        default=[10 ** 4, 10 ** 5],
+                        help="dataset sizes, 10^4 to 10^7 rows")
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--storages", nargs="+",
+                        help="only run the cases of these storages")
+    parser.add_argument("-o", "--output",
+                        help="where to write the JSON results, "
+                             "standard output by default")
+    parser.add_argument("--compare", help="a previous JSON output")
+    parser.add_argument("--data-dir", help="where synthetic CSVs are kept")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        json.dump(run_case(**json.loads(args.worker)), sys.stdout)
+        return
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="pagination_bench")
+    os.makedirs(data_dir, exist_ok=True)
+    results = []
+    for rows in args.rows:
+        data_file = os.path.join(data_dir, "names_{}.csv".format(rows))
+        if not os.path.exists(data_file):
+            generate_csv(data_file, rows)
+        for module, storage, operations in CASES:
+            if args.storages and storage not in args.storages:
+                continue
+            for operation in operations:
+                for sidecar in (".idx", ".snap"):
+                    if os.path.exists(data_file + sidecar):
+                        os.unlink(data_file + sidecar)
+                case = {"module": module, "storage": storage,
+                        "operation": operation, "data_file": data_file,
+                        "rows": rows, "page_size": args.page_size,
+                        "samples": args.samples}
+                output = subprocess.check_output(
+                    [sys.executable, os.path.abspath(__file__),
+                     "--worker", json.dumps(case)])
+                result = json.loads(output)
+                results.append(result)
+                print("{:<28} {:<8} {:<15} {:>9,} rows  cold {:8.3f}s  "
+                      "deep p50 {:9.1f}us p99 {:9.1f}us  rss {:>8,}KiB"
+                      .format(module, storage, operation, rows,
+                              result["cold_load_s"],
+                              result["deep"]["p50_us"],
+                              result["deep"]["p99_us"],
+                              result["peak_rss_kb"]), file=sys.stderr)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f)["results"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""Columnar, array-backed storage for the popular baby names dataset.
+"""
+import csv
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, MutableMapping, Sequence
+
+
+# Narrowest array typecodes tried, in order, for integer columns
+INT_TYPECODES = ('B', 'b', 'H', 'h', 'I', 'i', 'L', 'l', 'q')
+
+
+class IntColumn:
+    """Column of canonical decimal integers kept in a typed array.
+
+    Only values whose string form round-trips through `int` are
+    accepted, so rows rebuilt from the column are identical to the
+    strings read from the CSV file.
+    """
+
+    kind = 'int'
+
+    def __init__(self):
+        """Initializes an empty column backed by a 64-bit array."""
+        self.values = array('q')
+
+    def append(self, value: str):
+        """Appends a value to the column.
+
+        Args:
+            value (str): The decimal string to store.
+
+        Raises:
+            ValueError: If the value is not a canonical integer string.
+        """
+        number = int(value)
+        if str(number) != value:
+            raise ValueError("non canonical integer: {!r}".format(value))
+        self.values.append(number)
+
+    def freeze(self):
+        """Narrows the backing array to the smallest fitting typecode."""
+        if not self.values:
+            return
+        low, high = min(self.values), max(self.values)
+        for typecode in INT_TYPECODES:
+            bits = array(typecode).itemsize * 8
+            if typecode.isupper():
+                fits = low >= 0 and high < 2 ** bits
+            else:
+                fits = -2 ** (bits - 1) <= low and high < 2 ** (bits - 1)
+            if fits:
+                if typecode != self.values.typecode:
+                    self.values = array(typecode, self.values)
+                return
+
+    def get(self, index: int) -> str:
+        """Returns the value at a position, as it appeared in the CSV.
+
+        Args:
+            index (int): The row position.
+
+        Returns:
+            str: The value at the given position.
+        """
+        return str(self.values[index])
+
+    def __len__(self) -> int:
+        """Returns the number of values in the column."""
+        return len(self.values)
+
+    def nbytes(self) -> int:
+        """Returns the approximate memory used by the column in bytes."""
+        return sys.getsizeof(self.values)
+
+
+class CategoryColumn:
+    """Column of repeated labels stored as small integer codes.
+
+    Every distinct label is interned once in `categories` and each row
+    only keeps the one byte (or two byte) code pointing at it.
+    """
+
+    kind = 'category'
+
+    def __init__(self):
+        """Initializes an empty column with no known categories."""
+        self.categories = []  # type: List[str]
+        self.__codes_by_label = {}  # type: Dict[str, int]
+        self.codes = array('B')
+
+    def append(self, value: str):
+        """Appends a label to the column, interning it if it is new.
+
+        Args:
+            value (str): The label to store.
+        """
+        code = self.__codes_by_label.get(value)
+        if code is None:
+            code = len(self.categories)
+            self.__codes_by_label[value] = code
+            self.categories.append(sys.intern(value))
+            if code > 0xFF and self.codes.typecode == 'B':
+                self.codes = array('H', self.codes)
+            elif code > 0xFFFF and self.codes.typecode == 'H':
+                self.codes = array('L', self.codes)
+        self.codes.append(code)
+
+    def freeze(self):
+        """Drops the label lookup table that is only needed to build."""
+        self.__codes_by_label = {}
+
+    def get(self, index: int) -> str:
+        """Returns the label at a position.
+
+        Args:
+            index (int): The row position.
+
+        Returns:
+            str: The label at the given position.
+        """
+        return self.categories[self.codes[index]]
+
+    def code_of(self, value: str) -> int:
+        """Returns the code of a label, or -1 if the label is unknown.
+
+        Args:
+            value (str): The label to look up.
+
+        Returns:
+            int: The code stored for rows carrying the label.
+        """
+        try:
+            return self.categories.index(value)
+        except ValueError:
+            return -1
+
+    def __len__(self) -> int:
+        """Returns the number of values in the column."""
+        return len(self.codes)
+
+    def nbytes(self) -> int:
+        """Returns the approximate memory used by the column in bytes."""
+        return (sys.getsizeof(self.codes) + sys.getsizeof(self.categories) +
+                sum(sys.getsizeof(label) for label in self.categories))
+
+
+class StringPoolColumn:
+    """Column of free-form strings concatenated into a single pool.
+
+    The end offset of every value is kept in a typed array, so the
+    column costs one string object plus one machine word per row.
+    """
+
+    kind = 'string'
+
+    def __init__(self):
+        """Initializes an empty column with an empty string pool."""
+        self.pool = ''
+        self.offsets = array('L', [0])
+        self.__parts = []  # type: List[str]
+
+    def append(self, value: str):
+        """Appends a string to the pool.
+
+        Args:
+            value (str): The string to store.
+        """
+        self.__parts.append(value)
+        self.offsets.append(self.offsets[-1] + len(value))
+
+    def freeze(self):
+        """Joins the pending strings into the pool."""
+        if self.__parts:
+            self.pool += ''.join(self.__parts)
+            self.__parts = []
+
+    def get(self, index: int) -> str:
+        """Returns the string at a position.
+
+        Args:
+            index (int): The row position.
+
+        Returns:
+            str: The string at the given position.
+        """
+        return self.pool[self.offsets[index]:self.offsets[index + 1]]
+
+    def __len__(self) -> int:
+        """Returns the number of values in the column."""
+        return len(self.offsets) - 1
+
+    def nbytes(self) -> int:
+        """Returns the approximate memory used by the column in bytes."""
+        return sys.getsizeof(self.pool) + sys.getsizeof(self.offsets)
+
+
+COLUMN_TYPES = {
+    'int': IntColumn,
+    'category': CategoryColumn,
+    'string': StringPoolColumn,
+}
+
+
+class ColumnarDataset:
+    """Read-only table whose columns are stored in compact buffers.
+
+    Rows are only rebuilt, as lists of strings, for the positions that
+    are actually requested, which keeps the resident size of the
+    dataset a fraction of the equivalent list of lists.
+    """
+
+    # Year of Birth, Gender, Ethnicity, Child's First Name, Count, Rank
+    BABY_NAMES_KINDS = ('int', 'category', 'category', 'string', 'int',
+                        'int')
+
+    def __init__(self, kinds: Sequence[str]):
+        """Initializes an empty dataset with the given column kinds.
+
+        Args:
+            kinds (Sequence[str]): One of 'int', 'category' or 'string'
+                for every column of the table.
+        """
+        self.header = []  # type: List[str]
+        self.columns = [COLUMN_TYPES[kind]() for kind in kinds]
+        self.__length = 0
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[List[str]],
+                  kinds: Sequence[str]) -> 'ColumnarDataset':
+        """Builds a dataset from an iterable of rows of strings.
+
+        An integer column that meets a non canonical value (such as
+        "007") is demoted to a string pool so no row ever changes.
+
+        Args:
+            rows (Iterable[List[str]]): The rows, without the header.
+            kinds (Sequence[str]): The kind of every column.
+
+        Returns:
+            ColumnarDataset: The populated dataset.
+        """
+        table = cls(kinds)
+        columns = table.columns
+        for position, row in enumerate(rows):
+            for i, value in enumerate(row):
+                try:
+                    columns[i].append(value)
+                except ValueError:
+                    columns[i] = table.__demote(columns[i], position)
+                    columns[i].append(value)
+        for column in columns:
+            column.freeze()
+        table.__length = len(columns[0]) if columns else 0
+        return table
+
+    @classmethod
+    def from_columns(cls, columns: List[object],
+                     header: List[str]) -> 'ColumnarDataset':
+        """Builds a dataset around columns that are already populated.
+
+        Args:
+            columns (List[object]): Columns of equal length, exposing
+                `kind`, `get`, `__len__` and `nbytes`.
+            header (List[str]): The names of the columns.
+
+        Returns:
+            ColumnarDataset: The dataset holding the columns.
+        """
+        table = cls(())
+        table.columns = columns
+        table.header = header
+        table.__length = len(columns[0]) if columns else 0
+        return table
+
+    @classmethod
+    def from_csv(cls, path: str,
+                 kinds: Sequence[str] = BABY_NAMES_KINDS
+                 ) -> 'ColumnarDataset':
+        """Builds a dataset by streaming a CSV file with a header row.
+
+        Args:
+            path (str): The path of the CSV file.
+            kinds (Sequence[str]): The kind of every column.
+
+        Returns:
+            ColumnarDataset: The populated dataset.
+        """
+        with open(path) as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            table = cls.from_rows(reader, kinds)
+        table.header = header
+        return table
+
+    @staticmethod
+    def __demote(column: IntColumn, length: int) -> StringPoolColumn:
+        """Copies the first values of an integer column into a pool."""
+        demoted = StringPoolColumn()
+        for i in range(length):
+            demoted.append(column.get(i))
+        return demoted
+
+    def __len__(self) -> int:
+        """Returns the number of rows in the dataset."""
+        return self.__length
+
+    def row(self, index: int) -> List[str]:
+        """Rebuilds a single row.
+
+        Args:
+            index (int): The row position.
+
+        Returns:
+            List[str]: The row, exactly as read from the CSV file.
+        """
+        return [column.get(index) for column in self.columns]
+
+    def rows(self, start: int, end: int) -> List[List[str]]:
+        """Rebuilds the rows between two positions.
+
+        Args:
+            start (int): The first position, included.
+            end (int): The last position, excluded; clipped to the size.
+
+        Returns:
+            List[List[str]]: The rows, exactly as read from the CSV file.
+        """
+        getters = [column.get for column in self.columns]
+        return [[get(i) for get in getters]
+                for i in range(start, min(end, self.__length))]
+
+    def nbytes(self) -> int:
+        """Returns the approximate memory used by the dataset in bytes."""
+        return sum(column.nbytes() for column in self.columns)
+
+
+class IndexedRows(MutableMapping):
+    """Position to row mapping over a table, with deletions and inserts.
+
+    It behaves like the dictionary of every row of the table by
+    position, but only rebuilds the rows that are read: deleted
+    positions are kept in a set and inserted rows in a dictionary.
+    """
+
+    def __init__(self, table: ColumnarDataset):
+        """Initializes the mapping with every row of a table.
+
+        Args:
+            table (ColumnarDataset): The rows before any change.
+        """
+        self.__table = table
+        self.__deleted = set()
+        self.__inserted = {}  # type: Dict[int, List]
+
+    def __getitem__(self, position: int) -> List:
+        """Returns the row at a position."""
+        row = self.__inserted.get(position)
+        if row is not None:
+            return row
+        if position in self.__deleted or \
+                not 0 <= position < len(self.__table):
+            raise KeyError(position)
+        return self.__table.row(position)
+
+    def __setitem__(self, position: int, row: List):
+        """Sets the row at a position."""
+        self.__inserted[position] = row
+        self.__deleted.add(position)
+
+    def __delitem__(self, position: int):
+        """Deletes the row at a position."""
+        if self.__inserted.pop(position, None) is None:
+            if position in self.__deleted or \
+                    not 0 <= position < len(self.__table):
+                raise KeyError(position)
+        self.__deleted.add(position)
+
+    def __contains__(self, position: object) -> bool:
+        """Tells whether a position holds a row."""
+        return position in self.__inserted or (
+            isinstance(position, int) and position not in self.__deleted and
+            0 <= position < len(self.__table))
+
+    def __iter__(self) -> Iterator[int]:
+        """Yields the positions holding a row, table rows first."""
+        deleted = self.__deleted
+        for position in range(len(self.__table)):
+            if position not in deleted:
+                yield position
+        yield from self.__inserted
+
+    def __len__(self) -> int:
+        """Returns the number of positions holding a row."""
+        table = len(self.__table)
+        shadowed = sum(1 for position in self.__deleted
+                       if 0 <= position < table)
+        return table - shadowed + len(self.__inserted)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Memory-mapped CSV file with a persisted index of row byte offsets.
+"""
+import csv
+import io
+import locale
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import List, Optional
+
+
+class MappedCSV:
+    """Random access to the data rows of a CSV file without parsing it.
+
+    The file is memory-mapped read-only, so its pages live in the page
+    cache and are shared by every process mapping it. The byte offset of
+    every data row is stored in a sidecar index file, written once next
+    to the CSV and memory-mapped as well, so reading any range of rows
+    costs two offset lookups and parsing only those rows.
+
+    Rows are parsed as `csv.reader` parses the file opened in text mode,
+    quoted line breaks included, as long as records end with "\n" or
+    "\r\n".
+    """
+
+    INDEX_SUFFIX = ".idx"
+    MAGIC = b"PGIDX\x00\x00\x02"
+    # magic, CSV size in bytes, CSV mtime in ns, number of data rows
+    HEADER = struct.Struct("<8sQQQ")
+    OFFSET = struct.Struct("<Q")
+    # The encoding `open` reads the file with in the other storages
+    ENCODING = locale.getpreferredencoding(False)
+
+    def __init__(self, path: str, index_path: Optional[str] = None):
+        """Maps a CSV file and loads, or builds, its row offset index.
+
+        Args:
+            path (str): The path of the CSV file, header row included.
+            index_path (str): Where the index is persisted; defaults to
+                the CSV path followed by `INDEX_SUFFIX`.
+        """
+        self.path = path
+        self.index_path = index_path or path + self.INDEX_SUFFIX
+        self.__data = None  # type: Optional[mmap.mmap]
+        self.__index = None  # type: Optional[mmap.mmap]
+        self.__offsets = None  # type: Optional[array]
+        self.__length = 0
+
+        stat = os.stat(path)
+        if stat.st_size:
+            with open(path, "rb") as f:
+                self.__data = mmap.mmap(f.fileno(), 0,
+                                        access=mmap.ACCESS_READ)
+        if not self.__load_index(stat):
+            self.__build_index(stat)
+
+    def __load_index(self, stat: os.stat_result) -> bool:
+        """Maps the sidecar index if it matches the current CSV file."""
+        try:
+            with open(self.index_path, "rb") as f:
+                index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+        if len(index) < self.HEADER.size:
+            index.close()
+            return False
+        magic, size, mtime, length = self.HEADER.unpack_from(index)
+        expected = self.HEADER.size + (length + 1) * self.OFFSET.size
+        if (magic != self.MAGIC or size != stat.st_size or
+                mtime != stat.st_mtime_ns or len(index) != expected):
+            index.close()
+            return False
+        self.__index = index
+        self.__length = length
+        return True
+
+    @classmethod
+    def decode(cls, chunk: bytes) -> str:
+        """Decodes bytes of the file as `open` does in text mode.
+
+        Args:
+            chunk (bytes): Whole lines of the file.
+
+        Returns:
+            str: The text, with universal newlines.
+        """
+        return chunk.decode(cls.ENCODING).replace(
+            "\r\n", "\n").replace("\r", "\n")
+
+    def __build_index(self, stat: os.stat_result):
+        """Scans the CSV once for row starts and persists the offsets.
+
+        The lines are fed to `csv.reader`, so that a row holding quoted
+        line breaks spans several of them.
+        The index is written to a temporary file and renamed into place
+        so concurrent workers never map a partially written index. If
+        the index cannot be written, it is only kept in memory.
+        """
+        offsets = array("Q")
+        data = self.__data
+        position = 0
+        if data is not None:
+            consumed = [0]  # End of the lines read by the CSV reader
+
+            def lines():
+                """Yields the decoded lines, recording where they end."""
+                start = 0
+                while start < len(data):
+                    end = data.find(b"\n", start)
+                    end = len(data) if end == -1 else end + 1
+                    consumed[0] = end
+                    yield self.decode(data[start:end])
+                    start = end
+
+            reader = csv.reader(lines())
+            next(reader, None)  # Skip the header row
+            position = consumed[0]
+            blank = None  # Start of the trailing blank rows, if any
+            for row in reader:
+                if row:
+                    blank = None
+                elif blank is None:
+                    blank = len(offsets)
+                offsets.append(position)
+                position = consumed[0]
+            # Ignore trailing blank lines
+            if blank is not None:
+                position = offsets[blank]
+                del offsets[blank:]
+        offsets.append(position)
+        self.__offsets = offsets
+        self.__length = len(offsets) - 1
+
+        directory = os.path.dirname(os.path.abspath(self.index_path))
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory)
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self.HEADER.pack(self.MAGIC, stat.st_size,
+                                         stat.st_mtime_ns, self.__length))
+                if sys.byteorder != "little":
+                    offsets = array("Q", offsets)
+                    offsets.byteswap()
+                f.write(offsets.tobytes())
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            os.unlink(tmp_path)
+
+    def __offset(self, position: int) -> int:
+        """Returns the byte offset at which a data row starts."""
+        if self.__offsets is not None:
+            return self.__offsets[position]
+        return self.OFFSET.unpack_from(
+            self.__index,
+            self.HEADER.size + position * self.OFFSET.size)[0]
+
+    def __len__(self) -> int:
+        """Returns the number of data rows in the file."""
+        return self.__length
+
+    def rows(self, start: int, end: int) -> List[List[str]]:
+        """Parses the rows between two positions.
+
+        Args:
+            start (int): The first row position, included.
+            end (int): The last row position, excluded; clipped to the
+                number of rows.
+
+        Returns:
+            List[List[str]]: The rows, as `csv.reader` would return them.
+        """
+        end = min(end, self.__length)
+        if start >= end:
+            return []
+        chunk = self.__data[self.__offset(start):self.__offset(end)]
+        return list(csv.reader(io.StringIO(self.decode(chunk), newline="")))
+
+    def close(self):
+        """Unmaps the CSV file and its index."""
+        for mapped in (self.__data, self.__index):
+            if mapped is not None:
+                mapped.close()
+        self.__data = self.__index = None
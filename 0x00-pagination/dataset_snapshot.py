@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""Versioned binary snapshots of a columnar dataset, loaded with mmap.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Optional, Tuple
+
+from columnar_dataset import (CategoryColumn, ColumnarDataset, IntColumn,
+                              StringPoolColumn)
+
+SUFFIX = ".snap"
+MAGIC = b"PGSNAP\x00\x00"
+FORMAT_VERSION = 1
+# magic, format version, byte order (0 little, 1 big), rows, columns,
+# CSV size, CSV mtime in ns, CSV SHA-256, header offset, header length
+HEADER = struct.Struct("<8sIIQIQQ32sQQ")
+MTIME_OFFSET = struct.calcsize("<8sIIQIQ")
+# kind, typecode, item size, data offset, data length, auxiliary offset,
+# auxiliary length
+COLUMN = struct.Struct("<1s1sH4xQQQQ")
+KINDS = {'int': b'i', 'category': b'c', 'string': b's'}
+ALIGNMENT = 8
+
+
+class MappedStringColumn:
+    """String pool column read from UTF-8 bytes in a snapshot."""
+
+    kind = 'string'
+
+    def __init__(self, pool: memoryview, offsets: memoryview):
+        """Initializes the column over mapped buffers.
+
+        Args:
+            pool (memoryview): The UTF-8 encoded strings, concatenated.
+            offsets (memoryview): The byte offset of every string, and
+                the end of the pool.
+        """
+        self.pool = pool
+        self.offsets = offsets
+
+    def get(self, index: int) -> str:
+        """Returns the string at a position.
+
+        Args:
+            index (int): The row position.
+
+        Returns:
+            str: The string at the given position.
+        """
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return str(self.pool[start:end], "utf-8")
+
+    def __len__(self) -> int:
+        """Returns the number of values in the column."""
+        return len(self.offsets) - 1
+
+    def nbytes(self) -> int:
+        """Returns the memory used by the column outside the mapping."""
+        return sys.getsizeof(self.pool) + sys.getsizeof(self.offsets)
+
+
+def csv_digest(csv_path: str) -> bytes:
+    """Returns the SHA-256 digest of a file.
+
+    Args:
+        csv_path (str): The path of the file.
+
+    Returns:
+        bytes: The digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(csv_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+def _column_sections(column: object) -> Tuple[bytes, bytes, bytes, int]:
+    """Returns the sections of a column as written in a snapshot.
+
+    Those are the typecode, the data, the auxiliary data (category
+    labels or string offsets) and the item size of the typed section.
+    """
+    if isinstance(column, IntColumn):
+        values = column.values
+        return (values.typecode.encode(), values.tobytes(), b"",
+                values.itemsize)
+    if isinstance(column, CategoryColumn):
+        codes = column.codes
+        labels = json.dumps(column.categories).encode()
+        return codes.typecode.encode(), codes.tobytes(), labels, \
+            codes.itemsize
+    assert isinstance(column, StringPoolColumn), type(column)
+    pool = column.pool.encode()
+    if len(pool) == len(column.pool):
+        offsets = array("Q", column.offsets)
+    else:
+        offsets = array("Q", [0])
+        for i in range(len(column)):
+            offsets.append(offsets[-1] + len(column.get(i).encode()))
+    return b"Q", pool, offsets.tobytes(), offsets.itemsize
+
+
+def write(table: ColumnarDataset, snapshot_path: str, csv_path: str,
+          stat: os.stat_result = None, digest: bytes = None):
+    """Writes the snapshot of a table built from a CSV file.
+
+    The file is written next to its destination and renamed into place,
+    so readers never map a partially written snapshot.
+
+    Args:
+        table (ColumnarDataset): The table to write.
+        snapshot_path (str): The path of the snapshot.
+        csv_path (str): The CSV file the table was built from.
+        stat (os.stat_result): The status of the CSV file, taken before
+            the table was built from it; taken now by default.
+        digest (bytes): The `csv_digest` of the CSV file, computed
+            before the table was built from it; computed now by default.
+    """
+    if stat is None:
+        stat = os.stat(csv_path)
+    if digest is None:
+        digest = csv_digest(csv_path)
+    sections = [_column_sections(column) for column in table.columns]
+    header_json = json.dumps(table.header).encode()
+
+    def align(offset: int) -> int:
+        """Rounds an offset up to the section alignment."""
+        return -(-offset // ALIGNMENT) * ALIGNMENT
+
+    offset = align(HEADER.size + COLUMN.size * len(sections))
+    descriptors, payload = [], []
+    for column, (typecode, data, aux, itemsize) in zip(table.columns,
+                                                       sections):
+        data_offset = offset
+        aux_offset = align(data_offset + len(data))
+        offset = align(aux_offset + len(aux))
+        descriptors.append(COLUMN.pack(
+            KINDS[column.kind], typecode, itemsize,
+            data_offset, len(data), aux_offset, len(aux)))
+        payload.append((data_offset, data))
+        payload.append((aux_offset, aux))
+    payload.append((offset, header_json))
+
+    directory = os.path.dirname(os.path.abspath(snapshot_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(
+                MAGIC, FORMAT_VERSION, sys.byteorder == "big", len(table),
+                len(sections), stat.st_size, stat.st_mtime_ns, digest,
+                offset, len(header_json)))
+            f.write(b"".join(descriptors))
+            for position, data in payload:
+                f.write(b"\x00" * (position - f.tell()))
+                f.write(data)
+        os.replace(tmp_path, snapshot_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _is_current(mapped: mmap.mmap, snapshot_path: str,
+                csv_path: str) -> bool:
+    """Tells whether a mapped snapshot was built from the CSV file.
+
+    The size and mtime of the CSV file are checked first. When only the
+    mtime changed, the content hash decides, and a matching snapshot
+    has its recorded mtime refreshed so the hash is not computed again.
+    """
+    (magic, version, big_endian, _, _, size, mtime, digest, _,
+     _) = HEADER.unpack_from(mapped)
+    stat = os.stat(csv_path)
+    if magic != MAGIC or version != FORMAT_VERSION or \
+            big_endian != (sys.byteorder == "big") or size != stat.st_size:
+        return False
+    if mtime == stat.st_mtime_ns:
+        return True
+    if digest != csv_digest(csv_path):
+        return False
+    try:
+        with open(snapshot_path, "r+b") as f:
+            f.seek(MTIME_OFFSET)
+            f.write(struct.pack("<Q", stat.st_mtime_ns))
+    except OSError:
+        pass
+    return True
+
+
+def _mapped_column(mapped: memoryview, descriptor: Tuple) -> object:
+    """Rebuilds a column over the sections of a mapped snapshot."""
+    kind, typecode, itemsize, data_offset, data_len, aux_offset, \
+        aux_len = descriptor
+    typecode = typecode.decode()
+    if array(typecode).itemsize != itemsize:
+        raise ValueError("snapshot written on another platform")
+    data = mapped[data_offset:data_offset + data_len]
+    aux = mapped[aux_offset:aux_offset + aux_len]
+    if kind == KINDS['int']:
+        column = IntColumn()
+        column.values = data.cast(typecode)
+    elif kind == KINDS['category']:
+        column = CategoryColumn()
+        column.codes = data.cast(typecode)
+        column.categories = [sys.intern(label)
+                             for label in json.loads(bytes(aux))]
+    else:
+        column = MappedStringColumn(data, aux.cast(typecode))
+    return column
+
+
+def _mapped_dataset(mapped: mmap.mmap) -> ColumnarDataset:
+    """Rebuilds a dataset over the columns of a mapped snapshot."""
+    fields = HEADER.unpack_from(mapped)
+    ncols, header_offset, header_len = fields[4], fields[8], fields[9]
+    view = memoryview(mapped)
+    columns = [
+        _mapped_column(view, COLUMN.unpack_from(
+            mapped, HEADER.size + i * COLUMN.size))
+        for i in range(ncols)]
+    header = json.loads(bytes(view[header_offset:header_offset + header_len]))
+    return ColumnarDataset.from_columns(columns, header)
+
+
+def load(snapshot_path: str, csv_path: str) -> Optional[ColumnarDataset]:
+    """Maps a snapshot, if it is current for a CSV file.
+
+    Only the header, the column descriptors and the category labels are
+    decoded; every other section is used in place, through memory views
+    of the mapping, whose pages are shared by every process.
+
+    Args:
+        snapshot_path (str): The path of the snapshot.
+        csv_path (str): The CSV file the snapshot must match.
+
+    Returns:
+        Optional[ColumnarDataset]: The dataset, or None if the snapshot
+        is missing, stale or unreadable.
+    """
+    try:
+        with open(snapshot_path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    table = None
+    try:
+        if len(mapped) >= HEADER.size and \
+                _is_current(mapped, snapshot_path, csv_path):
+            table = _mapped_dataset(mapped)
+    except (OSError, ValueError, TypeError, struct.error):
+        pass
+    if table is None:
+        # The views of a failed decoding are gone with its traceback
+        mapped.close()
+    return table
+
+
+def open_dataset(csv_path: str,
+                 snapshot_path: Optional[str] = None) -> ColumnarDataset:
+    """Loads the snapshot of a CSV file, compiling it first if needed.
+
+    Args:
+        csv_path (str): The CSV file with a header row.
+        snapshot_path (str): The path of the snapshot; defaults to the
+            CSV path followed by `SUFFIX`.
+
+    Returns:
+        ColumnarDataset: The dataset, mapped from its snapshot whenever
+        the snapshot could be written.
+    """
+    snapshot_path = snapshot_path or csv_path + SUFFIX
+    table = load(snapshot_path, csv_path)
+    if table is not None:
+        return table
+    # Identify the CSV file before reading it: if it is replaced while
+    # it is read, the snapshot is stale rather than wrongly current
+    stat = os.stat(csv_path)
+    digest = csv_digest(csv_path)
+    table = ColumnarDataset.from_csv(csv_path)
+    try:
+        write(table, snapshot_path, csv_path, stat, digest)
+    except OSError:
+        return table
+    return load(snapshot_path, csv_path) or table
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Deletion-aware index over the positions of a dataset.
+"""
+from array import array
+from typing import Optional
+
+
+class LiveIndex:
+    """Tracks which positions of a dataset are still live.
+
+    Two flat integer arrays back the index:
+
+    - a Fenwick tree of live flags, which counts the live positions
+      before any position (`rank`) and finds the k-th live position
+      (`select`) in O(log n);
+    - skip pointers with path compression, where every deleted position
+      points past itself, so `next_live` jumps over any run of holes in
+      amortized near constant time.
+
+    Reading a page of `page_size` live rows therefore costs
+    O(page_size + log n), however many rows were deleted before it.
+    """
+
+    def __init__(self, size: int):
+        """Initializes an index where all positions are live.
+
+        Args:
+            size (int): The number of positions in the dataset.
+        """
+        typecode = 'i' if size < 2 ** 31 - 1 else 'q'
+        self.size = size
+        self.__live = size
+        # Fenwick tree over 1-based positions: every node i covers the
+        # (i & -i) positions ending at i, all of them live at first.
+        self.__tree = array(typecode, (i & -i for i in range(size + 1)))
+        # Skip pointers; position `size` is a sentinel that stays live.
+        self.__next = array(typecode, range(size + 1))
+
+    def __len__(self) -> int:
+        """Returns the number of live positions."""
+        return self.__live
+
+    def is_live(self, position: int) -> bool:
+        """Tells whether a position is live.
+
+        Args:
+            position (int): The position to check.
+
+        Returns:
+            bool: True if the position exists and was not deleted.
+        """
+        return 0 <= position < self.size and \
+            self.__next[position] == position
+
+    def delete(self, position: int) -> bool:
+        """Marks a position as deleted.
+
+        Args:
+            position (int): The position to delete.
+
+        Returns:
+            bool: True if the position was live, False otherwise.
+        """
+        if not self.is_live(position):
+            return False
+        self.__next[position] = position + 1
+        self.__live -= 1
+        tree = self.__tree
+        i = position + 1
+        while i <= self.size:
+            tree[i] -= 1
+            i += i & -i
+        return True
+
+    def append(self) -> int:
+        """Adds a live position after all existing ones.
+
+        Returns:
+            int: The new position.
+        """
+        position = self.size
+        i = position + 1
+        # The new Fenwick node covers the (i & -i) positions ending at it
+        self.__tree.append(self.rank(position) -
+                           self.rank(i - (i & -i)) + 1)
+        # The old sentinel becomes the new position, holes pointing at
+        # it now skip to the new live row.
+        self.__next.append(i)
+        self.size = i
+        self.__live += 1
+        return position
+
+    def next_live(self, position: int) -> Optional[int]:
+        """Finds the first live position at or after a position.
+
+        Args:
+            position (int): The position to start from; a negative one
+                starts from 0.
+
+        Returns:
+            Optional[int]: The live position, or None if there is none.
+        """
+        if position >= self.size:
+            return None
+        position = max(position, 0)
+        skips = self.__next
+        root = position
+        while skips[root] != root:
+            root = skips[root]
+        # Path compression: point every visited hole at the root
+        while skips[position] != root:
+            skips[position], position = root, skips[position]
+        return root if root < self.size else None
+
+    def rank(self, position: int) -> int:
+        """Counts the live positions strictly before a position.
+
+        Args:
+            position (int): The position to count up to.
+
+        Returns:
+            int: The number of live positions in [0, position).
+        """
+        tree = self.__tree
+        total = 0
+        i = min(position, self.size)
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def select(self, rank: int) -> Optional[int]:
+        """Finds the live position with a given rank.
+
+        Args:
+            rank (int): The number of live positions before the one
+                searched, starting at 0.
+
+        Returns:
+            Optional[int]: The position, or None if rank is out of range.
+        """
+        if rank < 0 or rank >= self.__live:
+            return None
+        tree = self.__tree
+        position = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            if position + step <= self.size and tree[position + step] <= rank:
+                position += step
+                rank -= tree[position]
+            step >>= 1
+        return position
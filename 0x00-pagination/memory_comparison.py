@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Compares the memory used by the row and columnar dataset storages.
+"""
+import gc
+import sys
+import tracemalloc
+from typing import Callable, Tuple
+
+Server = __import__('1-simple_pagination').Server
+
+
+def measure(load: Callable[[], object]) -> Tuple[int, int]:
+    """Measures the memory retained and peaked while loading a dataset.
+
+    Args:
+        load (Callable[[], object]): Loads and returns the dataset.
+
+    Returns:
+        Tuple[int, int]: The bytes still allocated once the dataset is
+        loaded, and the peak bytes allocated while loading it.
+    """
+    gc.collect()
+    tracemalloc.start()
+    dataset = load()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del dataset
+    return current, peak
+
+
+def main(data_file: str = Server.DATA_FILE):
+    """Prints the memory used by each storage for a CSV file.
+
+    Args:
+        data_file (str): The CSV file to load.
+    """
+    Server.DATA_FILE = data_file
+    results = [
+        ("rows", measure(lambda: Server("rows").dataset())),
+        ("columnar",
+         measure(lambda: Server("columnar").columnar_dataset())),
+    ]
+    baseline = results[0][1][0]
+    print("{:<10} {:>14} {:>14} {:>8}".format(
+        "storage", "retained (B)", "peak (B)", "ratio"))
+    for name, (current, peak) in results:
+        print("{:<10} {:>14,} {:>14,} {:>7.1%}".format(
+            name, current, peak, current / baseline))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
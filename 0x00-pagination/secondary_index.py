@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""Secondary indexes over the columns of the baby names dataset.
+"""
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from live_index import LiveIndex
+
+
+class Postings:
+    """Sorted positions, some of which may be removed.
+
+    The positions are kept in an array, and the removed ones are marked
+    in a `LiveIndex` over the array, created on the first removal, so
+    iterating skips any run of removed positions in near constant time.
+    """
+
+    def __init__(self, positions: array = None):
+        """Initializes the postings of sorted positions.
+
+        Args:
+            positions (array): The sorted positions; none by default.
+        """
+        self.positions = positions if positions is not None else array('i')
+        self.live = None  # type: Optional[LiveIndex]
+
+    def append(self, position: int):
+        """Adds a position after every other.
+
+        Args:
+            position (int): The position.
+        """
+        self.positions.append(position)
+        if self.live is not None:
+            self.live.append()
+
+    def remove(self, position: int) -> bool:
+        """Marks a position as removed.
+
+        Args:
+            position (int): The position.
+
+        Returns:
+            bool: True if the position was there and not removed yet.
+        """
+        positions = self.positions
+        j = bisect_left(positions, position)
+        if j == len(positions) or positions[j] != position:
+            return False
+        if self.live is None:
+            self.live = LiveIndex(len(positions))
+        return self.live.delete(j)
+
+    def iter_from(self, position: int) -> Iterator[int]:
+        """Yields the positions not removed, from a position on.
+
+        Positions removed while iterating are skipped.
+
+        Args:
+            position (int): The position to start from.
+
+        Yields:
+            int: The positions, in increasing order.
+        """
+        positions = self.positions
+        j = bisect_left(positions, position)
+        while True:
+            if self.live is not None:
+                j = self.live.next_live(j)
+                if j is None:
+                    return
+            elif j >= len(positions):
+                return
+            yield positions[j]
+            j += 1
+
+    def live_positions(self) -> array:
+        """Returns the positions that were not removed.
+
+        Returns:
+            array: The sorted positions; the array of the postings
+            itself while none was removed.
+        """
+        if self.live is None:
+            return self.positions
+        return array('i', self.iter_from(0))
+
+
+class SecondaryIndex:
+    """Posting lists and a sorted name index over dataset positions.
+
+    Every value of the categorical columns maps to the sorted array of
+    the positions holding it, and names are kept sorted, case folded,
+    for prefix search. A filter resolves to the sorted positions of the
+    matching rows by intersecting the posting lists of its criteria;
+    the most recent results are cached, so paging through a filter
+    afterwards only costs the page. Removed positions are marked in the
+    posting lists and cached results, and skipped when they are read.
+    """
+
+    # Filter name to column, for the categorical columns
+    FIELDS = {'year': 0, 'gender': 1, 'ethnicity': 2}
+    NAME_COLUMN = 3
+    CACHE_SIZE = 128
+
+    def __init__(self):
+        """Initializes empty indexes."""
+        self.__postings = {
+            field: {} for field in self.FIELDS
+        }  # type: Dict[str, Dict[str, Postings]]
+        self.__names = []  # type: List[Tuple[str, int]]
+        self.__removed = set()  # type: set
+        self.__cache = OrderedDict()  # type: OrderedDict
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple[int, List[str]]]
+                   ) -> 'SecondaryIndex':
+        """Builds the indexes of (position, row) pairs sorted by position.
+
+        Args:
+            items (Iterable[Tuple[int, List[str]]]): The positioned rows.
+
+        Returns:
+            SecondaryIndex: The populated indexes.
+        """
+        index = cls()
+        names = index.__names
+        for position, row in items:
+            index.__add_postings(position, row)
+            names.append((row[cls.NAME_COLUMN].casefold(), position))
+        names.sort()
+        return index
+
+    def __add_postings(self, position: int, row: List[str]):
+        """Appends a position to the posting lists of its values."""
+        for field, column in self.FIELDS.items():
+            postings = self.__postings[field]
+            positions = postings.get(row[column])
+            if positions is None:
+                positions = postings[row[column]] = Postings()
+            positions.append(position)
+
+    def add(self, position: int, row: List[str]):
+        """Indexes a row appended after every indexed position.
+
+        Args:
+            position (int): The position of the row.
+            row (List[str]): The row to index.
+        """
+        self.__add_postings(position, row)
+        insort(self.__names, (row[self.NAME_COLUMN].casefold(), position))
+        self.__cache.clear()
+
+    def remove(self, position: int):
+        """Removes a position from the posting lists and cached results.
+
+        The name index keeps it, and prefix searches skip it.
+
+        Args:
+            position (int): The position of a deleted row.
+        """
+        if position in self.__removed:
+            return
+        self.__removed.add(position)
+        for postings in self.__postings.values():
+            for positions in postings.values():
+                positions.remove(position)
+        for positions in self.__cache.values():
+            positions.remove(position)
+
+    @classmethod
+    def criteria(cls, filters: Dict[str, object]
+                 ) -> Tuple[Tuple[str, str], ...]:
+        """Returns the canonical, hashable form of filters.
+
+        Args:
+            filters (Dict[str, object]): The filters, by name.
+
+        Returns:
+            Tuple[Tuple[str, str], ...]: The sorted (name, value) pairs of
+            the filters that are set.
+
+        Raises:
+            ValueError: If a filter is not one of `FIELDS` or
+            `name_prefix`.
+        """
+        for field in filters:
+            if field not in cls.FIELDS and field != 'name_prefix':
+                raise ValueError("unknown filter {!r}, expected one of {}"
+                                 .format(field, ", ".join(
+                                     list(cls.FIELDS) + ['name_prefix'])))
+        return tuple(sorted(
+            (field, str(value)) for field, value in filters.items()
+            if value is not None))
+
+    def positions(self, filters: Dict[str, object]) -> Optional[array]:
+        """Returns the sorted positions of the rows matching filters.
+
+        Args:
+            filters (Dict[str, object]): Values required for any of
+                `FIELDS`, and an optional case insensitive `name_prefix`.
+                None values are ignored.
+
+        Returns:
+            Optional[array]: The matching positions, or None when no
+            filter is set, meaning every position matches.
+
+        Raises:
+            ValueError: If a filter is not one of `FIELDS` or
+            `name_prefix`.
+        """
+        matches = self.matches(filters)
+        return None if matches is None else matches.live_positions()
+
+    def matches(self, filters: Dict[str, object]) -> Optional[Postings]:
+        """Returns the postings of the rows matching filters.
+
+        Unlike `positions`, the postings are not copied when some were
+        removed: they are skipped when iterated.
+
+        Args:
+            filters (Dict[str, object]): The filters, as for `positions`.
+
+        Returns:
+            Optional[Postings]: The matching positions, or None when no
+            filter is set, meaning every position matches.
+
+        Raises:
+            ValueError: If a filter is not one of `FIELDS` or
+            `name_prefix`.
+        """
+        criteria = self.criteria(filters)
+        if not criteria:
+            return None
+        cached = self.__cache.get(criteria)
+        if cached is not None:
+            self.__cache.move_to_end(criteria)
+            return cached
+
+        lists = []
+        for field, value in criteria:
+            if field == 'name_prefix':
+                lists.append(Postings(self.__prefix_positions(value)))
+            else:
+                lists.append(self.__postings[field].get(value, Postings()))
+        if len(lists) == 1:
+            result = lists[0]
+        else:
+            removed = self.__removed
+            result = Postings(array('i', (
+                position for position in self.__intersect(
+                    [postings.positions for postings in lists])
+                if position not in removed)))
+
+        self.__cache[criteria] = result
+        if len(self.__cache) > self.CACHE_SIZE:
+            self.__cache.popitem(last=False)
+        return result
+
+    def __prefix_positions(self, prefix: str) -> array:
+        """Returns the sorted positions of names starting with a prefix."""
+        prefix = prefix.casefold()
+        names = self.__names
+        i = bisect_left(names, (prefix, -1))
+        positions = array('i')
+        removed = self.__removed
+        while i < len(names) and names[i][0].startswith(prefix):
+            if names[i][1] not in removed:
+                positions.append(names[i][1])
+            i += 1
+        return array('i', sorted(positions))
+
+    @staticmethod
+    def __intersect(lists: List[array]) -> array:
+        """Intersects sorted position arrays, smallest first."""
+        lists = sorted(lists, key=len)
+        result = lists[0]
+        for other in lists[1:]:
+            if not result:
+                break
+            kept = array('i')
+            lo = 0
+            for position in result:
+                lo = bisect_left(other, position, lo)
+                if lo == len(other):
+                    break
+                if other[lo] == position:
+                    kept.append(position)
+            result = kept
+        return result
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Cached sort permutations over the rows of the baby names dataset.
+"""
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, List, Tuple
+
+
+class SortIndex:
+    """Computes, once per order, the permutation sorting the dataset.
+
+    A permutation is a compact array of positions: the page of a sorted
+    dataset is a slice of it, so no request ever sorts or copies rows.
+    An order is the name of a column, optionally prefixed by "-" for a
+    descending order, such as "-count"; ties keep the file order.
+    """
+
+    # Order name to column and sort key converter
+    KEYS = {
+        'year': (0, int),
+        'gender': (1, str),
+        'ethnicity': (2, str),
+        'name': (3, str.casefold),
+        'count': (4, int),
+        'rank': (5, int),
+    }  # type: Dict[str, Tuple[int, Callable]]
+    CACHE_SIZE = 128
+
+    def __init__(self, rows: Callable[[], Iterable[List[str]]]):
+        """Initializes the index without computing any permutation.
+
+        Args:
+            rows (Callable[[], Iterable[List[str]]]): Returns the rows of
+                the dataset in position order, when a permutation is
+                first needed.
+        """
+        self.__rows = rows
+        self.__permutations = {}  # type: Dict[str, array]
+        self.__inverses = {}  # type: Dict[str, array]
+        self.__subsets = OrderedDict()  # type: OrderedDict
+
+    def permutation(self, sort_by: str) -> array:
+        """Returns the positions of the rows in a given order.
+
+        Args:
+            sort_by (str): The order, such as "name" or "-count".
+
+        Returns:
+            array: The positions of the rows, sorted.
+        """
+        permutation = self.__permutations.get(sort_by)
+        if permutation is None:
+            descending = sort_by.startswith('-')
+            assert sort_by.lstrip('-') in self.KEYS, sort_by
+            column, convert = self.KEYS[sort_by.lstrip('-')]
+            keys = [convert(row[column]) for row in self.__rows()]
+            permutation = array('i', sorted(range(len(keys)),
+                                            key=keys.__getitem__,
+                                            reverse=descending))
+            self.__permutations[sort_by] = permutation
+        return permutation
+
+    def inverse(self, sort_by: str) -> array:
+        """Returns the sorted rank of every position in a given order.
+
+        Args:
+            sort_by (str): The order, such as "name" or "-count".
+
+        Returns:
+            array: The rank of each position in the permutation.
+        """
+        inverse = self.__inverses.get(sort_by)
+        if inverse is None:
+            permutation = self.permutation(sort_by)
+            inverse = array('i', bytes(permutation.itemsize *
+                                       len(permutation)))
+            for rank, position in enumerate(permutation):
+                inverse[position] = rank
+            self.__inverses[sort_by] = inverse
+        return inverse
+
+    def reorder(self, positions: array, sort_by: str,
+                key: Hashable) -> array:
+        """Sorts a subset of positions, caching the result by key.
+
+        Args:
+            positions (array): The positions to sort, such as the rows
+                matching a filter.
+            sort_by (str): The order, such as "name" or "-count".
+            key (Hashable): Identifies the subset, such as its filter.
+
+        Returns:
+            array: The positions, in the given order.
+        """
+        cache_key = (sort_by, key)
+        ordered = self.__subsets.get(cache_key)
+        if ordered is not None:
+            self.__subsets.move_to_end(cache_key)
+            return ordered
+        inverse = self.inverse(sort_by)
+        ordered = array('i', sorted(positions, key=inverse.__getitem__))
+        self.__subsets[cache_key] = ordered
+        if len(self.__subsets) > self.CACHE_SIZE:
+            self.__subsets.popitem(last=False)
+        return ordered
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Tests of the memory-mapped CSV storage.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+MappedCSV = __import__('csv_offset_index').MappedCSV
+SimpleServer = __import__('1-simple_pagination').Server
+HyperServer = __import__('2-hypermedia_pagination').Server
+
+HEADER = "Year of Birth,Gender,Ethnicity,Child's First Name,Count,Rank\n"
+ROWS = (
+    '2016,FEMALE,HISPANIC,"Ol\nivia",172,1\n'
+    '2016,FEMALE,HISPANIC,"Chl\x0coe",112,2\r\n'
+    '2016,MALE,"WHITE\r\nNON HISPANIC","Jo, ""Jo""",99,3\n'
+    '2016,MALE,BLACK NON HISPANIC,Ethan\x1c\x85 ,50,4\n'
+)
+
+
+class TestMappedCSV(unittest.TestCase):
+    """Tests the mmap storage against the other storages."""
+
+    def setUp(self):
+        """Writes a CSV file with quoted line breaks."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "names.csv")
+        with open(self.path, "w", newline="") as f:
+            f.write(HEADER + ROWS)
+
+    def tearDown(self):
+        """Removes the CSV file and its sidecar files."""
+        shutil.rmtree(self.directory)
+
+    def pages(self, server_class: type) -> dict:
+        """Returns the first page of every storage of a server."""
+        pages = {}
+        for storage in server_class.STORAGES:
+            server = server_class(storage)
+            server.DATA_FILE = self.path
+            pages[storage] = server.get_page(1, 10)
+        return pages
+
+    def test_storages_agree(self):
+        """Every storage returns the rows `csv.reader` parses."""
+        for server_class in (SimpleServer, HyperServer):
+            pages = self.pages(server_class)
+            expected = pages.pop("rows")
+            self.assertEqual(len(expected), 4)
+            self.assertEqual(expected[0][3], "Ol\nivia")
+            self.assertEqual(expected[2][2], "WHITE\nNON HISPANIC")
+            for storage, page in pages.items():
+                self.assertEqual(page, expected, storage)
+
+    def test_persisted_index(self):
+        """A mapped index returns the same rows as a built one."""
+        built = MappedCSV(self.path)
+        rows = [built.rows(i, i + 1)[0] for i in range(len(built))]
+        built.close()
+        mapped = MappedCSV(self.path)
+        self.assertEqual(len(mapped), 4)
+        self.assertEqual(mapped.rows(0, 10), rows)
+        self.assertEqual(mapped.rows(1, 3), rows[1:3])
+        mapped.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
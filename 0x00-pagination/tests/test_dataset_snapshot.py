@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Tests of the binary dataset snapshots.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+import dataset_snapshot  # noqa: E402
+from columnar_dataset import ColumnarDataset  # noqa: E402
+
+DelServer = __import__('3-hypermedia_del_pagination').Server
+
+HEADER = "Year of Birth,Gender,Ethnicity,Child's First Name,Count,Rank\n"
+
+
+def names_csv(names) -> str:
+    """Returns a CSV file of a row per name."""
+    return HEADER + "".join("2016,FEMALE,HISPANIC,{},{},{}\n".format(
+        name, 10 + rank, rank) for rank, name in enumerate(names))
+
+
+class TestDatasetSnapshot(unittest.TestCase):
+    """Tests compiling and mapping snapshots."""
+
+    def setUp(self):
+        """Writes a small CSV file."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "names.csv")
+        self.write(["Olivia", "Chloe"])
+
+    def tearDown(self):
+        """Removes the CSV file and its snapshot."""
+        shutil.rmtree(self.directory)
+
+    def write(self, names):
+        """Replaces the CSV file."""
+        with open(self.path, "w") as f:
+            f.write(names_csv(names))
+
+    def names(self, table: ColumnarDataset) -> list:
+        """Returns the names of a dataset."""
+        return [row[3] for row in table.rows(0, len(table))]
+
+    def test_snapshot_is_mapped(self):
+        """A compiled snapshot is mapped by the next load."""
+        table = dataset_snapshot.open_dataset(self.path)
+        self.assertEqual(self.names(table), ["Olivia", "Chloe"])
+        mapped = dataset_snapshot.load(self.path + dataset_snapshot.SUFFIX,
+                                       self.path)
+        self.assertIsNotNone(mapped)
+        self.assertEqual(mapped.rows(0, 2), table.rows(0, 2))
+
+    def test_replaced_while_compiling(self):
+        """A CSV file replaced while it is read leaves a stale snapshot."""
+        from_csv = ColumnarDataset.from_csv
+
+        def replacing(path, *args):
+            """Reads the file, then replaces it."""
+            table = from_csv(path, *args)
+            self.write(["Emma", "Mia", "Ava"])
+            return table
+
+        with mock.patch.object(ColumnarDataset, "from_csv", replacing):
+            dataset_snapshot.open_dataset(self.path)
+        table = dataset_snapshot.open_dataset(self.path)
+        self.assertEqual(self.names(table), ["Emma", "Mia", "Ava"])
+
+    def test_corrupt_snapshot(self):
+        """A snapshot that cannot be decoded is rebuilt."""
+        snapshot = self.path + dataset_snapshot.SUFFIX
+        dataset_snapshot.open_dataset(self.path)
+        with open(snapshot, "r+b") as f:
+            # Break the item size of the first column
+            f.seek(dataset_snapshot.HEADER.size + 2)
+            f.write(b"\x03\x00")
+        self.assertIsNone(dataset_snapshot.load(snapshot, self.path))
+        table = dataset_snapshot.open_dataset(self.path)
+        self.assertEqual(self.names(table), ["Olivia", "Chloe"])
+
+    def test_missing_csv(self):
+        """A snapshot of a removed CSV file is not loaded."""
+        snapshot = self.path + dataset_snapshot.SUFFIX
+        dataset_snapshot.open_dataset(self.path)
+        os.unlink(self.path)
+        self.assertIsNone(dataset_snapshot.load(snapshot, self.path))
+
+
+class TestServerArguments(unittest.TestCase):
+    """Tests the arguments of the deletion-resilient Server."""
+
+    def test_positional_secret(self):
+        """The cursor secret is still the first argument."""
+        server = DelServer(b"secret")
+        other = DelServer(b"secret", "snapshot")
+        self.assertIsNotNone(server)
+        self.assertIsNotNone(other)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Tests of the index of live dataset positions.
+"""
+import os
+import random
+import sys
+import unittest
+from bisect import bisect_left
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from live_index import LiveIndex  # noqa: E402
+
+
+class TestLiveIndex(unittest.TestCase):
+    """Tests the live index against a sorted list of live positions."""
+
+    def check(self, index: LiveIndex, live: list, size: int):
+        """Checks every query of the index against the sorted list."""
+        self.assertEqual(index.size, size)
+        self.assertEqual(len(index), len(live))
+        for position in range(-1, size + 2):
+            j = bisect_left(live, position)
+            self.assertEqual(index.next_live(position),
+                             live[j] if j < len(live) else None)
+            self.assertEqual(index.is_live(position),
+                             j < len(live) and live[j] == position)
+            self.assertEqual(index.rank(max(position, 0)),
+                             bisect_left(live, max(position, 0)))
+        for rank in range(-1, len(live) + 1):
+            self.assertEqual(index.select(rank),
+                             live[rank] if 0 <= rank < len(live) else None)
+
+    def test_random_operations(self):
+        """Random deletes and appends agree with the sorted list."""
+        rng = random.Random(0)
+        for size in (0, 1, 2, 7, 64, 100):
+            index = LiveIndex(size)
+            live = list(range(size))
+            for step in range(300):
+                with self.subTest(size=size, step=step):
+                    operation = rng.random()
+                    if operation < 0.6:
+                        position = rng.randrange(-1, index.size + 1)
+                        j = bisect_left(live, position)
+                        was_live = j < len(live) and live[j] == position
+                        self.assertEqual(index.delete(position), was_live)
+                        if was_live:
+                            live.pop(j)
+                    elif operation < 0.8:
+                        self.assertEqual(index.append(), index.size - 1)
+                        live.append(index.size - 1)
+                    else:
+                        # Long runs of holes, compressed by next_live
+                        start = rng.randrange(index.size + 1)
+                        for position in range(start, index.size):
+                            index.delete(position)
+                        live = [p for p in live if p < start]
+                    if step % 10 == 0:
+                        self.check(index, live, index.size)
+            self.check(index, live, index.size)
+
+    def test_large_positions(self):
+        """Deleting every other position keeps the queries logarithmic
+        and exact."""
+        index = LiveIndex(100000)
+        for position in range(0, 100000, 2):
+            index.delete(position)
+        self.assertEqual(len(index), 50000)
+        self.assertEqual(index.next_live(0), 1)
+        self.assertEqual(index.rank(99999), 49999)
+        self.assertEqual(index.select(49999), 99999)
+        self.assertIsNone(index.next_live(100000))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Tests of the secondary indexes and filtered pagination.
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from secondary_index import Postings  # noqa: E402
+
+HyperServer = __import__('2-hypermedia_pagination').Server
+DelServer = __import__('3-hypermedia_del_pagination').Server
+
+HEADER = "Year of Birth,Gender,Ethnicity,Child's First Name,Count,Rank\n"
+YEARS = ("2011", "2012", "2013")
+GENDERS = ("FEMALE", "MALE")
+NAMES = ("Olivia", "Oliver", "Chloe", "Ethan", "Emma")
+
+
+def random_row(rng: random.Random) -> list:
+    """Returns a row of random values."""
+    return [rng.choice(YEARS), rng.choice(GENDERS), "HISPANIC",
+            rng.choice(NAMES), str(rng.randint(10, 99)),
+            str(rng.randint(1, 9))]
+
+
+def matching(row: list, filters: dict) -> bool:
+    """Tells whether a row matches filters."""
+    return (filters.get('year') in (None, row[0]) and
+            filters.get('gender') in (None, row[1]) and
+            row[3].casefold().startswith(
+                filters.get('name_prefix', '').casefold()))
+
+
+class TestSecondaryIndex(unittest.TestCase):
+    """Tests filtered pagination against a brute force model."""
+
+    def setUp(self):
+        """Writes a CSV file of random rows."""
+        self.rng = random.Random(0)
+        self.rows = [random_row(self.rng) for _ in range(300)]
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "names.csv")
+        with open(self.path, "w") as f:
+            f.write(HEADER + "".join(",".join(row) + "\n"
+                                     for row in self.rows))
+
+    def tearDown(self):
+        """Removes the CSV file and its sidecar files."""
+        shutil.rmtree(self.directory)
+
+    def server(self, server_class: type, storage: str = "rows"):
+        """Returns a server of the CSV file."""
+        server = server_class(storage=storage)
+        server.DATA_FILE = self.path
+        return server
+
+    def test_unknown_filter(self):
+        """An unknown filter raises ValueError naming it."""
+        with self.assertRaisesRegex(ValueError, "colour"):
+            self.server(HyperServer).get_page(1, 10, colour="red")
+        with self.assertRaisesRegex(ValueError, "colour"):
+            self.server(DelServer).get_hyper_index(0, 10, colour="red")
+
+    def test_filtered_pages_with_deletions(self):
+        """Filtered pages skip the deleted, removed and inserted rows
+        exactly as a scan of the live rows does."""
+        filters_list = ({'year': "2012"}, {'gender': "MALE"},
+                        {'year': "2011", 'gender': "FEMALE"},
+                        {'name_prefix': "oli"},
+                        {'name_prefix': "E", 'gender': "MALE"})
+        for storage in DelServer.STORAGES:
+            server = self.server(DelServer, storage)
+            model = dict(enumerate(self.rows))
+            for step in range(400):
+                operation = self.rng.random()
+                if operation < 0.4 and model:
+                    index = self.rng.choice(list(model))
+                    del model[index]
+                    if self.rng.random() < 0.2:
+                        # Removed behind the back of the server
+                        server.indexed_dataset().pop(index)
+                    else:
+                        server.delete(index)
+                elif operation < 0.5:
+                    row = random_row(self.rng)
+                    model[server.insert(row)] = row
+                filters = self.rng.choice(filters_list)
+                index = self.rng.randrange(server.live_index().size)
+                page = server.get_hyper_index(index, 5, **filters)
+                expected = [i for i in sorted(model) if i >= index and
+                            matching(model[i], filters)]
+                with self.subTest(storage=storage, step=step):
+                    self.assertEqual(page['data'],
+                                     [model[i] for i in expected[:5]])
+                    self.assertEqual(page['next_index'],
+                                     expected[5] if len(expected) > 5
+                                     else None)
+
+    def test_postings_skip_removed(self):
+        """Postings skip removed positions, even while iterated."""
+        postings = Postings()
+        for position in range(0, 100, 2):
+            postings.append(position)
+        for position in range(10, 80, 2):
+            self.assertTrue(postings.remove(position))
+        self.assertFalse(postings.remove(10))
+        self.assertFalse(postings.remove(11))
+        self.assertEqual(list(postings.iter_from(5)),
+                         [6, 8] + list(range(80, 100, 2)))
+        iterator = postings.iter_from(0)
+        self.assertEqual(next(iterator), 0)
+        postings.remove(2)
+        postings.append(100)
+        self.assertEqual(list(iterator), [4, 6, 8] +
+                         list(range(80, 101, 2)))
+        self.assertEqual(list(postings.live_positions()),
+                         [0, 4, 6, 8] + list(range(80, 101, 2)))
+
+
+if __name__ == "__main__":
+    unittest.main()
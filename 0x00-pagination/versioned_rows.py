@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Copy-on-write, versioned snapshots of keyed dataset rows.
+"""
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Optional, Tuple
+
+
+class RowSnapshot:
+    """Immutable view of the rows of a dataset at one version.
+
+    Rows are sorted by key and split into chunks of at most `CHUNK`
+    rows. A mutation copies only the chunk it touches and the small
+    tuple of chunk references, every other chunk is shared with the
+    previous snapshot, so keeping old snapshots alive for readers costs
+    almost no memory.
+    """
+
+    CHUNK = 256
+
+    __slots__ = ('version', '__firsts', '__chunks', '__length')
+
+    def __init__(self, version: int,
+                 chunks: Tuple[Tuple[array, tuple], ...]):
+        """Initializes a snapshot from its chunks.
+
+        Args:
+            version (int): The version of the dataset.
+            chunks (Tuple[Tuple[array, tuple], ...]): Non empty pairs of
+                sorted keys and matching rows, in key order.
+        """
+        self.version = version
+        self.__chunks = chunks
+        self.__firsts = tuple(keys[0] for keys, _ in chunks)
+        self.__length = sum(len(keys) for keys, _ in chunks)
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple[int, List]],
+                   version: int = 0) -> 'RowSnapshot':
+        """Builds a snapshot from (key, row) pairs sorted by key.
+
+        Args:
+            items (Iterable[Tuple[int, List]]): The keyed rows.
+            version (int): The version of the dataset.
+
+        Returns:
+            RowSnapshot: The snapshot holding the rows.
+        """
+        chunks = []
+        keys, rows = array('q'), []
+        for key, row in items:
+            keys.append(key)
+            rows.append(row)
+            if len(keys) == cls.CHUNK:
+                chunks.append((keys, tuple(rows)))
+                keys, rows = array('q'), []
+        if keys:
+            chunks.append((keys, tuple(rows)))
+        return cls(version, tuple(chunks))
+
+    def __len__(self) -> int:
+        """Returns the number of rows in the snapshot."""
+        return self.__length
+
+    def page(self, key: int,
+             page_size: int) -> Tuple[List[List], Optional[int]]:
+        """Returns the rows whose key is at least a given key.
+
+        Args:
+            key (int): The smallest key of the page.
+            page_size (int): The maximum number of rows to return.
+
+        Returns:
+            Tuple[List[List], Optional[int]]: The rows of the page, and
+            the key of the row that follows it or None at the end.
+        """
+        chunks = self.__chunks
+        c = max(bisect_right(self.__firsts, key) - 1, 0)
+        data = []  # type: List[List]
+        i = bisect_left(chunks[c][0], key) if chunks else 0
+        while c < len(chunks):
+            keys, rows = chunks[c]
+            take = min(len(keys) - i, page_size - len(data))
+            data.extend(rows[i:i + take])
+            i += take
+            if i < len(keys):
+                return data, keys[i]
+            c, i = c + 1, 0
+            if len(data) == page_size:
+                return data, chunks[c][0][0] if c < len(chunks) else None
+        return data, None
+
+    def without(self, key: int, version: int) -> 'RowSnapshot':
+        """Returns a snapshot where the row with a given key is deleted.
+
+        Args:
+            key (int): The key of the row to delete.
+            version (int): The version of the new snapshot.
+
+        Returns:
+            RowSnapshot: The new snapshot, or this one if the key is
+            not in it.
+        """
+        c = bisect_right(self.__firsts, key) - 1
+        if c < 0:
+            return self
+        keys, rows = self.__chunks[c]
+        i = bisect_left(keys, key)
+        if i == len(keys) or keys[i] != key:
+            return self
+        if len(keys) == 1:
+            replacement = ()  # type: tuple
+        else:
+            replacement = ((keys[:i] + keys[i + 1:],
+                            rows[:i] + rows[i + 1:]),)
+        chunks = self.__chunks[:c] + replacement + self.__chunks[c + 1:]
+        return RowSnapshot(version, chunks)
+
+    def with_row(self, key: int, row: List, version: int) -> 'RowSnapshot':
+        """Returns a snapshot with a row appended after all others.
+
+        Args:
+            key (int): The key of the row, greater than every key.
+            row (List): The row to append.
+            version (int): The version of the new snapshot.
+
+        Returns:
+            RowSnapshot: The new snapshot.
+        """
+        chunks = self.__chunks
+        if chunks and len(chunks[-1][0]) < self.CHUNK:
+            keys, rows = chunks[-1]
+            assert key > keys[-1]
+            chunks = chunks[:-1] + ((keys + array('q', [key]),
+                                     rows + (row,)),)
+        else:
+            assert not chunks or key > chunks[-1][0][-1]
+            chunks = chunks + ((array('q', [key]), (row,)),)
+        return RowSnapshot(version, chunks)
+
+
+class VersionedRows:
+    """Current snapshot of a dataset, replaced on every mutation.
+
+    Readers grab `snapshot()` without locking and keep reading it while
+    writers, serialized by a lock, publish new versions.
+    """
+
+    def __init__(self, snapshot: RowSnapshot):
+        """Initializes the dataset with its first snapshot.
+
+        Args:
+            snapshot (RowSnapshot): The snapshot of the initial rows.
+        """
+        self.__snapshot = snapshot
+        self.__lock = threading.Lock()
+
+    def snapshot(self) -> RowSnapshot:
+        """Returns the latest snapshot."""
+        return self.__snapshot
+
+    def delete(self, key: int) -> RowSnapshot:
+        """Deletes a row and publishes the resulting snapshot.
+
+        Args:
+            key (int): The key of the row to delete.
+
+        Returns:
+            RowSnapshot: The latest snapshot.
+        """
+        with self.__lock:
+            current = self.__snapshot
+            updated = current.without(key, current.version + 1)
+            self.__snapshot = updated
+            return updated
+
+    def append(self, key: int, row: List) -> RowSnapshot:
+        """Appends a row and publishes the resulting snapshot.
+
+        Args:
+            key (int): The key of the row, greater than every key.
+            row (List): The row to append.
+
+        Returns:
+            RowSnapshot: The latest snapshot.
+        """
+        with self.__lock:
+            current = self.__snapshot
+            self.__snapshot = current.with_row(key, row, current.version + 1)
+            return self.__snapshot
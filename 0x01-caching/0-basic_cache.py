@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 """Basic caching module.
 """
-from base_caching import BaseCaching
+from typing import Dict, Iterable, Mapping, Tuple, Union
+from cache_stats import InstrumentedCache
 
 
-class BasicCache(BaseCaching):
+class BasicCache(InstrumentedCache):
     """Represents a simple cache system with no size limit.
 
     The BasicCache class allows storing and retrieving items
@@ -22,6 +23,9 @@ class BasicCache(BaseCaching):
         """
         if key is None or item is None:
             return
+        self.puts += 1
+        if key in self.cache_data:
+            self.updates += 1
         self.cache_data[key] = item
 
     def get(self, key: str) -> object:
@@ -36,4 +40,69 @@ class BasicCache(BaseCaching):
         """
         if key is None:
             return None
-        return self.cache_data.get(key, None)
+        item = self.cache_data.get(key, None)
+        if item is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return item
+
+    def delete(self, key: str) -> object:
+        """Removes an item from the cache by its key.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            object: The removed item, or None if the key doesn't exist
+            or if the key is None.
+        """
+        if key is None:
+            return None
+        return self.cache_data.pop(key, None)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Retrieves the items of several keys.
+
+        Args:
+            keys (Iterable[str]): The keys for the cache items.
+
+        Returns:
+            Dict[str, object]: The cached items by key; keys that don't
+            exist are left out.
+        """
+        keys, data = list(keys), self.cache_data
+        found = {key: data[key] for key in keys if key in data}
+        hits = sum(key in found for key in keys)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, items: Union[Mapping[str, object],
+                                    Iterable[Tuple[str, object]]]):
+        """Adds several items in the cache.
+
+        Args:
+            items (Mapping or Iterable): The items by key, or pairs of
+                keys and items; pairs with a None key or item are
+                ignored.
+        """
+        if isinstance(items, Mapping):
+            items = items.items()
+        batch = {key: item for key, item in items
+                 if key is not None and item is not None}
+        self.puts += len(batch)
+        self.updates += sum(key in self.cache_data for key in batch)
+        self.cache_data.update(batch)
+
+    def delete_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Removes the items of several keys.
+
+        Args:
+            keys (Iterable[str]): The keys for the cache items.
+
+        Returns:
+            Dict[str, object]: The removed items by key.
+        """
+        data = self.cache_data
+        return {key: data.pop(key) for key in keys if key in data}
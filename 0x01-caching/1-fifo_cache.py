@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 """First-In First-Out caching module."""
 from collections import OrderedDict
-from base_caching import BaseCaching
+from itertools import islice
+from typing import Dict, Iterable, List
 
+BoundedCache = __import__('bounded_cache').BoundedCache
 
-class FIFOCache(BaseCaching):
+
+class FIFOCache(BoundedCache):
     """FIFO caching system with a limited size.
 
     This class implements a FIFO cache that stores items in an
@@ -25,19 +28,26 @@ class FIFOCache(BaseCaching):
             item (object): The item to cache.
 
         If either the key or item is None, this method does nothing.
-        If the number of items in the cache exceeds `MAX_ITEMS`,
-        the oldest item (first-in) is discarded, following FIFO rules.
+        If the number of items in the cache exceeds `MAX_ITEMS`, or
+        their weight exceeds `MAX_WEIGHT`, the oldest items (first-in)
+        are discarded, following FIFO rules.
         """
         if key is None or item is None:
             return
 
-        self.cache_data[key] = item
+        weight = self.admit(key, item)
+        if weight is None:
+            return
+
+        # Until the item fits, discard the first item (FIFO)
+        while self.full(key, weight):
+            keys = iter(self.cache_data)
+            first_key = next(keys)
+            if first_key == key:
+                first_key = next(keys)
+            self.discard(first_key)
 
-        # If the cache exceeds MAX_ITEMS, discard the first item (FIFO)
-        if len(self.cache_data) > BaseCaching.MAX_ITEMS:
-            first_key = next(iter(self.cache_data))  # Get the first key
-            self.cache_data.pop(first_key)  # Remove the first item
-            print("DISCARD:", first_key)
+        self.store(key, item, weight)
 
     def get(self, key: str) -> object:
         """Retrieves an item from the cache by its key.
@@ -51,4 +61,43 @@ class FIFOCache(BaseCaching):
         """
         if key is None:
             return None
-        return self.cache_data.get(key)
+        item = self.cache_data.get(key)
+        if item is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return item
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Retrieves the items of several keys in a single pass.
+
+        Args:
+            keys (Iterable[str]): The keys for the cache items.
+
+        Returns:
+            Dict[str, object]: The cached items by key; keys that don't
+            exist are left out.
+        """
+        keys, data = list(keys), self.cache_data
+        return self.counted(
+            {key: data[key] for key in keys if key in data}, keys)
+
+    def victims(self, count: int) -> List[str]:
+        """Returns the `count` oldest keys (first-in).
+
+        Args:
+            count (int): The number of keys to discard.
+
+        Returns:
+            List[str]: The keys, in eviction order.
+        """
+        return list(islice(self.cache_data, max(count, 0)))
+
+    def restored(self, key: str, uses: int):
+        """Places a restored key first, as the next item to evict.
+
+        Args:
+            key (str): The key for the cache item.
+            uses (int): The number of uses counted for the key.
+        """
+        self.cache_data.move_to_end(key, last=False)
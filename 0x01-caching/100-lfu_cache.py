@@ -1,28 +1,94 @@
 #!/usr/bin/env python3
 """Least Frequently Used caching module."""
 from collections import OrderedDict
-from base_caching import BaseCaching
+from heapq import heapify, heappop, heappush
+from typing import Dict, Iterable, List
 
+BoundedCache = __import__('bounded_cache').BoundedCache
 
-class LFUCache(BaseCaching):
+
+class LFUCache(BoundedCache):
     """LFU caching system with a limited size.
 
-    This class implements an LFU cache that uses an OrderedDict
-    for storage. When the cache exceeds the limit, the least
-    frequently used item is removed. If there are multiple such
-    items, the least recently used one is removed.
+    This class implements an LFU cache where keys are grouped in
+    buckets by access frequency, each bucket keeping its keys in least
+    recently used order. The frequencies in use are kept in a heap, so
+    that the lowest one is found in logarithmic time whichever way its
+    bucket emptied. When the cache exceeds the limit, the least
+    recently used key of the lowest frequency bucket is removed.
     """
 
     def __init__(self):
         """Initializes the cache."""
         super().__init__()
-        self.cache_data = OrderedDict()
-        self.keys_freq = OrderedDict()  # Keeps track of the access frequency
+        self.keys_freq = {}  # Keeps track of the access frequency
+        self.freq_keys = {}  # Frequency to keys, least recent first
+        self.freqs = []  # Heap of frequencies, some of emptied buckets
+
+    def __add(self, key, freq) -> OrderedDict:
+        """Adds a key last to the bucket of a frequency.
+
+        Returns:
+            OrderedDict: The bucket of the frequency.
+        """
+        self.keys_freq[key] = freq
+        bucket = self.freq_keys.get(freq)
+        if bucket is None:
+            bucket = self.freq_keys[freq] = OrderedDict()
+            heappush(self.freqs, freq)
+            if len(self.freqs) > 2 * len(self.freq_keys):
+                # Drop the emptied buckets buried under the lowest one,
+                # so that the heap holds at most twice the buckets
+                self.freqs = list(self.freq_keys)
+                heapify(self.freqs)
+        bucket[key] = None
+        return bucket
+
+    def __forget(self, key):
+        """Removes a key from its frequency bucket.
+
+        An emptied bucket stays in the heap until it comes on top.
+        """
+        freq = self.keys_freq.pop(key)
+        bucket = self.freq_keys[freq]
+        del bucket[key]
+        if not bucket:
+            del self.freq_keys[freq]
 
-    def __update_frequency(self, key):
-        """Updates the frequency of a given key."""
-        self.keys_freq[key] = self.keys_freq.get(key, 0) + 1
-        self.cache_data.move_to_end(key, last=False)
+    def __lowest(self) -> int:
+        """Returns the lowest frequency of a bucket."""
+        freqs = self.freqs
+        while freqs[0] not in self.freq_keys:
+            heappop(freqs)
+        return freqs[0]
+
+    def __update_frequency(self, key, count=1):
+        """Moves a key to the bucket of its frequency after `count` uses.
+        """
+        freq = self.keys_freq[key]
+        self.__forget(key)
+        self.__add(key, freq + count)
+
+    def __victim(self, key) -> str:
+        """Returns the key to evict to make room for the item of `key`."""
+        lowest = self.__lowest()
+        for lfu_key in self.freq_keys[lowest]:
+            if lfu_key != key:
+                return lfu_key
+        # `key` is alone in the lowest frequency bucket
+        heappop(self.freqs)
+        freq = self.__lowest()
+        heappush(self.freqs, lowest)
+        return next(iter(self.freq_keys[freq]))
+
+    def discard(self, key: str):
+        """Evicts an item and forgets its frequency.
+
+        Args:
+            key (str): The key for the cache item.
+        """
+        self.__forget(key)
+        super().discard(key)
 
     def put(self, key: str, item: object):
         """Adds an item in the cache.
@@ -32,30 +98,30 @@ class LFUCache(BaseCaching):
             item (object): The item to cache.
 
         If the key or item is None, this method does nothing.
-        If the cache limit is reached, the least frequently used
-        item is removed. If there's a tie, the least recently used
-        among them is discarded.
+        If the cache limit is reached, in items or in `MAX_WEIGHT`,
+        the least frequently used items are removed. If there's a tie,
+        the least recently used among them is discarded.
         """
         if key is None or item is None:
             return
 
-        if key not in self.cache_data:
-            if len(self.cache_data) >= BaseCaching.MAX_ITEMS:
-                # Find the least frequently used key(s)
-                min_freq = min(self.keys_freq.values())
-                lfu_keys = [k for k, v in self.keys_freq.items() if v == min_freq]
-                lfu_key = lfu_keys[-1]
-                self.cache_data.pop(lfu_key)
-                self.keys_freq.pop(lfu_key)
-                print("DISCARD:", lfu_key)
-
-            self.cache_data[key] = item
-            self.keys_freq[key] = 1
-        else:
+        weight = self.admit(key, item)
+        if weight is None:
+            return
+
+        update = key in self.cache_data
+        if update:
             # If the key is already in the cache, update its frequency
-            self.cache_data[key] = item
             self.__update_frequency(key)
 
+        # Discard the least recently used keys of the lowest frequency
+        while self.full(key, weight):
+            self.discard(self.__victim(key))
+
+        self.store(key, item, weight)
+        if not update:
+            self.__add(key, 1)
+
     def get(self, key: str) -> object:
         """Retrieves an item from the cache by its key.
 
@@ -66,9 +132,89 @@ class LFUCache(BaseCaching):
             object: The cached item, or None if the key doesn't exist
             or if the key is None.
         """
-        if key is None or key not in self.cache_data:
+        if key is None:
+            return None
+        if key not in self.cache_data:
+            self.misses += 1
             return None
 
         # Update the frequency for the key when accessed
+        self.hits += 1
         self.__update_frequency(key)
         return self.cache_data.get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Retrieves the items of several keys in a single pass.
+
+        A key given several times has its frequency raised once, by its
+        number of uses.
+
+        Args:
+            keys (Iterable[str]): The keys for the cache items.
+
+        Returns:
+            Dict[str, object]: The cached items by key; keys that don't
+            exist are left out.
+        """
+        keys, data = list(keys), self.cache_data
+        uses = {}
+        for key in keys:
+            if key in data:
+                uses[key] = uses.get(key, 0) + 1
+        for key, count in uses.items():
+            self.__update_frequency(key, count)
+        return self.counted({key: data[key] for key in uses}, keys)
+
+    def victims(self, count: int) -> List[str]:
+        """Returns the `count` least frequently used keys.
+
+        Args:
+            count (int): The number of keys to discard.
+
+        Returns:
+            List[str]: The keys, in eviction order.
+        """
+        keys = []
+        for freq in sorted(self.freq_keys):
+            for key in self.freq_keys[freq]:
+                if len(keys) >= count:
+                    return keys
+                keys.append(key)
+        return keys
+
+    def uses(self, key: str) -> int:
+        """Returns the access frequency of a cached key.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            int: The frequency of the key.
+        """
+        return self.keys_freq[key]
+
+    def restored(self, key: str, uses: int):
+        """Restores the frequency of a key, as the first of its bucket.
+
+        Args:
+            key (str): The key for the cache item.
+            uses (int): The frequency of the key.
+        """
+        bucket = self.__add(key, max(uses, 1))
+        bucket.move_to_end(key, last=False)
+
+    def delete(self, key: str) -> object:
+        """Removes an item from the cache by its key.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            object: The removed item, or None if the key doesn't exist
+            or if the key is None.
+        """
+        if key is None or key not in self.cache_data:
+            return None
+
+        self.__forget(key)
+        return super().delete(key)
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""Thread-safe, lock-striped caching module."""
+import threading
+from typing import Dict, Iterable, Iterator, List, Mapping, Tuple, Type, \
+    Union
+from cache_stats import InstrumentedCache, merge_counters
+
+size_of = __import__('bounded_cache').size_of
+print_discards = __import__('eviction_listeners').print_discards
+FIFOCache = __import__('1-fifo_cache').FIFOCache
+LIFOCache = __import__('2-lifo_cache').LIFOCache
+LRUCache = __import__('3-lru_cache').LRUCache
+MRUCache = __import__('4-mru_cache').MRUCache
+LFUCache = __import__('100-lfu_cache').LFUCache
+
+
+class ShardedData(Mapping):
+    """Read-only view of the items of every shard of a cache."""
+
+    def __init__(self, cache: 'ShardedCache'):
+        """Initializes the view over the shards of a cache.
+
+        Args:
+            cache (ShardedCache): The cache whose items are viewed.
+        """
+        self.__cache = cache
+
+    def __getitem__(self, key: str) -> object:
+        """Returns the item of a key, without updating its policy."""
+        shard, lock = self.__cache.shard_of(key)
+        with lock:
+            return shard.cache_data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        """Yields the keys of every shard, one shard at a time."""
+        for shard, lock in zip(self.__cache.shards, self.__cache.locks):
+            with lock:
+                keys = list(shard.cache_data)
+            yield from keys
+
+    def __len__(self) -> int:
+        """Returns the number of items in the cache."""
+        return sum(len(shard.cache_data) for shard in self.__cache.shards)
+
+
+class ShardedCache(InstrumentedCache):
+    """Cache split into independently locked shards.
+
+    Keys are spread over the shards by hash. Every shard is a cache of
+    the `POLICY` class, guarded by its own lock and holding its share of
+    `MAX_ITEMS` (rounded up), so threads working on different shards
+    never contend.
+    Evictions follow the policy within each shard rather than across
+    the whole cache. A `MAX_WEIGHT` is shared out the same way. Every
+    shard reports its evictions to `on_discard`, from the thread that
+    caused them.
+    """
+
+    POLICY = LRUCache  # type: Type[InstrumentedCache]
+    SHARDS = 16
+    MAX_WEIGHT = None
+    weigher = staticmethod(size_of)
+    on_discard = staticmethod(print_discards)
+
+    def __init__(self, shards: int = None):
+        """Initializes the shards of the cache.
+
+        Args:
+            shards (int): The number of shards; defaults to `SHARDS`,
+                bounded so every shard holds at least one item.
+        """
+        super().__init__()
+        count = max(1, min(shards or self.SHARDS, self.MAX_ITEMS))
+        capacity = -(-self.MAX_ITEMS // count)
+        self.shards = []  # type: List[InstrumentedCache]
+        for _ in range(count):
+            shard = self.POLICY()
+            shard.MAX_ITEMS = capacity
+            if self.MAX_WEIGHT is not None:
+                shard.MAX_WEIGHT = -(-self.MAX_WEIGHT // count)
+            shard.weigher = self.weigher
+            shard.on_discard = self.on_discard
+            self.shards.append(shard)
+        self.locks = [threading.Lock() for _ in range(count)]
+        self.cache_data = ShardedData(self)
+
+    def __len__(self) -> int:
+        """Returns the number of cached items."""
+        return len(self.cache_data)
+
+    @property
+    def weight(self) -> int:
+        """Returns the total weight of the cached items."""
+        return sum(getattr(shard, "weight", 0) for shard in self.shards)
+
+    def shard_of(self, key: str) -> tuple:
+        """Returns the shard holding a key and its lock.
+
+        Args:
+            key (str): The key of the item.
+
+        Returns:
+            tuple: The shard and the lock guarding it.
+        """
+        i = hash(key) % len(self.shards)
+        return self.shards[i], self.locks[i]
+
+    def counters(self) -> dict:
+        """Returns the operation counters summed over the shards.
+
+        Returns:
+            dict: The counters of every shard, added up.
+        """
+        counters = []
+        for shard, lock in zip(self.shards, self.locks):
+            with lock:
+                counters.append(shard.counters())
+        return merge_counters(counters)
+
+    def put(self, key: str, item: object):
+        """Adds an item in the shard of its key.
+
+        Args:
+            key (str): The key for the cache item.
+            item (object): The item to cache.
+
+        If the key or item is None, this method does nothing.
+        """
+        if key is None or item is None:
+            return
+        shard, lock = self.shard_of(key)
+        with lock:
+            shard.put(key, item)
+
+    def get(self, key: str) -> object:
+        """Retrieves an item from the shard of its key.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            object: The cached item, or None if the key doesn't exist
+            or if the key is None.
+        """
+        if key is None:
+            return None
+        shard, lock = self.shard_of(key)
+        with lock:
+            return shard.get(key)
+
+    def delete(self, key: str) -> object:
+        """Removes an item from the shard of its key.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            object: The removed item, or None if the key doesn't exist
+            or if the key is None.
+        """
+        if key is None:
+            return None
+        shard, lock = self.shard_of(key)
+        with lock:
+            return shard.delete(key)
+
+    def __group(self, entries: Iterable,
+                pairs: bool = False) -> Dict[int, list]:
+        """Groups keys, or key and item pairs if `pairs`, by shard index.
+        """
+        groups = {}  # type: Dict[int, list]
+        count = len(self.shards)
+        for entry in entries:
+            key = entry[0] if pairs else entry
+            if key is not None:
+                groups.setdefault(hash(key) % count, []).append(entry)
+        return groups
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Retrieves the items of several keys, locking every shard once.
+
+        Args:
+            keys (Iterable[str]): The keys for the cache items.
+
+        Returns:
+            Dict[str, object]: The cached items by key; keys that don't
+            exist are left out.
+        """
+        found = {}
+        for i, group in self.__group(keys).items():
+            with self.locks[i]:
+                found.update(self.shards[i].get_many(group))
+        return found
+
+    def put_many(self, items: Union[Mapping[str, object],
+                                    Iterable[Tuple[str, object]]]):
+        """Adds several items, locking every shard once.
+
+        Args:
+            items (Mapping or Iterable): The items by key, or pairs of
+                keys and items; the last item of a key wins.
+        """
+        if isinstance(items, Mapping):
+            items = items.items()
+        for i, group in self.__group(
+                (tuple(pair) for pair in items), pairs=True).items():
+            with self.locks[i]:
+                self.shards[i].put_many(group)
+
+    def delete_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Removes the items of several keys, locking every shard once.
+
+        Args:
+            keys (Iterable[str]): The keys for the cache items.
+
+        Returns:
+            Dict[str, object]: The removed items by key.
+        """
+        removed = {}
+        for i, group in self.__group(keys).items():
+            with self.locks[i]:
+                removed.update(self.shards[i].delete_many(group))
+        return removed
+
+
+class LockedCache(InstrumentedCache):
+    """Cache of the `POLICY` class behind a single global lock.
+
+    It is the simplest thread-safe cache, and the baseline the sharded
+    caches are measured against.
+    """
+
+    POLICY = LRUCache  # type: Type[InstrumentedCache]
+    MAX_WEIGHT = None
+    weigher = staticmethod(size_of)
+    on_discard = staticmethod(print_discards)
+
+    def __init__(self):
+        """Initializes the guarded cache."""
+        super().__init__()
+        self.cache = self.POLICY()
+        self.cache.MAX_ITEMS = self.MAX_ITEMS
+        self.cache.MAX_WEIGHT = self.MAX_WEIGHT
+        self.cache.weigher = self.weigher
+        self.cache.on_discard = self.on_discard
+        self.cache_data = self.cache.cache_data
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Returns the number of cached items."""
+        return len(self.cache_data)
+
+    @property
+    def weight(self) -> int:
+        """Returns the total weight of the cached items."""
+        return getattr(self.cache, "weight", 0)
+
+    def counters(self) -> dict:
+        """Returns the operation counters of the guarded cache.
+
+        Returns:
+            dict: The counters, read under the lock.
+        """
+        with self.lock:
+            return self.cache.counters()
+
+    def put(self, key: str, item: object):
+        """Adds an item in the cache, holding the lock.
+
+        Args:
+            key (str): The key for the cache item.
+            item (object): The item to cache.
+        """
+        with self.lock:
+            self.cache.put(key, item)
+
+    def get(self, key: str) -> object:
+        """Retrieves an item from the cache, holding the lock.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            object: The cached item, or None if it is not cached.
+        """
+        with self.lock:
+            return self.cache.get(key)
+
+    def delete(self, key: str) -> object:
+        """Removes an item from the cache, holding the lock.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            object: The removed item, or None if it is not cached.
+        """
+        with self.lock:
+            return self.cache.delete(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Retrieves the items of several keys, holding the lock once.
+
+        Args:
+            keys (Iterable[str]): The keys for the cache items.
+
+        Returns:
+            Dict[str, object]: The cached items by key.
+        """
+        with self.lock:
+            return self.cache.get_many(keys)
+
+    def put_many(self, items: Union[Mapping[str, object],
+                                    Iterable[Tuple[str, object]]]):
+        """Adds several items, holding the lock once.
+
+        Args:
+            items (Mapping or Iterable): The items by key, or pairs of
+                keys and items.
+        """
+        with self.lock:
+            self.cache.put_many(items)
+
+    def delete_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Removes the items of several keys, holding the lock once.
+
+        Args:
+            keys (Iterable[str]): The keys for the cache items.
+
+        Returns:
+            Dict[str, object]: The removed items by key.
+        """
+        with self.lock:
+            return self.cache.delete_many(keys)
+
+
+class ConcurrentFIFOCache(ShardedCache):
+    """Thread-safe FIFO cache, with FIFO eviction in every shard."""
+
+    POLICY = FIFOCache
+
+
+class ConcurrentLIFOCache(ShardedCache):
+    """Thread-safe LIFO cache, with LIFO eviction in every shard."""
+
+    POLICY = LIFOCache
+
+
+class ConcurrentLRUCache(ShardedCache):
+    """Thread-safe LRU cache, with LRU eviction in every shard."""
+
+    POLICY = LRUCache
+
+
+class ConcurrentMRUCache(ShardedCache):
+    """Thread-safe MRU cache, with MRU eviction in every shard."""
+
+    POLICY = MRUCache
+
+
+class ConcurrentLFUCache(ShardedCache):
+    """Thread-safe LFU cache, with LFU eviction in every shard."""
+
+    POLICY = LFUCache
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""Window TinyLFU caching module."""
+from collections import OrderedDict
+from cache_stats import InstrumentedCache
+
+print_discards = __import__('eviction_listeners').print_discards
+
+
+class FrequencySketch:
+    """Count-min sketch of 4-bit counters estimating access frequencies.
+
+    Every key increments one counter in each of `DEPTH` rows, and its
+    frequency is the smallest of them. After a sample of ten accesses
+    per cached item all counters are halved, so that the sketch forgets
+    keys that used to be popular.
+    """
+
+    DEPTH = 4
+    MAX_COUNT = 15
+    # Odd 64-bit multipliers spreading the hash of a key over every row
+    SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F,
+             0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+    MASK = (1 << 64) - 1
+    HALVE = bytes(count >> 1 for count in range(256))
+
+    def __init__(self, capacity: int):
+        """Initializes the counters for a number of cached items.
+
+        Args:
+            capacity (int): The maximum number of items of the cache.
+        """
+        self.capacity = capacity
+        bits = max(capacity - 1, 15).bit_length()
+        self.shift = 64 - bits
+        self.table = [bytearray(1 << bits) for _ in range(self.DEPTH)]
+        self.sample_size = 10 * max(capacity, 1)
+        self.additions = 0
+
+    def __indexes(self, key) -> list:
+        """Returns the counter of a key in every row."""
+        h = hash(key) & self.MASK
+        return [((h * seed) & self.MASK) >> self.shift
+                for seed in self.SEEDS]
+
+    def increment(self, key):
+        """Counts an access to a key, aging the sketch when it is due.
+
+        Args:
+            key: The accessed key.
+        """
+        for row, i in zip(self.table, self.__indexes(key)):
+            if row[i] < self.MAX_COUNT:
+                row[i] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.reset()
+
+    def frequency(self, key) -> int:
+        """Returns the estimated number of recent accesses to a key.
+
+        Args:
+            key: The key to look up.
+
+        Returns:
+            int: The estimate, never below the real count until aged.
+        """
+        return min(row[i] for row, i in zip(self.table, self.__indexes(key)))
+
+    def reset(self):
+        """Halves every counter."""
+        for row in self.table:
+            row[:] = row.translate(self.HALVE)
+        self.additions //= 2
+
+
+class TinyLFUCache(InstrumentedCache):
+    """W-TinyLFU caching system with a limited size.
+
+    New keys enter a small LRU window. A key leaving the window is
+    admitted to the main region only if the frequency sketch estimates
+    it more popular than the key the main region would evict, so one-off
+    scans never flush the hot keys. The main region is a segmented LRU:
+    keys are probationary until accessed again, then protected.
+    """
+
+    WINDOW = 0.01  # Share of MAX_ITEMS held by the window
+    PROTECTED = 0.8  # Share of the main region held by protected keys
+    on_discard = staticmethod(print_discards)
+
+    def __init__(self):
+        """Initializes the cache and its three LRU regions."""
+        super().__init__()
+        self.window = OrderedDict()
+        self.probation = OrderedDict()
+        self.protected = OrderedDict()
+        self.sketch = FrequencySketch(self.MAX_ITEMS)
+
+    def __window_size(self) -> int:
+        """Returns the maximum number of items of the window."""
+        return max(1, int(self.MAX_ITEMS * self.WINDOW))
+
+    def __record(self, key):
+        """Counts an access to a key in the sketch."""
+        if self.sketch.capacity != self.MAX_ITEMS:
+            self.sketch = FrequencySketch(self.MAX_ITEMS)
+        self.sketch.increment(key)
+
+    def __discard(self, key, reason):
+        """Removes the item of a key evicted from the regions."""
+        item = self.cache_data.pop(key)
+        self.evicted(reason)
+        if self.on_discard is not None:
+            self.on_discard([(key, item)])
+
+    def __admit(self, candidate):
+        """Moves a key out of the window, evicting it or a main key."""
+        main_size = self.MAX_ITEMS - self.__window_size()
+        if len(self.probation) + len(self.protected) < main_size:
+            self.probation[candidate] = None
+            return
+        region = self.probation or self.protected
+        victim = next(iter(region), None)
+        if (victim is None or self.sketch.frequency(candidate) <=
+                self.sketch.frequency(victim)):
+            self.__discard(candidate, "admission")
+            return
+        del region[victim]
+        self.probation[candidate] = None
+        self.__discard(victim, "size")
+
+    def __touch(self, key):
+        """Marks a cached key as recently used, promoting probationers."""
+        if key in self.window:
+            self.window.move_to_end(key)
+        elif key in self.protected:
+            self.protected.move_to_end(key)
+        else:
+            del self.probation[key]
+            self.protected[key] = None
+            main_size = self.MAX_ITEMS - self.__window_size()
+            if len(self.protected) > int(main_size * self.PROTECTED):
+                demoted, _ = self.protected.popitem(last=False)
+                self.probation[demoted] = None
+
+    def put(self, key: str, item: object):
+        """Adds an item in the cache.
+
+        Args:
+            key (str): The key for the cache item.
+            item (object): The item to cache.
+
+        If the key or item is None, this method does nothing.
+        A new key enters the window; if the window is full, its least
+        recently used key is admitted to the main region at the expense
+        of a less popular key, or discarded.
+        """
+        if key is None or item is None:
+            return
+
+        self.__record(key)
+        self.puts += 1
+        if key in self.cache_data:
+            self.updates += 1
+            self.cache_data[key] = item
+            self.__touch(key)
+            return
+
+        self.cache_data[key] = item
+        self.window[key] = None
+        if len(self.window) > self.__window_size():
+            candidate, _ = self.window.popitem(last=False)
+            self.__admit(candidate)
+
+    def get(self, key: str) -> object:
+        """Retrieves an item from the cache by its key.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            object: The cached item, or None if the key doesn't exist
+            or if the key is None.
+        """
+        if key is None:
+            return None
+
+        # Misses are counted too, so that returning keys get admitted
+        self.__record(key)
+        if key not in self.cache_data:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.__touch(key)
+        return self.cache_data.get(key)
+
+    def delete(self, key: str) -> object:
+        """Removes an item from the cache by its key.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            object: The removed item, or None if the key doesn't exist
+            or if the key is None.
+        """
+        if key is None or key not in self.cache_data:
+            return None
+
+        for region in (self.window, self.probation, self.protected):
+            region.pop(key, None)
+        return self.cache_data.pop(key)
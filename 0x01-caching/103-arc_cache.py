@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Adaptive Replacement caching module."""
+from collections import OrderedDict
+from cache_stats import InstrumentedCache
+
+print_discards = __import__('eviction_listeners').print_discards
+
+
+class ARCCache(InstrumentedCache):
+    """ARC caching system with a limited size.
+
+    Cached keys are split between `recent`, the keys used once since
+    they were cached, and `frequent`, the keys used at least twice.
+    Both lists are kept in least recently used order, and the keys
+    evicted from each are remembered, without their items, in a ghost
+    list. A miss on a ghost key shows which list was evicted too early,
+    and moves the `target` size of `recent` in its favour.
+    """
+
+    on_discard = staticmethod(print_discards)
+
+    def __init__(self):
+        """Initializes the cache with empty lists and ghost lists."""
+        super().__init__()
+        self.recent = OrderedDict()
+        self.frequent = OrderedDict()
+        self.recent_ghosts = OrderedDict()
+        self.frequent_ghosts = OrderedDict()
+        self.target = 0.0  # Number of items `recent` aims to hold
+
+    def __discard(self, key: str):
+        """Removes the item of an evicted key and reports it."""
+        item = self.cache_data.pop(key)
+        self.evicted("size")
+        if self.on_discard is not None:
+            self.on_discard([(key, item)])
+
+    def __replace(self, in_frequent_ghosts: bool):
+        """Evicts the least recently used key of the list over its share.
+
+        Args:
+            in_frequent_ghosts (bool): Whether the key being cached was
+                just found in the frequent ghost list.
+        """
+        if self.recent and (
+                len(self.recent) > self.target or
+                (in_frequent_ghosts and len(self.recent) == self.target)):
+            key, _ = self.recent.popitem(last=False)
+            self.recent_ghosts[key] = None
+        else:
+            key, _ = self.frequent.popitem(last=False)
+            self.frequent_ghosts[key] = None
+        self.__discard(key)
+
+    def put(self, key: str, item: object):
+        """Adds an item in the cache.
+
+        Args:
+            key (str): The key for the cache item.
+            item (object): The item to cache.
+
+        If the key or item is None, this method does nothing.
+        If the cache is full, the least recently used key of `recent`
+        or `frequent` is discarded, depending on which is over its
+        target size.
+        """
+        if key is None or item is None:
+            return
+
+        self.puts += 1
+        if key in self.cache_data:
+            self.updates += 1
+            self.cache_data[key] = item
+            self.__touch(key)
+            return
+
+        full = len(self.cache_data) >= self.MAX_ITEMS
+        if key in self.recent_ghosts:
+            # Recent keys were evicted too early: grow their share
+            self.target = min(self.MAX_ITEMS, self.target + max(
+                len(self.frequent_ghosts) / len(self.recent_ghosts), 1))
+            if full:
+                self.__replace(False)
+            del self.recent_ghosts[key]
+            self.frequent[key] = None
+        elif key in self.frequent_ghosts:
+            # Frequent keys were evicted too early: shrink recent's share
+            self.target = max(0.0, self.target - max(
+                len(self.recent_ghosts) / len(self.frequent_ghosts), 1))
+            if full:
+                self.__replace(True)
+            del self.frequent_ghosts[key]
+            self.frequent[key] = None
+        else:
+            if len(self.recent) + len(self.recent_ghosts) >= self.MAX_ITEMS:
+                if self.recent_ghosts:
+                    self.recent_ghosts.popitem(last=False)
+                    if full:
+                        self.__replace(False)
+                else:
+                    # `recent` fills the cache: evict it without a ghost
+                    lru_key, _ = self.recent.popitem(last=False)
+                    self.__discard(lru_key)
+            else:
+                if (len(self.cache_data) + len(self.recent_ghosts) +
+                        len(self.frequent_ghosts) >= 2 * self.MAX_ITEMS):
+                    self.frequent_ghosts.popitem(last=False)
+                if full:
+                    self.__replace(False)
+            self.recent[key] = None
+        self.cache_data[key] = item
+
+    def __touch(self, key: str):
+        """Moves a cached key to the most recently used end of `frequent`.
+        """
+        if key in self.recent:
+            del self.recent[key]
+            self.frequent[key] = None
+        else:
+            self.frequent.move_to_end(key)
+
+    def get(self, key: str) -> object:
+        """Retrieves an item from the cache by its key.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            object: The cached item, or None if the key doesn't exist
+            or if the key is None.
+        """
+        if key is None:
+            return None
+        if key not in self.cache_data:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.__touch(key)
+        return self.cache_data.get(key)
+
+    def delete(self, key: str) -> object:
+        """Removes an item from the cache by its key.
+
+        The key is not remembered as a ghost, since it was not evicted.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            object: The removed item, or None if the key doesn't exist
+            or if the key is None.
+        """
+        if key is None or key not in self.cache_data:
+            return None
+
+        self.recent.pop(key, None)
+        self.frequent.pop(key, None)
+        return self.cache_data.pop(key)
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""Time-to-live caching module."""
+import math
+import time
+from typing import Callable, Dict, Iterable, List, Mapping, Tuple, \
+    Type, Union
+from cache_stats import InstrumentedCache, merge_counters
+
+TimingWheel = __import__('timing_wheel').TimingWheel
+size_of = __import__('bounded_cache').size_of
+print_discards = __import__('eviction_listeners').print_discards
+BasicCache = __import__('0-basic_cache').BasicCache
+FIFOCache = __import__('1-fifo_cache').FIFOCache
+LIFOCache = __import__('2-lifo_cache').LIFOCache
+LRUCache = __import__('3-lru_cache').LRUCache
+MRUCache = __import__('4-mru_cache').MRUCache
+LFUCache = __import__('100-lfu_cache').LFUCache
+
+
+class TTLCache(InstrumentedCache):
+    """Cache of the `POLICY` class whose items expire.
+
+    Every item lives for its own time-to-live, or `DEFAULT_TTL` seconds,
+    or forever when both are None. Deadlines are kept in a hierarchical
+    timing wheel of `RESOLUTION` seconds per tick, which every call
+    advances by at most `REAP_TICKS` ticks, so expired items are freed
+    without ever scanning the cache. A `get` still checks the deadline
+    of its key, in case the wheel has not caught up yet. Items the
+    policy evicts are unscheduled before being reported to `on_discard`.
+    """
+
+    POLICY = LRUCache  # type: Type[InstrumentedCache]
+    DEFAULT_TTL = None
+    RESOLUTION = 0.1
+    REAP_TICKS = 64
+    MAX_WEIGHT = None
+    weigher = staticmethod(size_of)
+    on_discard = staticmethod(print_discards)
+
+    def __init__(self, default_ttl: float = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """Initializes the cache and its timing wheel.
+
+        Args:
+            default_ttl (float): The time-to-live of items put without
+                one, in seconds; defaults to `DEFAULT_TTL`.
+            clock (Callable[[], float]): The source of the current time,
+                in seconds.
+        """
+        super().__init__()
+        if default_ttl is not None:
+            self.DEFAULT_TTL = default_ttl
+        self.clock = clock
+        self.cache = self.POLICY()
+        self.cache.MAX_ITEMS = self.MAX_ITEMS
+        if self.MAX_WEIGHT is not None:
+            self.cache.MAX_WEIGHT = self.MAX_WEIGHT
+        self.cache.weigher = self.weigher
+        self.cache.on_discard = self.__discarded
+        self.cache_data = self.cache.cache_data
+        self.wheel = TimingWheel(self.__now())
+
+    def __len__(self) -> int:
+        """Returns the number of cached items, expired or not."""
+        return len(self.cache_data)
+
+    @property
+    def weight(self) -> int:
+        """Returns the total weight of the cached items."""
+        return getattr(self.cache, "weight", 0)
+
+    def __now(self) -> int:
+        """Returns the current tick."""
+        return int(self.clock() // self.RESOLUTION)
+
+    def __reap(self, now: int, limit: int = None):
+        """Advances the wheel and removes the items that expired."""
+        expired = 0
+        for key in self.wheel.advance(now, limit):
+            if self.cache.delete(key) is not None:
+                expired += 1
+        if expired:
+            self.evicted("expired", expired)
+
+    def __discarded(self, evicted: List[Tuple[str, object]]):
+        """Unschedules the items the policy evicted, then reports them."""
+        for key, _ in evicted:
+            self.wheel.cancel(key)
+        if self.on_discard is not None:
+            self.on_discard(evicted)
+
+    def __expire(self, key: str):
+        """Removes the item of a key found past its deadline."""
+        self.wheel.cancel(key)
+        if self.cache.delete(key) is not None:
+            self.evicted("expired")
+
+    def counters(self) -> dict:
+        """Returns the operation counters of the cache.
+
+        Returns:
+            dict: The counters of the policy, with the expirations and
+            the lookups of expired keys.
+        """
+        return merge_counters([super().counters(), self.cache.counters()])
+
+    def expire(self):
+        """Removes every expired item from the cache."""
+        self.__reap(self.__now())
+
+    def ttl(self, key: str) -> float:
+        """Returns the seconds left before the item of a key expires.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            float: The time left, or None if the item never expires or
+            is not cached.
+        """
+        deadline = self.wheel.deadline(key)
+        if deadline is None or key not in self.cache_data:
+            return None
+        return max(0.0, deadline * self.RESOLUTION - self.clock())
+
+    def put(self, key: str, item: object, ttl: float = None):
+        """Adds an item in the cache.
+
+        Args:
+            key (str): The key for the cache item.
+            item (object): The item to cache.
+            ttl (float): The seconds before the item expires; defaults
+                to `DEFAULT_TTL`.
+
+        If the key or item is None, this method does nothing.
+        Items are evicted by the policy, and removed once expired.
+        """
+        if key is None or item is None:
+            return
+
+        now = self.__now()
+        if now > self.wheel.tick:
+            self.__reap(now, self.REAP_TICKS)
+        if ttl is None:
+            ttl = self.DEFAULT_TTL
+        if ttl is None:
+            self.wheel.cancel(key)
+        elif not self.wheel.schedule(
+                key, math.ceil((self.clock() + ttl) / self.RESOLUTION)):
+            # Already expired: do not let it evict a live item
+            self.cache.delete(key)
+            return
+        self.cache.put(key, item)
+
+    def get(self, key: str) -> object:
+        """Retrieves an item from the cache by its key.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            object: The cached item, or None if the key doesn't exist,
+            has expired or if the key is None.
+        """
+        if key is None:
+            return None
+
+        now = self.__now()
+        if now > self.wheel.tick:
+            self.__reap(now, self.REAP_TICKS)
+        deadline = self.wheel.deadlines.get(key)
+        if deadline is not None and deadline <= now:
+            self.__expire(key)
+            self.misses += 1
+            return None
+        return self.cache.get(key)
+
+    def delete(self, key: str) -> object:
+        """Removes an item from the cache by its key.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            object: The removed item, or None if the key doesn't exist
+            or if the key is None.
+        """
+        if key is None:
+            return None
+        self.wheel.cancel(key)
+        return self.cache.delete(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Retrieves the items of several keys that have not expired.
+
+        Args:
+            keys (Iterable[str]): The keys for the cache items.
+
+        Returns:
+            Dict[str, object]: The live cached items by key.
+        """
+        now = self.__now()
+        if now > self.wheel.tick:
+            self.__reap(now, self.REAP_TICKS)
+        deadlines = self.wheel.deadlines
+        live = []
+        for key in keys:
+            deadline = deadlines.get(key)
+            if deadline is not None and deadline <= now:
+                self.__expire(key)
+                self.misses += 1
+            elif key is not None:
+                live.append(key)
+        return self.cache.get_many(live)
+
+    def put_many(self, items: Union[Mapping[str, object],
+                                    Iterable[Tuple[str, object]]],
+                 ttl: float = None):
+        """Adds several items sharing a time-to-live.
+
+        Args:
+            items (Mapping or Iterable): The items by key, or pairs of
+                keys and items.
+            ttl (float): The seconds before the items expire; defaults
+                to `DEFAULT_TTL`.
+        """
+        if isinstance(items, Mapping):
+            items = items.items()
+        batch = [(key, item) for key, item in items
+                 if key is not None and item is not None]
+
+        now = self.__now()
+        if now > self.wheel.tick:
+            self.__reap(now, self.REAP_TICKS)
+        if ttl is None:
+            ttl = self.DEFAULT_TTL
+        if ttl is None:
+            for key, _ in batch:
+                self.wheel.cancel(key)
+        else:
+            deadline = math.ceil((self.clock() + ttl) / self.RESOLUTION)
+            if deadline <= self.wheel.tick:
+                # Already expired: do not let them evict live items
+                self.delete_many(key for key, _ in batch)
+                return
+            for key, _ in batch:
+                self.wheel.schedule(key, deadline)
+        self.cache.put_many(batch)
+
+    def delete_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Removes the items of several keys.
+
+        Args:
+            keys (Iterable[str]): The keys for the cache items.
+
+        Returns:
+            Dict[str, object]: The removed items by key.
+        """
+        keys = [key for key in keys if key is not None]
+        for key in keys:
+            self.wheel.cancel(key)
+        return self.cache.delete_many(keys)
+
+
+class TTLBasicCache(TTLCache):
+    """Unbounded cache whose items expire."""
+
+    POLICY = BasicCache
+
+
+class TTLFIFOCache(TTLCache):
+    """FIFO cache whose items expire."""
+
+    POLICY = FIFOCache
+
+
+class TTLLIFOCache(TTLCache):
+    """LIFO cache whose items expire."""
+
+    POLICY = LIFOCache
+
+
+class TTLLRUCache(TTLCache):
+    """LRU cache whose items expire."""
+
+    POLICY = LRUCache
+
+
+class TTLMRUCache(TTLCache):
+    """MRU cache whose items expire."""
+
+    POLICY = MRUCache
+
+
+class TTLLFUCache(TTLCache):
+    """LFU cache whose items expire."""
+
+    POLICY = LFUCache
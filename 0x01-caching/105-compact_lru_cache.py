@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""Compact, array-backed LRU and MRU caching module."""
+from array import array
+from typing import Iterator, Mapping, Tuple
+from cache_stats import InstrumentedCache
+
+print_discards = __import__('eviction_listeners').print_discards
+
+
+class CompactData(Mapping):
+    """Read-only view of the items of a compact cache."""
+
+    def __init__(self, cache: 'CompactLRUCache'):
+        """Initializes the view over the slots of a cache.
+
+        Args:
+            cache (CompactLRUCache): The cache whose items are viewed.
+        """
+        self.__cache = cache
+
+    def __getitem__(self, key: str) -> object:
+        """Returns the item of a key, without marking it as used."""
+        slot = self.__cache.slot_of(key)
+        if slot < 0:
+            raise KeyError(key)
+        return self.__cache.values[slot]
+
+    def __iter__(self) -> Iterator[str]:
+        """Yields the keys from the least to the most recently used."""
+        cache = self.__cache
+        slot = cache.next[cache.capacity]
+        while slot != cache.capacity:
+            yield cache.keys[slot]
+            slot = cache.next[slot]
+
+    def __len__(self) -> int:
+        """Returns the number of items in the cache."""
+        return self.__cache.count
+
+
+class CompactLRUCache(InstrumentedCache):
+    """LRU caching system stored in preallocated arrays.
+
+    Every item takes a slot of parallel arrays holding its key, item and
+    hash. The slots are chained from the least to the most recently used
+    by integer `prev`/`next` links, the extra slot `capacity` being the
+    head of the chain, and found by key through an open-addressing table
+    of slots with linear probing. Apart from the cached keys and items,
+    no Python object is kept per item. A cache of no item caches nothing:
+    every item put is discarded at once.
+    """
+
+    EVICT_MRU = False  # Whether to evict the most recently used item
+    on_discard = staticmethod(print_discards)
+    FIBONACCI = 0x9E3779B97F4A7C15
+    WORD = (1 << 64) - 1
+
+    def __init__(self):
+        """Initializes the arrays for `MAX_ITEMS` items."""
+        super().__init__()
+        self.__allocate(self.MAX_ITEMS)
+        self.cache_data = CompactData(self)
+
+    def __allocate(self, capacity: int):
+        """Creates empty arrays for a number of items."""
+        if capacity < 0:
+            raise ValueError("MAX_ITEMS must not be negative, got {}"
+                             .format(capacity))
+        self.capacity = capacity
+        self.count = 0
+        self.keys = [None] * capacity
+        self.values = [None] * capacity
+        self.hashes = array('q', [0]) * capacity
+        # Circular chain through the head slot `capacity`
+        self.next = array('i', [capacity]) * (capacity + 1)
+        self.prev = array('i', [capacity]) * (capacity + 1)
+        self.free = -1  # First slot freed by delete, chained by `next`
+        self.top = 0  # First slot never used
+        bits = 3
+        while 1 << bits < 2 * capacity:
+            bits += 1
+        self.shift = 64 - bits
+        self.mask = (1 << bits) - 1
+        self.table = array('i', [-1]) * (1 << bits)
+
+    def __resize(self, capacity: int):
+        """Moves the items to arrays for a new number of items."""
+        items = list(self.__items())
+        self.__allocate(capacity)
+        for key, item in items:
+            self.put(key, item)
+
+    def __items(self) -> Iterator[Tuple[str, object]]:
+        """Yields the items from the least to the most recently used."""
+        slot = self.next[self.capacity]
+        while slot != self.capacity:
+            yield self.keys[slot], self.values[slot]
+            slot = self.next[slot]
+
+    def __home(self, h: int) -> int:
+        """Returns the table position a hash is first probed at."""
+        # Fibonacci hashing, so that runs of integer keys do not cluster
+        return ((h * self.FIBONACCI) & self.WORD) >> self.shift
+
+    def __probe(self, key: str, h: int) -> Tuple[int, int]:
+        """Returns the table position of a key and its slot, or -1."""
+        table, hashes, keys, mask = self.table, self.hashes, self.keys, \
+            self.mask
+        i = self.__home(h)
+        while True:
+            slot = table[i]
+            if slot < 0 or (hashes[slot] == h and keys[slot] == key):
+                return i, slot
+            i = (i + 1) & mask
+
+    def __unindex(self, i: int):
+        """Empties a table position, shifting back the keys after it."""
+        table, hashes, mask = self.table, self.hashes, self.mask
+        j = i
+        while True:
+            j = (j + 1) & mask
+            slot = table[j]
+            if slot < 0:
+                break
+            home = self.__home(hashes[slot])
+            # Move the key back unless its home lies between i and j
+            if (j - home) & mask >= (j - i) & mask:
+                table[i] = slot
+                i = j
+        table[i] = -1
+
+    def __unlink(self, slot: int):
+        """Removes a slot from the usage chain."""
+        prev, nxt = self.prev[slot], self.next[slot]
+        self.next[prev] = nxt
+        self.prev[nxt] = prev
+
+    def __append(self, slot: int):
+        """Links a slot as the most recently used."""
+        head = self.capacity
+        last = self.prev[head]
+        self.next[last] = slot
+        self.prev[slot] = last
+        self.next[slot] = head
+        self.prev[head] = slot
+
+    def __remove(self, slot: int):
+        """Frees the slot of an item."""
+        i, _ = self.__probe(self.keys[slot], self.hashes[slot])
+        self.__unindex(i)
+        self.__unlink(slot)
+        self.keys[slot] = self.values[slot] = None
+        self.next[slot] = self.free
+        self.free = slot
+        self.count -= 1
+
+    def slot_of(self, key: str) -> int:
+        """Returns the slot of a key.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            int: The slot, or -1 if the key is not cached.
+        """
+        return self.__probe(key, hash(key))[1]
+
+    def put(self, key: str, item: object):
+        """Adds an item to the cache.
+
+        Args:
+            key (str): The key for the cache item.
+            item (object): The item to cache.
+
+        If the key or item is None, this method does nothing.
+        If the cache is full, it removes the least recently used item,
+        or the most recently used with `EVICT_MRU`, and reports it to
+        `on_discard`. A cache of no item reports the item itself.
+        """
+        if key is None or item is None:
+            return
+        if self.capacity != self.MAX_ITEMS:
+            self.__resize(self.MAX_ITEMS)
+
+        h = hash(key)
+        i, slot = self.__probe(key, h)
+        self.puts += 1
+        if slot >= 0:
+            self.updates += 1
+            self.values[slot] = item
+            self.__unlink(slot)
+            self.__append(slot)
+            return
+
+        if not self.capacity:
+            self.evicted("size")
+            if self.on_discard is not None:
+                self.on_discard([(key, item)])
+            return
+
+        if self.count >= self.capacity:
+            head = self.capacity
+            victim = self.prev[head] if self.EVICT_MRU else self.next[head]
+            evicted = [(self.keys[victim], self.values[victim])]
+            self.__remove(victim)
+            self.evicted("size")
+            if self.on_discard is not None:
+                self.on_discard(evicted)
+            # Removing the victim may have shifted the position of `key`
+            i, _ = self.__probe(key, h)
+
+        if self.free >= 0:
+            slot = self.free
+            self.free = self.next[slot]
+        else:
+            slot = self.top
+            self.top += 1
+        self.keys[slot] = key
+        self.values[slot] = item
+        self.hashes[slot] = h
+        self.table[i] = slot
+        self.__append(slot)
+        self.count += 1
+
+    def get(self, key: str) -> object:
+        """Retrieves an item from the cache by its key.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            object: The cached item, or None if the key doesn't exist
+            or if the key is None.
+        """
+        if key is None:
+            return None
+
+        # The probe and relinking are inlined: this is the hot path
+        h = hash(key)
+        table, hashes, keys = self.table, self.hashes, self.keys
+        i = ((h * self.FIBONACCI) & self.WORD) >> self.shift
+        while True:
+            slot = table[i]
+            if slot < 0:
+                self.misses += 1
+                return None
+            if hashes[slot] == h and keys[slot] == key:
+                break
+            i = (i + 1) & self.mask
+        self.hits += 1
+
+        # Mark the key as the most recently used
+        prev, nxt, head = self.prev, self.next, self.capacity
+        last = prev[head]
+        if last != slot:
+            before, after = prev[slot], nxt[slot]
+            nxt[before] = after
+            prev[after] = before
+            nxt[last] = slot
+            prev[slot] = last
+            nxt[slot] = head
+            prev[head] = slot
+        return self.values[slot]
+
+    def delete(self, key: str) -> object:
+        """Removes an item from the cache by its key.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            object: The removed item, or None if the key doesn't exist
+            or if the key is None.
+        """
+        if key is None:
+            return None
+
+        slot = self.slot_of(key)
+        if slot < 0:
+            return None
+        item = self.values[slot]
+        self.__remove(slot)
+        return item
+
+
+class CompactMRUCache(CompactLRUCache):
+    """MRU caching system stored in preallocated arrays."""
+
+    EVICT_MRU = True
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""Two-tier caching module."""
+import threading
+from typing import Dict, Iterable, List, Tuple, Type
+from cache_stats import InstrumentedCache, merge_counters
+from tiered_store import Items, MemoryStore, Store, pairs
+
+size_of = __import__('bounded_cache').size_of
+print_discards = __import__('eviction_listeners').print_discards
+LRUCache = __import__('3-lru_cache').LRUCache
+LFUCache = __import__('100-lfu_cache').LFUCache
+
+
+class TieredCache(InstrumentedCache):
+    """Cache of the `POLICY` class in front of a shared store.
+
+    The first tier is a private `POLICY` cache of `MAX_ITEMS` items, the
+    second a `Store` shared with other caches, such as the caches of the
+    other workers of a service. Reads are served by the first tier, and
+    its misses by the store, whose items are then kept in the first
+    tier. Writes and deletes go to the store first, which invalidates
+    the copies held by every other cache sharing it.
+    A copy is only kept if no invalidation arrived while it was read
+    from or written to the store, so a late reply never brings back an
+    item another cache has changed since.
+    While the store may not deliver invalidations, such as when its
+    connection dropped, the first tier is emptied and bypassed.
+    """
+
+    POLICY = LRUCache  # type: Type[InstrumentedCache]
+    MAX_WEIGHT = None
+    weigher = staticmethod(size_of)
+    on_discard = staticmethod(print_discards)
+
+    def __init__(self, store: Store = None):
+        """Initializes the first tier and subscribes to the store.
+
+        Args:
+            store (Store): The shared store; defaults to a new store of
+                this process.
+        """
+        super().__init__()
+        self.store = store if store is not None else MemoryStore()
+        self.cache = self.POLICY()
+        self.cache.MAX_ITEMS = self.MAX_ITEMS
+        if self.MAX_WEIGHT is not None:
+            self.cache.MAX_WEIGHT = self.MAX_WEIGHT
+        self.cache.weigher = self.weigher
+        self.cache.on_discard = self.on_discard
+        self.cache_data = self.cache.cache_data
+        self.lock = threading.Lock()
+        self.generation = 0  # Number of invalidations received
+        self.subscribed = True  # Whether invalidations are delivered
+        self.remote_hits = 0
+        self.remote_misses = 0
+        self.store.subscribe(self.__invalidate, self.__reset)
+
+    def __len__(self) -> int:
+        """Returns the number of items in the first tier."""
+        return len(self.cache_data)
+
+    @property
+    def weight(self) -> int:
+        """Returns the total weight of the items in the first tier."""
+        return getattr(self.cache, "weight", 0)
+
+    def __invalidate(self, keys: List[str]):
+        """Drops the copies of keys another cache changed."""
+        with self.lock:
+            self.generation += 1
+            removed = self.cache.delete_many(keys)
+            if removed:
+                self.evicted("invalidated", len(removed))
+
+    def __reset(self, subscribed: bool):
+        """Empties the first tier when invalidations stop or resume."""
+        with self.lock:
+            self.generation += 1
+            self.subscribed = subscribed
+            removed = self.cache.delete_many(list(self.cache_data))
+            if removed:
+                self.evicted("invalidated", len(removed))
+
+    def __keep(self, items: List[Tuple[str, object]], generation: int):
+        """Copies items from the store into the first tier.
+
+        If an invalidation arrived since `generation`, the items may be
+        out of date: any copy of their keys is dropped instead. Nothing
+        is kept while invalidations are not delivered.
+        """
+        with self.lock:
+            if self.generation == generation and self.subscribed:
+                self.cache.put_many(items)
+            else:
+                self.cache.delete_many(key for key, _ in items)
+
+    def put(self, key: str, item: object):
+        """Adds an item to the store and the first tier.
+
+        Args:
+            key (str): The key for the cache item.
+            item (object): The item to cache.
+
+        If the key or item is None, this method does nothing.
+        """
+        if key is None or item is None:
+            return
+        self.put_many([(key, item)])
+
+    def get(self, key: str) -> object:
+        """Retrieves an item from the first tier, or else the store.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            object: The cached item, or None if the key doesn't exist
+            or if the key is None.
+        """
+        if key is None:
+            return None
+        with self.lock:
+            item = self.cache.get(key)
+            generation = self.generation
+        if item is not None:
+            return item
+        return self.__fetch([key], generation).get(key)
+
+    def __fetch(self, keys: List[str], generation: int
+                ) -> Dict[str, object]:
+        """Looks up in the store keys the first tier missed."""
+        found = self.store.get_many(keys)
+        self.__keep(list(found.items()), generation)
+        with self.lock:
+            self.remote_hits += len(found)
+            self.remote_misses += len(keys) - len(found)
+        return found
+
+    def delete(self, key: str) -> object:
+        """Removes an item from the store and the first tier.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            object: The item removed from the first tier, or None if it
+            was not there or if the key is None.
+        """
+        if key is None:
+            return None
+        return self.delete_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Retrieves several items, looking the misses up in one batch.
+
+        Args:
+            keys (Iterable[str]): The keys for the cache items.
+
+        Returns:
+            Dict[str, object]: The cached items by key; keys that don't
+            exist are left out.
+        """
+        keys = [key for key in keys if key is not None]
+        with self.lock:
+            found = self.cache.get_many(keys)
+            generation = self.generation
+        missing = list(dict.fromkeys(key for key in keys
+                                     if key not in found))
+        if missing:
+            found.update(self.__fetch(missing, generation))
+        return found
+
+    def put_many(self, items: Items):
+        """Adds several items to the store and the first tier.
+
+        Args:
+            items (Mapping or Iterable): The items by key, or pairs of
+                keys and items.
+        """
+        batch = pairs(items)
+        if not batch:
+            return
+        with self.lock:
+            generation = self.generation
+        self.store.put_many(batch)
+        self.__keep(batch, generation)
+
+    def delete_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Removes several items from the store and the first tier.
+
+        Args:
+            keys (Iterable[str]): The keys for the cache items.
+
+        Returns:
+            Dict[str, object]: The items removed from the first tier.
+        """
+        keys = [key for key in keys if key is not None]
+        self.store.delete_many(keys)
+        with self.lock:
+            return self.cache.delete_many(keys)
+
+    def counters(self) -> dict:
+        """Returns the operation counters of the first tier.
+
+        Returns:
+            dict: The counters, with the copies dropped on invalidation.
+        """
+        with self.lock:
+            return merge_counters([super().counters(),
+                                   self.cache.counters()])
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the statistics of the cache.
+
+        Returns:
+            dict: The statistics of the first tier, with the hits and
+            misses of its lookups in the store.
+        """
+        stats = super().stats()
+        stats["remote_hits"] = self.remote_hits
+        stats["remote_misses"] = self.remote_misses
+        return stats
+
+    def close(self):
+        """Releases the store."""
+        self.store.close()
+
+
+class TieredLRUCache(TieredCache):
+    """LRU cache in front of a shared store."""
+
+    POLICY = LRUCache
+
+
+class TieredLFUCache(TieredCache):
+    """LFU cache in front of a shared store."""
+
+    POLICY = LFUCache
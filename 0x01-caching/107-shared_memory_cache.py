@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""Shared memory caching module."""
+import hashlib
+import multiprocessing
+import pickle
+import struct
+from multiprocessing import shared_memory
+from typing import Iterator, Mapping, Optional, Tuple
+from cache_stats import InstrumentedCache
+
+print_discards = __import__('eviction_listeners').print_discards
+
+
+class SharedData(Mapping):
+    """Read-only view of the items of a shared memory cache."""
+
+    def __init__(self, cache: 'SharedMemoryCache'):
+        """Initializes the view over the segment of a cache.
+
+        Args:
+            cache (SharedMemoryCache): The cache whose items are viewed.
+        """
+        self.__cache = cache
+
+    def __getitem__(self, key: str) -> object:
+        """Returns the item of a key, without marking it as used."""
+        item = self.__cache.lookup(key, touch=False)
+        if item is None:
+            raise KeyError(key)
+        return item
+
+    def __iter__(self) -> Iterator[str]:
+        """Yields the keys in slot order."""
+        for _, key, _ in self.__cache.slots():
+            yield key
+
+    def __len__(self) -> int:
+        """Returns the number of items in the cache."""
+        return self.__cache.count
+
+
+class SharedMemoryCache(InstrumentedCache):
+    """CLOCK caching system stored in a shared memory segment.
+
+    Every process opening the segment shares a single copy of the
+    items. The segment holds a header, an open-addressing table of slot
+    numbers and `MAX_ITEMS` slots of `SLOT_SIZE` bytes, each storing the
+    pickled key and item of an entry. Keys are hashed with BLAKE2, since
+    `hash` differs between processes.
+    Writes are serialized by a lock shared between the processes. Reads
+    take no lock: every slot has a version, odd while it is written,
+    and a read is retried when the version moved under it. A slot still
+    odd under the lock was left by a writer that died: it is dropped.
+    When the cache is full, a CLOCK hand sweeps the slots, clearing the
+    bits set by reads, and evicts the first entry not read since it last
+    passed, an approximation of the least recently used one.
+    """
+
+    SLOT_SIZE = 256
+    RETRIES = 8  # Lock-free read attempts before reading under the lock
+    PROTOCOL = 4  # Pickle protocol of the keys, whose bytes are compared
+    MAGIC = 0x434C4B31
+    HEADER = struct.Struct("<IIIIII")  # magic, slots, slot size, table
+    #                                    size, hand, count
+    ENTRY = struct.Struct("<IqBxHI")  # version, hash, referenced, key
+    #                                   length, item length
+    FIBONACCI = 0x9E3779B97F4A7C15
+    WORD = (1 << 64) - 1
+    on_discard = staticmethod(print_discards)
+
+    def __init__(self, name: str = None, create: bool = True,
+                 lock=None):
+        """Creates or opens the shared memory segment of the cache.
+
+        Args:
+            name (str): The name of the segment; a new segment gets a
+                random name by default.
+            create (bool): Whether to create the segment, sized for
+                `MAX_ITEMS` items, rather than open an existing one.
+            lock (multiprocessing.Lock): The lock serializing the
+                writes of every process; a new lock is created by
+                default, to be inherited by forked workers. Every
+                process writing to the segment must use the same lock.
+        """
+        super().__init__()
+        self.lock = lock if lock is not None else multiprocessing.Lock()
+        if create:
+            capacity, size = self.MAX_ITEMS, self.SLOT_SIZE
+            table = 8
+            while table < 2 * capacity:
+                table *= 2
+            self.shm = shared_memory.SharedMemory(
+                name, create=True, size=self.HEADER.size + 4 * table +
+                capacity * size)
+            self.HEADER.pack_into(self.shm.buf, 0, self.MAGIC, capacity,
+                                  size, table, 0, 0)
+            self.shm.buf[self.HEADER.size:self.HEADER.size + 4 * table] = \
+                b"\xff" * (4 * table)
+        else:
+            self.shm = shared_memory.SharedMemory(name)
+            self.__untrack()
+            magic, capacity, size, table, _, _ = self.HEADER.unpack_from(
+                self.shm.buf, 0)
+            if magic != self.MAGIC:
+                raise ValueError("{} is not a cache segment".format(name))
+        self.name = self.shm.name
+        self.capacity, self.slot_size = capacity, size
+        self.MAX_ITEMS = capacity
+        self.mask = table - 1
+        self.shift = 64 - table.bit_length() + 1
+        self.buf = self.shm.buf
+        self.table = self.buf[self.HEADER.size:
+                              self.HEADER.size + 4 * table].cast("i")
+        self.base = self.HEADER.size + 4 * table
+        self.cache_data = SharedData(self)
+
+    def __untrack(self):
+        """Stops this process from unlinking a segment it only opened.
+
+        The resource tracker of a process unlinks on exit every segment
+        the process opened, not only the ones it created. Processes
+        started by multiprocessing share the tracker of their parent,
+        and are left alone.
+        """
+        if multiprocessing.parent_process() is not None:
+            return
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+        except (ImportError, AttributeError, KeyError):
+            pass
+
+    @property
+    def count(self) -> int:
+        """Returns the number of cached items."""
+        return self.HEADER.unpack_from(self.buf, 0)[5]
+
+    def __len__(self) -> int:
+        """Returns the number of cached items."""
+        return self.count
+
+    def __key_hash(self, key: str) -> Tuple[bytes, int]:
+        """Returns the pickled key and its hash, the same in every
+        process."""
+        data = pickle.dumps(key, self.PROTOCOL)
+        digest = hashlib.blake2b(data, digest_size=8).digest()
+        return data, int.from_bytes(digest, "little", signed=True)
+
+    def __home(self, h: int) -> int:
+        """Returns the table position a hash is first probed at."""
+        return ((h * self.FIBONACCI) & self.WORD) >> self.shift
+
+    def __offset(self, slot: int) -> int:
+        """Returns the offset of a slot in the segment."""
+        return self.base + slot * self.slot_size
+
+    def __read(self, slot: int, data: bytes, h: int) -> Optional[bytes]:
+        """Returns the pickled item of a slot if it holds the key.
+
+        Returns:
+            bytes: The pickled item, None if the slot holds another key,
+            or False if it was being written.
+        """
+        buf, offset = self.buf, self.__offset(slot)
+        version, slot_hash, _, key_size, item_size = \
+            self.ENTRY.unpack_from(buf, offset)
+        if version & 1:
+            return False
+        if slot_hash != h or key_size != len(data):
+            return None
+        start = offset + self.ENTRY.size
+        if buf[start:start + key_size] != data:
+            return None
+        item = bytes(buf[start + key_size:start + key_size + item_size])
+        if self.ENTRY.unpack_from(buf, offset)[0] != version:
+            return False
+        return item
+
+    def __find(self, data: bytes, h: int
+               ) -> Tuple[int, int, Optional[bytes]]:
+        """Probes the table for a key.
+
+        Must be called under the lock.
+
+        Returns:
+            tuple: The table position of the key, or of the empty entry
+            ending the probe, its slot or -1, and its pickled item or
+            None.
+        """
+        table, mask = self.table, self.mask
+        i = self.__home(h)
+        while True:
+            slot = table[i]
+            if slot < 0:
+                return i, -1, None
+            item = self.__read(slot, data, h)
+            if item is False:
+                # Only probed under the lock: its writer died mid-write.
+                # Drop the slot, whose next key moved back to position i
+                self.__unindex(i)
+                self.__clear(slot)
+                hand, count = self.__header()
+                self.__set_header(hand, count - 1)
+                continue
+            if item is not None:
+                return i, slot, item
+            i = (i + 1) & mask
+
+    def __probe(self, data: bytes, h: int, touch: bool
+                ) -> Optional[bytes]:
+        """Returns the pickled item of a key, None if it is not cached,
+        or False if a slot was being written."""
+        # `__find` and `__read`, inlined: this is the hot path
+        buf, table, entry = self.buf, self.table, self.ENTRY
+        base, size, mask = self.base, self.slot_size, self.mask
+        i = ((h * self.FIBONACCI) & self.WORD) >> self.shift
+        while True:
+            slot = table[i]
+            if slot < 0:
+                return None
+            offset = base + slot * size
+            version, slot_hash, referenced, key_size, item_size = \
+                entry.unpack_from(buf, offset)
+            if version & 1:
+                return False
+            if slot_hash == h and key_size == len(data):
+                start = offset + entry.size
+                raw = buf[start:start + key_size + item_size].tobytes()
+                if raw.startswith(data):
+                    if entry.unpack_from(buf, offset)[0] != version:
+                        return False
+                    if touch and not referenced:
+                        buf[offset + 12] = 1
+                    return raw[key_size:]
+            i = (i + 1) & mask
+
+    def lookup(self, key: str, touch: bool = True) -> object:
+        """Finds the item of a key, without locking.
+
+        Args:
+            key (str): The key for the cache item.
+            touch (bool): Whether to mark the item as recently used.
+
+        Returns:
+            object: The cached item, or None if the key is not cached.
+        """
+        data, h = self.__key_hash(key)
+        for _ in range(self.RETRIES):
+            item = self.__probe(data, h, touch)
+            if item is not False:
+                break
+        else:
+            with self.lock:
+                _, slot, item = self.__find(data, h)
+                if touch and slot >= 0:
+                    self.buf[self.__offset(slot) + 12] = 1
+        return None if item is None else pickle.loads(item)
+
+    def slots(self) -> Iterator[Tuple[int, str, object]]:
+        """Yields the used slots with their key and item.
+
+        Every slot is read as `lookup` reads: its key and item are those
+        of a single write.
+
+        Yields:
+            tuple: The slot, its key and its item.
+        """
+        for slot in range(self.capacity):
+            for _ in range(self.RETRIES):
+                entry = self.__entry(slot)
+                if entry is not False:
+                    break
+            else:
+                with self.lock:
+                    entry = self.__entry(slot)
+            if entry:
+                yield (slot,) + entry
+
+    def __entry(self, slot: int) -> Optional[Tuple[str, object]]:
+        """Returns the key and item of a slot, None if it is empty, or
+        False if it was being written."""
+        buf, offset = self.buf, self.__offset(slot)
+        version, _, _, key_size, item_size = \
+            self.ENTRY.unpack_from(buf, offset)
+        if version & 1:
+            return False
+        if not key_size:
+            return None
+        start = offset + self.ENTRY.size
+        raw = buf[start:start + key_size + item_size].tobytes()
+        if self.ENTRY.unpack_from(buf, offset)[0] != version:
+            return False
+        return pickle.loads(raw[:key_size]), pickle.loads(raw[key_size:])
+
+    def print_cache(self):
+        """Prints the items of the cache, each read as a whole."""
+        items = {key: item for _, key, item in self.slots()}
+        print("Current cache:")
+        for key in sorted(items):
+            print("{}: {}".format(key, items[key]))
+
+    def __header(self) -> Tuple[int, int]:
+        """Returns the CLOCK hand and the number of items."""
+        return self.HEADER.unpack_from(self.buf, 0)[4:]
+
+    def __set_header(self, hand: int, count: int):
+        """Saves the CLOCK hand and the number of items."""
+        struct.pack_into("<II", self.buf, 16, hand, count)
+
+    def __write(self, slot: int, h: int, data: bytes, item: bytes,
+                referenced: int):
+        """Writes an entry in a slot, bumping its version around it."""
+        buf, offset = self.buf, self.__offset(slot)
+        version = self.ENTRY.unpack_from(buf, offset)[0] + 1
+        struct.pack_into("<I", buf, offset, version)
+        start = offset + self.ENTRY.size
+        buf[start:start + len(data)] = data
+        buf[start + len(data):start + len(data) + len(item)] = item
+        self.ENTRY.pack_into(buf, offset, version + 1, h, referenced,
+                             len(data), len(item))
+
+    def __clear(self, slot: int):
+        """Empties a slot, bumping its version to an even one."""
+        buf, offset = self.buf, self.__offset(slot)
+        version = self.ENTRY.unpack_from(buf, offset)[0]
+        self.ENTRY.pack_into(buf, offset, (version | 1) + 1, 0, 0, 0, 0)
+
+    def __unindex(self, i: int):
+        """Empties a table position, shifting back the keys after it."""
+        table, mask = self.table, self.mask
+        j = i
+        while True:
+            j = (j + 1) & mask
+            slot = table[j]
+            if slot < 0:
+                break
+            home = self.__home(self.ENTRY.unpack_from(
+                self.buf, self.__offset(slot))[1])
+            # Move the key back unless its home lies between i and j
+            if (j - home) & mask >= (j - i) & mask:
+                table[i] = slot
+                i = j
+        table[i] = -1
+
+    def __evict(self, slot: int):
+        """Removes the entry of a slot from the table and the slot."""
+        offset = self.__offset(slot)
+        _, h, _, key_size, item_size = self.ENTRY.unpack_from(
+            self.buf, offset)
+        start = offset + self.ENTRY.size
+        data = bytes(self.buf[start:start + key_size])
+        i, _, _ = self.__find(data, h)
+        self.__unindex(i)
+        evicted = None
+        if self.on_discard is not None:
+            evicted = (pickle.loads(data), pickle.loads(bytes(
+                self.buf[start + key_size:start + key_size + item_size])))
+        self.__clear(slot)
+        return evicted
+
+    def __free_slot(self) -> int:
+        """Returns an empty slot, evicting an entry if the cache is full.
+        """
+        hand, count = self.__header()
+        evicted = None
+        while True:
+            slot, hand = hand, (hand + 1) % self.capacity
+            offset = self.__offset(slot)
+            if not self.ENTRY.unpack_from(self.buf, offset)[3]:
+                break
+            if count < self.capacity:
+                continue
+            if self.buf[offset + 12]:
+                # Read since the hand last passed: give it another round
+                self.buf[offset + 12] = 0
+                continue
+            evicted = self.__evict(slot)
+            count -= 1
+            self.evicted("size")
+            break
+        self.__set_header(hand, count)
+        if evicted is not None:
+            self.on_discard([evicted])
+        return slot
+
+    def put(self, key: str, item: object):
+        """Adds an item to the cache.
+
+        Args:
+            key (str): The key for the cache item.
+            item (object): The item to cache.
+
+        If the key or item is None, this method does nothing. An item
+        whose pickled key and item do not fit in a slot is not cached.
+        If the cache is full, the CLOCK hand evicts an item not read
+        lately and reports it to `on_discard`.
+        """
+        if key is None or item is None:
+            return
+
+        data, h = self.__key_hash(key)
+        pickled = pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            i, slot, _ = self.__find(data, h)
+            if self.ENTRY.size + len(data) + len(pickled) > self.slot_size:
+                # Too large: do not leave the previous item behind
+                if slot >= 0:
+                    self.__unindex(i)
+                    self.__clear(slot)
+                    hand, count = self.__header()
+                    self.__set_header(hand, count - 1)
+                self.evicted("oversize")
+                return
+            self.puts += 1
+            if slot >= 0:
+                self.updates += 1
+                self.__write(slot, h, data, pickled, 1)
+                return
+            slot = self.__free_slot()
+            self.__write(slot, h, data, pickled, 0)
+            # Evicting may have shifted the probe of the key
+            i, _, _ = self.__find(data, h)
+            self.table[i] = slot
+            hand, count = self.__header()
+            self.__set_header(hand, count + 1)
+
+    def get(self, key: str) -> object:
+        """Retrieves an item from the cache by its key, without locking.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            object: The cached item, or None if the key doesn't exist
+            or if the key is None.
+        """
+        if key is None:
+            return None
+        item = self.lookup(key)
+        if item is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return item
+
+    def delete(self, key: str) -> object:
+        """Removes an item from the cache by its key.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            object: The removed item, or None if the key doesn't exist
+            or if the key is None.
+        """
+        if key is None:
+            return None
+
+        data, h = self.__key_hash(key)
+        with self.lock:
+            i, slot, item = self.__find(data, h)
+            if slot < 0:
+                return None
+            self.__unindex(i)
+            self.__clear(slot)
+            hand, count = self.__header()
+            self.__set_header(hand, count - 1)
+        return pickle.loads(item)
+
+    def close(self):
+        """Detaches this process from the segment."""
+        self.__release()
+        self.shm.close()
+
+    def __release(self):
+        """Releases the views of the segment, so that it can be closed."""
+        table = getattr(self, "table", None)
+        if table is not None:
+            table.release()
+            self.table = self.buf = None
+
+    def __del__(self):
+        """Releases the views of the segment before it is closed."""
+        self.__release()
+
+    def unlink(self):
+        """Destroys the segment, once every process has closed it."""
+        self.shm.unlink()
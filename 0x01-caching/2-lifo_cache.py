@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 """Last-In First-Out caching module."""
 from collections import OrderedDict
-from base_caching import BaseCaching
+from itertools import islice
+from typing import Dict, Iterable, List
 
+BoundedCache = __import__('bounded_cache').BoundedCache
 
-class LIFOCache(BaseCaching):
+
+class LIFOCache(BoundedCache):
     """LIFO caching system with a limited size.
 
     This class implements a LIFO cache that stores items in an
@@ -25,18 +28,30 @@ class LIFOCache(BaseCaching):
             item (object): The item to cache.
 
         If the key or item is None, this method does nothing.
-        If the number of items in the cache exceeds `MAX_ITEMS`,
-        the most recently added item (LIFO) is discarded.
+        If the number of items in the cache exceeds `MAX_ITEMS`, or
+        their weight exceeds `MAX_WEIGHT`, the most recently added
+        items (LIFO) are discarded.
         """
         if key is None or item is None:
             return
 
-        if key not in self.cache_data and len(self.cache_data) >= BaseCaching.MAX_ITEMS:
-            # Remove the most recently added item (LIFO)
-            last_key, _ = self.cache_data.popitem(last=True)
-            print("DISCARD:", last_key)
+        weight = self.admit(key, item)
+        if weight is None:
+            return
+
+        # Putting a key again makes it the most recently added
+        if key in self.cache_data:
+            self.cache_data.move_to_end(key)
 
-        self.cache_data[key] = item
+        # Until the item fits, remove the most recently added item (LIFO)
+        while self.full(key, weight):
+            keys = reversed(self.cache_data)
+            last_key = next(keys)
+            if last_key == key:
+                last_key = next(keys)
+            self.discard(last_key)
+
+        self.store(key, item, weight)
 
     def get(self, key: str) -> object:
         """Retrieves an item from the cache by its key.
@@ -50,4 +65,42 @@ class LIFOCache(BaseCaching):
         """
         if key is None:
             return None
-        return self.cache_data.get(key)
+        item = self.cache_data.get(key)
+        if item is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return item
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Retrieves the items of several keys in a single pass.
+
+        Args:
+            keys (Iterable[str]): The keys for the cache items.
+
+        Returns:
+            Dict[str, object]: The cached items by key; keys that don't
+            exist are left out.
+        """
+        keys, data = list(keys), self.cache_data
+        return self.counted(
+            {key: data[key] for key in keys if key in data}, keys)
+
+    def victims(self, count: int) -> List[str]:
+        """Returns the `count` most recently added keys.
+
+        Args:
+            count (int): The number of keys to discard.
+
+        Returns:
+            List[str]: The keys, in eviction order.
+        """
+        return list(islice(reversed(self.cache_data), max(count, 0)))
+
+    def restored(self, key: str, uses: int):
+        """Leaves a restored key last, as the next item to evict.
+
+        Args:
+            key (str): The key for the cache item.
+            uses (int): The number of uses counted for the key.
+        """
@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 """Least Recently Used caching module."""
 from collections import OrderedDict
-from base_caching import BaseCaching
+from itertools import islice
+from typing import Dict, Iterable, List
 
+BoundedCache = __import__('bounded_cache').BoundedCache
 
-class LRUCache(BaseCaching):
+
+class LRUCache(BoundedCache):
     """LRU caching system with a limited size.
 
     This class implements an LRU cache that stores items in an
@@ -25,21 +28,31 @@ class LRUCache(BaseCaching):
             item (object): The item to cache.
 
         If the key or item is None, this method does nothing.
-        If the cache exceeds `MAX_ITEMS`, it removes the least
-        recently used item and prints "DISCARD:" with the discarded key.
+        If the cache exceeds `MAX_ITEMS`, or its weight `MAX_WEIGHT`,
+        it removes the least recently used items and reports them to
+        `on_discard`, which prints "DISCARD:" with their keys by default.
         """
         if key is None or item is None:
             return
 
-        # If the cache already contains the key, update it
+        weight = self.admit(key, item)
+        if weight is None:
+            return
+
+        # If the cache already contains the key, mark it as recently used
         if key in self.cache_data:
-            self.cache_data.move_to_end(key, last=False)
-        else:
-            # If the cache limit is reached, discard the least recently used item (LRU)
-            if len(self.cache_data) >= BaseCaching.MAX_ITEMS:
-                lru_key, _ = self.cache_data.popitem(last=False)
-                print("DISCARD:", lru_key)
-            self.cache_data[key] = item
+            self.cache_data.move_to_end(key)
+
+        # Until the item fits, discard the least recently used item,
+        # kept at the front
+        while self.full(key, weight):
+            keys = iter(self.cache_data)
+            lru_key = next(keys)
+            if lru_key == key:
+                lru_key = next(keys)
+            self.discard(lru_key)
+
+        self.store(key, item, weight)
 
     def get(self, key: str) -> object:
         """Retrieves an item from the cache by its key.
@@ -56,6 +69,55 @@ class LRUCache(BaseCaching):
 
         # If the key exists, mark it as recently used
         if key in self.cache_data:
-            self.cache_data.move_to_end(key, last=False)
-        
+            self.cache_data.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+
         return self.cache_data.get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Retrieves the items of several keys in a single pass.
+
+        The keys are marked as recently used in the order given.
+
+        Args:
+            keys (Iterable[str]): The keys for the cache items.
+
+        Returns:
+            Dict[str, object]: The cached items by key; keys that don't
+            exist are left out.
+        """
+        data = self.cache_data
+        found = {}
+        hits = misses = 0
+        for key in keys:
+            if key in data:
+                data.move_to_end(key)
+                found[key] = data[key]
+                hits += 1
+            else:
+                misses += 1
+        self.hits += hits
+        self.misses += misses
+        return found
+
+    def victims(self, count: int) -> List[str]:
+        """Returns the `count` least recently used keys.
+
+        Args:
+            count (int): The number of keys to discard.
+
+        Returns:
+            List[str]: The keys, in eviction order.
+        """
+        return list(islice(self.cache_data, max(count, 0)))
+
+    def restored(self, key: str, uses: int):
+        """Places a restored key first, as the next item to evict.
+
+        Args:
+            key (str): The key for the cache item.
+            uses (int): The number of uses counted for the key.
+        """
+        self.cache_data.move_to_end(key, last=False)
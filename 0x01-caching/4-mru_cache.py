@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 """Most Recently Used caching module."""
 from collections import OrderedDict
-from base_caching import BaseCaching
+from itertools import islice
+from typing import Dict, Iterable, List
 
+BoundedCache = __import__('bounded_cache').BoundedCache
 
-class MRUCache(BaseCaching):
+
+class MRUCache(BoundedCache):
     """MRU caching system with a limited size.
 
     This class implements an MRU cache that stores items in an
@@ -25,19 +28,27 @@ class MRUCache(BaseCaching):
             item (object): The item to cache.
 
         If the key or item is None, this method does nothing.
-        If the cache limit is reached, it removes the most recently
-        used item and prints "DISCARD:" with the discarded key.
+        If the cache limit is reached, in items or in `MAX_WEIGHT`,
+        it removes the most recently used items and reports them to
+        `on_discard`, which prints "DISCARD:" with their keys by default.
         """
         if key is None or item is None:
             return
 
-        if key not in self.cache_data and len(self.cache_data) >= BaseCaching.MAX_ITEMS:
-            # Discard the most recently used item (MRU)
-            mru_key, _ = self.cache_data.popitem(last=True)
-            print("DISCARD:", mru_key)
+        weight = self.admit(key, item)
+        if weight is None:
+            return
+
+        # Until the item fits, discard the most recently used item (MRU)
+        while self.full(key, weight):
+            keys = reversed(self.cache_data)
+            mru_key = next(keys)
+            if mru_key == key:
+                mru_key = next(keys)
+            self.discard(mru_key)
 
         # Add the new item and mark it as most recently used
-        self.cache_data[key] = item
+        self.store(key, item, weight)
         self.cache_data.move_to_end(key, last=True)
 
     def get(self, key: str) -> object:
@@ -56,5 +67,53 @@ class MRUCache(BaseCaching):
         # If the key exists, mark it as most recently used
         if key in self.cache_data:
             self.cache_data.move_to_end(key, last=True)
+            self.hits += 1
+        else:
+            self.misses += 1
 
         return self.cache_data.get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Retrieves the items of several keys in a single pass.
+
+        The keys are marked as most recently used in the order given.
+
+        Args:
+            keys (Iterable[str]): The keys for the cache items.
+
+        Returns:
+            Dict[str, object]: The cached items by key; keys that don't
+            exist are left out.
+        """
+        data = self.cache_data
+        found = {}
+        hits = misses = 0
+        for key in keys:
+            if key in data:
+                data.move_to_end(key)
+                found[key] = data[key]
+                hits += 1
+            else:
+                misses += 1
+        self.hits += hits
+        self.misses += misses
+        return found
+
+    def victims(self, count: int) -> List[str]:
+        """Returns the `count` most recently used keys.
+
+        Args:
+            count (int): The number of keys to discard.
+
+        Returns:
+            List[str]: The keys, in eviction order.
+        """
+        return list(islice(reversed(self.cache_data), max(count, 0)))
+
+    def restored(self, key: str, uses: int):
+        """Leaves a restored key last, as the next item to evict.
+
+        Args:
+            key (str): The key for the cache item.
+            uses (int): The number of uses counted for the key.
+        """
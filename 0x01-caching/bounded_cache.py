@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""Item count and weight bounded caching module.
+"""
+import sys
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+from cache_stats import InstrumentedCache
+from eviction_listeners import print_discards
+
+
+def size_of(key: str, item: object) -> int:
+    """Weighs an item by its shallow size in memory.
+
+    Args:
+        key (str): The key for the cache item.
+        item (object): The cached item.
+
+    Returns:
+        int: The size of the item object, in bytes.
+    """
+    return sys.getsizeof(item)
+
+
+def length_of(key: str, item: object) -> int:
+    """Weighs an item by its length, such as the bytes of a payload.
+
+    Args:
+        key (str): The key for the cache item.
+        item (object): The cached item.
+
+    Returns:
+        int: The length of the item, or its size if it has none.
+    """
+    try:
+        return len(item)
+    except TypeError:
+        return sys.getsizeof(item)
+
+
+class BoundedCache(InstrumentedCache):
+    """Base of the caches bounded by item count and, optionally, weight.
+
+    Besides keeping at most `MAX_ITEMS` items, a cache with a
+    `MAX_WEIGHT` weighs every item put with `weigher`, and discards as
+    many items as its policy requires for their total weight to stay
+    within it; an item heavier than `MAX_WEIGHT` alone is not cached.
+    Without a `MAX_WEIGHT` items are not weighed, and a `MAX_WEIGHT` of
+    float("inf") tracks the weight without bounding it.
+    Discarded items are reported to the `on_discard` listener, which
+    prints them by default.
+    """
+
+    MAX_WEIGHT = None
+    weigher = staticmethod(size_of)
+    on_discard = staticmethod(print_discards)
+
+    def __init__(self):
+        """Initializes the cache and the weight of its items."""
+        super().__init__()
+        self.weights = {}  # type: Dict[str, int]
+        self.weight = 0  # Total weight of the cached items
+        self.pending = None  # Items discarded by the current batch
+        self.cause = "size"  # Reason for the evictions under way
+
+    def __len__(self) -> int:
+        """Returns the number of cached items."""
+        return len(self.cache_data)
+
+    def admit(self, key: str, item: object) -> Optional[int]:
+        """Weighs an item about to be put.
+
+        Args:
+            key (str): The key for the cache item.
+            item (object): The item to cache.
+
+        Returns:
+            int: The weight of the item, 0 if weights are not tracked,
+            or None if the item is too heavy to be cached, in which case
+            any previous item of the key is removed.
+        """
+        if self.MAX_WEIGHT is None:
+            return 0
+        weight = self.weigher(key, item)
+        if weight > self.MAX_WEIGHT:
+            self.delete(key)
+            self.evicted("oversize")
+            return None
+        return weight
+
+    def full(self, key: str, weight: int) -> bool:
+        """Returns whether an item must be made room for.
+
+        Args:
+            key (str): The key for the cache item.
+            weight (int): The weight of the item.
+
+        Returns:
+            bool: True while an item other than the one of `key` must
+            be discarded to store the item, the limit reached being
+            then kept in `cause`.
+        """
+        others = len(self.cache_data) - (key in self.cache_data)
+        if not others:
+            return False
+        if others >= self.MAX_ITEMS:
+            self.cause = "size"
+            return True
+        if self.MAX_WEIGHT is not None and (
+                self.weight - self.weights.get(key, 0) + weight >
+                self.MAX_WEIGHT):
+            self.cause = "weight"
+            return True
+        return False
+
+    def store(self, key: str, item: object, weight: int):
+        """Saves an item and its weight.
+
+        Args:
+            key (str): The key for the cache item.
+            item (object): The item to cache.
+            weight (int): The weight of the item.
+        """
+        self.puts += 1
+        if key in self.cache_data:
+            self.updates += 1
+        self.cache_data[key] = item
+        if self.MAX_WEIGHT is not None:
+            self.weight += weight - self.weights.get(key, 0)
+            self.weights[key] = weight
+
+    def discard(self, key: str):
+        """Evicts an item and reports it to `on_discard`.
+
+        Args:
+            key (str): The key for the cache item.
+        """
+        item = self.cache_data.pop(key)
+        if self.weights:
+            self.weight -= self.weights.pop(key, 0)
+        self.evicted(self.cause)
+        if self.pending is not None:
+            self.pending.append((key, item))
+        elif self.on_discard is not None:
+            self.on_discard([(key, item)])
+
+    def report(self, evicted: List[Tuple[str, object]]):
+        """Reports discarded items to `on_discard`, if any.
+
+        Args:
+            evicted (List[Tuple[str, object]]): The discarded keys and
+                items, in eviction order.
+        """
+        if evicted and self.on_discard is not None:
+            self.on_discard(evicted)
+
+    def delete(self, key: str) -> object:
+        """Removes an item from the cache by its key.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            object: The removed item, or None if the key doesn't exist
+            or if the key is None.
+        """
+        if key is None or key not in self.cache_data:
+            return None
+        if self.weights:
+            self.weight -= self.weights.pop(key, 0)
+        return self.cache_data.pop(key)
+
+    def counted(self, found: Dict[str, object], keys: List[str]
+                ) -> Dict[str, object]:
+        """Counts the hits and misses of a batch lookup.
+
+        Args:
+            found (Dict[str, object]): The cached items found by key.
+            keys (List[str]): The keys looked up.
+
+        Returns:
+            Dict[str, object]: The items found.
+        """
+        hits = sum(key in found for key in keys)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return found
+
+    def victims(self, count: int) -> List[str]:
+        """Returns the keys the policy would discard next, in order.
+
+        Args:
+            count (int): The number of keys to discard.
+
+        Returns:
+            List[str]: The first `count` keys in eviction order.
+        """
+        raise NotImplementedError(
+            "victims must be implemented in your cache class")
+
+    def uses(self, key: str) -> int:
+        """Returns the policy state of a cached key, as a use count.
+
+        Args:
+            key (str): The key for the cache item.
+
+        Returns:
+            int: The number of uses the policy counts for the key, 0 if
+            it does not count them.
+        """
+        return 0
+
+    def restored(self, key: str, uses: int):
+        """Places a key just stored by `restore` as the next to evict.
+
+        Args:
+            key (str): The key for the cache item.
+            uses (int): The number of uses counted for the key.
+        """
+        raise NotImplementedError(
+            "restored must be implemented in your cache class")
+
+    def entries(self) -> List[Tuple[str, object, int]]:
+        """Returns the items with their policy state, most valuable first.
+
+        Returns:
+            List[Tuple[str, object, int]]: The keys, items and use
+            counts, in the reverse of the eviction order.
+        """
+        data = self.cache_data
+        keys = self.victims(len(data))
+        return [(key, data[key], self.uses(key)) for key in reversed(keys)]
+
+    def restore(self, entries: Iterable[Tuple[str, object, int]]) -> int:
+        """Adds items saved by `entries`, without evicting any.
+
+        The items are taken in order, each placed as the next one to
+        evict, so the items already cached, being more recent, are kept
+        longer. They are added until the cache is full; items of keys
+        already cached or over the remaining `MAX_WEIGHT` are skipped.
+
+        Args:
+            entries (Iterable[Tuple[str, object, int]]): The keys, items
+                and use counts, most valuable first.
+
+        Returns:
+            int: The number of items added.
+        """
+        added = 0
+        for key, item, uses in entries:
+            if len(self.cache_data) >= self.MAX_ITEMS:
+                break
+            if key in self.cache_data:
+                continue
+            weight = 0
+            if self.MAX_WEIGHT is not None:
+                weight = self.weigher(key, item)
+                if self.weight + weight > self.MAX_WEIGHT:
+                    continue
+            self.store(key, item, weight)
+            self.restored(key, uses)
+            added += 1
+        return added
+
+    def put_many(self, items: Union[Mapping[str, object],
+                                    Iterable[Tuple[str, object]]]):
+        """Adds several items, evicting for the whole batch at once.
+
+        Items of keys already cached are updated first. Then all the
+        keys to discard to make room for the new items are chosen by
+        the policy in one pass, and reported together, before the new
+        items are added in order. If there are more new items than
+        `MAX_ITEMS`, only the last ones are kept. With a `MAX_WEIGHT`,
+        the items are put one by one, and the discarded items are still
+        reported together.
+
+        Args:
+            items (Mapping or Iterable): The items by key, or pairs of
+                keys and items; the last item of a key wins.
+        """
+        if isinstance(items, Mapping):
+            items = items.items()
+        batch = {key: item for key, item in items
+                 if key is not None and item is not None}
+
+        if self.MAX_WEIGHT is not None:
+            self.pending = []
+            try:
+                for key, item in batch.items():
+                    self.put(key, item)
+            finally:
+                evicted, self.pending = self.pending, None
+                self.report(evicted)
+            return
+
+        new = []
+        for key, item in batch.items():
+            if key in self.cache_data:
+                self.put(key, item)
+            else:
+                new.append(key)
+        skipped = new[:max(len(new) - self.MAX_ITEMS, 0)]
+        new = new[len(skipped):]
+        evicted = [(key, self.delete(key)) for key in self.victims(
+            len(self.cache_data) + len(new) - self.MAX_ITEMS)]
+        for key in new:
+            self.put(key, batch[key])
+        if evicted or skipped:
+            self.evicted("size", len(evicted) + len(skipped))
+        self.report(evicted + [(key, batch[key]) for key in skipped])
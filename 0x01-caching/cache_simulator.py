@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""Replays access traces against every caching policy.
+
+For every trace and capacity, prints the hit ratio and the throughput of
+every policy, then the memory every policy takes per cached entry. The
+traces are synthetic, or read from a file of one key per line:
+
+    ./cache_simulator.py [-t zipf|loop|scan|shifting|FILE ...]
+                         [-n LENGTH] [-k KEYS] [--csv FILE] [capacity ...]
+
+Evictions are not reported while replaying, so that the policies run at
+their own speed rather than that of printing "DISCARD:" lines.
+`BasicCache` never evicts: its hit ratio is the ceiling of every trace.
+"""
+import argparse
+import csv
+import itertools
+import time
+import tracemalloc
+from typing import Dict, List, Sequence, Tuple, Type
+from hit_ratio_comparison import zipf_trace
+
+POLICIES = {
+    "Basic": __import__('0-basic_cache').BasicCache,
+    "FIFO": __import__('1-fifo_cache').FIFOCache,
+    "LIFO": __import__('2-lifo_cache').LIFOCache,
+    "LRU": __import__('3-lru_cache').LRUCache,
+    "MRU": __import__('4-mru_cache').MRUCache,
+    "LFU": __import__('100-lfu_cache').LFUCache,
+}
+
+
+def loop_trace(length: int, keys: int) -> List[int]:
+    """Returns accesses cycling through the same keys in order.
+
+    Args:
+        length (int): The number of accesses.
+        keys (int): The number of distinct keys.
+
+    Returns:
+        List[int]: The accessed keys.
+    """
+    return [index % keys for index in range(length)]
+
+
+def scan_trace(length: int, keys: int, scans: int = 10,
+               seed: int = 0) -> List[int]:
+    """Returns Zipf accesses interrupted by scans of keys read once.
+
+    Every scan reads a fifth of the keys, but at most a fortieth of the
+    accesses, so that the scans never take more than a quarter of the
+    trace, whatever its length.
+
+    Args:
+        length (int): The number of accesses.
+        keys (int): The number of distinct keys of the Zipf accesses.
+        scans (int): The number of scans, spread evenly.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        List[int]: The accessed keys, negative for the scans.
+    """
+    scanned = min(keys // 5, length // (4 * scans))
+    zipf = zipf_trace(length - scans * scanned, keys, seed=seed)
+    fresh = itertools.count(-1, -1)
+    trace = []
+    for scan in range(scans):
+        trace.extend(zipf[len(zipf) * scan // scans:
+                          len(zipf) * (scan + 1) // scans])
+        trace.extend(itertools.islice(fresh, scanned))
+    return trace
+
+
+def shifting_trace(length: int, keys: int, phases: int = 4,
+                   seed: int = 0) -> List[int]:
+    """Returns Zipf accesses whose working set moves in phases.
+
+    Every phase draws from a Zipf distribution over keys half of which
+    the previous phase used, its most popular keys being new. The last
+    phase takes the accesses left over by the division in phases.
+
+    Args:
+        length (int): The number of accesses.
+        keys (int): The number of distinct keys of every phase.
+        phases (int): The number of phases.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        List[int]: The accessed keys.
+    """
+    trace = []
+    for phase in range(phases):
+        offset = phase * (keys // 2)
+        accesses = length // phases if phase < phases - 1 else \
+            length - len(trace)
+        trace.extend(offset + key for key in zipf_trace(
+            accesses, keys, seed=seed + phase))
+    return trace
+
+
+def read_trace(path: str) -> List[str]:
+    """Reads a recorded trace.
+
+    Args:
+        path (str): The path of a file of one accessed key per line.
+
+    Returns:
+        List[str]: The accessed keys, blank lines left out.
+    """
+    with open(path) as file:
+        return [line for line in file.read().split("\n") if line]
+
+
+def make_trace(name: str, length: int, keys: int) -> list:
+    """Returns a synthetic trace by name, or a recorded one by path.
+
+    Args:
+        name (str): zipf, loop, scan, shifting, or the path of a file.
+        length (int): The number of accesses of a synthetic trace.
+        keys (int): The number of distinct keys of a synthetic trace.
+
+    Returns:
+        list: The accessed keys.
+    """
+    if name == "zipf":
+        return zipf_trace(length, keys)
+    if name == "loop":
+        return loop_trace(length, keys)
+    if name == "scan":
+        return scan_trace(length, keys)
+    if name == "shifting":
+        return shifting_trace(length, keys)
+    return read_trace(name)
+
+
+def new_cache(policy: Type, capacity: int):
+    """Returns an empty cache that does not report its evictions.
+
+    Args:
+        policy (Type): The cache class to instantiate.
+        capacity (int): The maximum number of items of the cache.
+
+    Returns:
+        BaseCaching: The cache.
+    """
+    cache = policy()
+    cache.MAX_ITEMS = capacity
+    cache.on_discard = None
+    return cache
+
+
+def replay(policy: Type, capacity: int,
+           trace: Sequence) -> Tuple[float, float]:
+    """Replays a trace, caching every missed key.
+
+    Args:
+        policy (Type): The cache class to instantiate.
+        capacity (int): The maximum number of items of the cache.
+        trace (Sequence): The accessed keys.
+
+    Returns:
+        Tuple[float, float]: The share of accesses that were hits, and
+        the accesses per second.
+    """
+    cache = new_cache(policy, capacity)
+    get, put = cache.get, cache.put
+    start = time.perf_counter()
+    for key in trace:
+        if get(key) is None:
+            put(key, key)
+    elapsed = time.perf_counter() - start
+    return cache.hits / max(len(trace), 1), len(trace) / elapsed
+
+
+def bytes_per_entry(policy: Type, capacity: int) -> float:
+    """Measures the memory a full cache takes per entry.
+
+    Only the structures of the cache are counted, not the keys and
+    items themselves.
+
+    Args:
+        policy (Type): The cache class to instantiate.
+        capacity (int): The number of entries to cache.
+
+    Returns:
+        float: The bytes per entry.
+    """
+    keys = list(range(capacity))
+    item = object()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    cache = new_cache(policy, capacity)
+    for key in keys:
+        cache.put(key, item)
+    size = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return size / capacity
+
+
+def simulate(traces: Dict[str, list], capacities: List[int],
+             policies: Dict[str, Type] = None) -> List[dict]:
+    """Replays every trace against every policy at every capacity.
+
+    Args:
+        traces (Dict[str, list]): The accessed keys by trace name.
+        capacities (List[int]): The cache capacities.
+        policies (Dict[str, Type]): The cache classes by name; all of
+            `POLICIES` by default.
+
+    Returns:
+        List[dict]: The trace, policy, capacity, hit ratio and accesses
+        per second of every replay.
+    """
+    policies = policies or POLICIES
+    results = []
+    for (name, trace), capacity, (policy, cache_class) in itertools.product(
+            traces.items(), capacities, policies.items()):
+        ratio, throughput = replay(cache_class, capacity, trace)
+        results.append({"trace": name, "policy": policy,
+                        "capacity": capacity, "hit_ratio": ratio,
+                        "ops_per_sec": throughput})
+    return results
+
+
+def report(results: List[dict], traces: Dict[str, list]):
+    """Prints the hit ratio curves and throughput of every trace.
+
+    Args:
+        results (List[dict]): The results of `simulate`.
+        traces (Dict[str, list]): The accessed keys by trace name.
+    """
+    for name, trace in traces.items():
+        rows = [result for result in results if result["trace"] == name]
+        policies = list(dict.fromkeys(row["policy"] for row in rows))
+        capacities = list(dict.fromkeys(row["capacity"] for row in rows))
+        cell = {(row["policy"], row["capacity"]): row for row in rows}
+        print("{} ({:,} accesses, {:,} keys)".format(
+            name, len(trace), len(set(trace))))
+        for field, title, cell_format in (
+                ("hit_ratio", "hit ratio", "{:>10.2%}"),
+                ("ops_per_sec", "Mops/s", "{:>10.2f}")):
+            print("  {:<10} {:>10}".format(title, "capacity") +
+                  "".join("{:>10}".format(policy) for policy in policies))
+            for capacity in capacities:
+                print("  {:<10} {:>10,}".format("", capacity) + "".join(
+                    cell_format.format(cell[policy, capacity][field] /
+                                       (1e6 if field == "ops_per_sec"
+                                        else 1))
+                    for policy in policies))
+        print()
+
+
+def main():
+    """Parses the arguments, replays the traces and prints the results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("capacities", metavar="capacity", type=int,
+                        nargs="*", default=[100, 1000, 5000, 10000])
+    parser.add_argument("-t", "--trace", dest="traces", action="append",
+                        help="zipf, loop, scan, shifting or a trace file;"
+                        " all synthetic traces by default")
+    parser.add_argument("-n", "--length", type=int, default=1000000,
+                        help="accesses of the synthetic traces")
+    parser.add_argument("-k", "--keys", type=int, default=20000,
+                        help="distinct keys of the synthetic traces")
+    parser.add_argument("--csv", help="also write the results to a file")
+    args = parser.parse_args()
+
+    names = args.traces or ["zipf", "loop", "scan", "shifting"]
+    traces = {name: make_trace(name, args.length, args.keys)
+              for name in names}
+    results = simulate(traces, args.capacities)
+    report(results, traces)
+
+    capacity = max(args.capacities)
+    print("memory per entry at {:,} entries".format(capacity))
+    for policy, cache_class in POLICIES.items():
+        print("  {:<10} {:>8.1f} B".format(
+            policy, bytes_per_entry(cache_class, capacity)))
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Cache snapshot module, to warm caches up from a file.
+
+A snapshot holds the items of a cache with their policy state, such as
+the frequencies of an LFU cache, most valuable first, in chunks of
+pickled entries after a short header:
+    magic (4 bytes) | version (1 byte) | entries (4 bytes)
+    then, per chunk: size (4 bytes) | pickled list of entries
+"""
+import os
+import pickle
+import struct
+import threading
+from contextlib import nullcontext
+from typing import Iterator, List, Tuple
+
+BoundedCache = __import__('bounded_cache').BoundedCache
+
+MAGIC = b"CSNP"
+VERSION = 1
+HEADER = struct.Struct("!4sBI")
+CHUNK = struct.Struct("!I")
+CHUNK_ENTRIES = 4096
+Entry = Tuple[str, object, int]
+
+
+def dump(cache: BoundedCache, path: str, lock=None) -> int:
+    """Saves the items of a cache and their policy state to a file.
+
+    The file is written next to its final path, flushed to disk, then
+    moved over it, so a reader never sees a partial snapshot, even after
+    a crash.
+
+    Args:
+        cache (BoundedCache): The cache to save.
+        path (str): The path of the snapshot file.
+        lock (Lock): A lock guarding the cache, held while its entries
+            are listed rather than while they are written.
+
+    Returns:
+        int: The number of items saved.
+    """
+    guard = lock if lock is not None else nullcontext()
+    with guard:
+        entries = cache.entries()
+    temporary = "{}.{}.tmp".format(path, os.getpid())
+    try:
+        with open(temporary, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, len(entries)))
+            for start in range(0, len(entries), CHUNK_ENTRIES):
+                chunk = pickle.dumps(entries[start:start + CHUNK_ENTRIES],
+                                     pickle.HIGHEST_PROTOCOL)
+                file.write(CHUNK.pack(len(chunk)))
+                file.write(chunk)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+        raise
+    return len(entries)
+
+
+def chunks(path: str) -> Iterator[List[Entry]]:
+    """Reads the entries of a snapshot file, one chunk at a time.
+
+    Args:
+        path (str): The path of the snapshot file.
+
+    Yields:
+        List[Tuple[str, object, int]]: The keys, items and use counts
+        of a chunk, most valuable first.
+
+    Raises:
+        ValueError: If the file is not a snapshot, or is truncated.
+    """
+    def read(size: int) -> bytes:
+        """Reads exactly `size` bytes of the file."""
+        data = file.read(size)
+        if len(data) != size:
+            raise ValueError("{} is truncated".format(path))
+        return data
+
+    with open(path, "rb") as file:
+        magic, version, expected = HEADER.unpack(read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not a cache snapshot".format(path))
+        count = 0
+        while count < expected:
+            size, = CHUNK.unpack(read(CHUNK.size))
+            entries = pickle.loads(read(size))
+            count += len(entries)
+            yield entries
+        if count != expected or file.read(1):
+            raise ValueError("{} is corrupt".format(path))
+
+
+def load(cache: BoundedCache, path: str, lock=None) -> int:
+    """Restores the items of a snapshot file into a cache.
+
+    The items already cached are kept, and the restored ones fill the
+    remaining room, hottest first, until the cache is full.
+
+    Args:
+        cache (BoundedCache): The cache to warm up.
+        path (str): The path of the snapshot file.
+        lock (Lock): A lock guarding the cache, held for every chunk
+            rather than the whole load.
+
+    Returns:
+        int: The number of items restored.
+    """
+    restored = 0
+    guard = lock if lock is not None else nullcontext()
+    for entries in chunks(path):
+        with guard:
+            restored += cache.restore(entries)
+            if len(cache.cache_data) >= cache.MAX_ITEMS:
+                break
+    return restored
+
+
+def load_in_background(cache: BoundedCache, path: str,
+                       lock) -> threading.Thread:
+    """Restores a snapshot file into a cache from a daemon thread.
+
+    The cache serves requests while it warms up: the items are restored
+    chunk by chunk, holding the lock the other threads use the cache
+    with, such as the lock of a `LockedCache`.
+
+    Args:
+        cache (BoundedCache): The cache to warm up.
+        path (str): The path of the snapshot file.
+        lock (Lock): The lock guarding the cache.
+
+    Returns:
+        threading.Thread: The started thread.
+    """
+    thread = threading.Thread(target=load, args=(cache, path, lock),
+                              daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""Cache statistics and instrumentation module."""
+import time
+from typing import Callable, Dict, Iterable, List, Mapping, Tuple, \
+    Union
+from base_caching import BaseCaching
+
+COUNTERS = ("hits", "misses", "puts", "updates")
+
+
+class LatencyHistogram:
+    """Histogram of durations in power-of-two nanosecond buckets.
+
+    Bucket `i` counts the durations of at most 2 ** (`LOW` + i)
+    nanoseconds, from 128ns to about 16ms, and a last bucket the longer
+    ones, so recording a duration is a single list increment.
+    """
+
+    LOW = 7
+    HIGH = 24
+
+    def __init__(self):
+        """Initializes empty buckets."""
+        self.counts = [0] * (self.HIGH - self.LOW + 2)
+        self.total = 0  # Sum of the durations, in nanoseconds
+
+    def observe(self, ns: int):
+        """Records a duration.
+
+        Args:
+            ns (int): The duration, in nanoseconds.
+        """
+        i = ns.bit_length() - self.LOW
+        if i < 0:
+            i = 0
+        elif i >= len(self.counts):
+            i = len(self.counts) - 1
+        self.counts[i] += 1
+        self.total += ns
+
+    def snapshot(self) -> dict:
+        """Returns the recorded durations.
+
+        Returns:
+            dict: The cumulative count of durations at most each bound,
+            in seconds, under "buckets", with their "sum" in seconds and
+            their "count".
+        """
+        buckets, seen = [], 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            bound = (2 ** (self.LOW + i) / 1e9
+                     if i < len(self.counts) - 1 else float("inf"))
+            buckets.append((bound, seen))
+        return {"buckets": buckets, "sum": self.total / 1e9, "count": seen}
+
+
+def merge_counters(counters: Iterable[dict]) -> dict:
+    """Sums the counters of several caches.
+
+    Args:
+        counters (Iterable[dict]): The counters, as returned by
+            `InstrumentedCache.counters`.
+
+    Returns:
+        dict: The summed counters.
+    """
+    total = dict.fromkeys(COUNTERS, 0)  # type: Dict[str, object]
+    evictions = {}  # type: Dict[str, int]
+    for counter in counters:
+        for name in COUNTERS:
+            total[name] += counter[name]
+        for reason, count in counter["evictions"].items():
+            evictions[reason] = evictions.get(reason, 0) + count
+    total["evictions"] = evictions
+    return total
+
+
+class InstrumentedCache(BaseCaching):
+    """Base of the caches counting their operations.
+
+    Hits, misses, puts (of which updates) and evictions by reason are
+    counted on every call, at the cost of an attribute increment. With a
+    `SAMPLE_EVERY` of N, the latency of one `get` and `put` in N is also
+    recorded; the timed methods are only wrapped when sampling is on, so
+    it costs nothing otherwise.
+
+    Eviction reasons are "size" and "weight" for the limits, "oversize"
+    for items heavier than `MAX_WEIGHT`, "admission" for items an
+    admission policy turns away, "expired" for items past their TTL and
+    "invalidated" for copies of items changed through another cache.
+    The batch methods make one call per key, unless a policy has a
+    faster way.
+    """
+
+    SAMPLE_EVERY = 0
+
+    def __init__(self):
+        """Initializes the counters and the sampled methods."""
+        super().__init__()
+        self.hits = 0
+        self.misses = 0
+        self.puts = 0
+        self.updates = 0
+        self.evictions = {}  # type: Dict[str, int]
+        self.latency = {}  # type: Dict[str, LatencyHistogram]
+        if self.SAMPLE_EVERY:
+            for name in ("get", "put"):
+                self.latency[name] = LatencyHistogram()
+                setattr(self, name, self.__sampled(
+                    getattr(self, name), self.latency[name]))
+
+    def __sampled(self, method: Callable,
+                  histogram: LatencyHistogram) -> Callable:
+        """Returns a method timing one call in `SAMPLE_EVERY`."""
+        every = self.SAMPLE_EVERY
+        clock = time.perf_counter_ns
+        left = [every]
+
+        def sampled(*args, **kwargs):
+            """Calls the method, timing it if its turn has come."""
+            left[0] -= 1
+            if left[0]:
+                return method(*args, **kwargs)
+            left[0] = every
+            start = clock()
+            result = method(*args, **kwargs)
+            histogram.observe(clock() - start)
+            return result
+
+        return sampled
+
+    def evicted(self, reason: str, count: int = 1):
+        """Counts evictions.
+
+        Args:
+            reason (str): Why the items were evicted.
+            count (int): The number of items evicted.
+        """
+        self.evictions[reason] = self.evictions.get(reason, 0) + count
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Retrieves the items of several keys.
+
+        Args:
+            keys (Iterable[str]): The keys for the cache items.
+
+        Returns:
+            Dict[str, object]: The cached items by key; keys that don't
+            exist are left out.
+        """
+        found = {}
+        for key in keys:
+            item = self.get(key)
+            if item is not None:
+                found[key] = item
+        return found
+
+    def put_many(self, items: Union[Mapping[str, object],
+                                    Iterable[Tuple[str, object]]]):
+        """Adds several items, one after another.
+
+        Args:
+            items (Mapping or Iterable): The items by key, or pairs of
+                keys and items; the last item of a key wins.
+        """
+        if isinstance(items, Mapping):
+            items = items.items()
+        for key, item in items:
+            self.put(key, item)
+
+    def delete_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Removes the items of several keys.
+
+        Args:
+            keys (Iterable[str]): The keys for the cache items.
+
+        Returns:
+            Dict[str, object]: The removed items by key.
+        """
+        removed = {}
+        for key in keys:
+            item = self.delete(key)
+            if item is not None:
+                removed[key] = item
+        return removed
+
+    def counters(self) -> dict:
+        """Returns the operation counters.
+
+        Returns:
+            dict: The hits, misses, puts and updates, and the evictions
+            by reason under "evictions".
+        """
+        return {"hits": self.hits, "misses": self.misses,
+                "puts": self.puts, "updates": self.updates,
+                "evictions": dict(self.evictions)}
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the statistics of the cache.
+
+        Returns:
+            dict: The counters, the "hit_ratio", the number of "items",
+            "max_items", their "weight" and the sampled "latency" of
+            `get` and `put`.
+        """
+        stats = self.counters()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        stats["items"] = len(self.cache_data)
+        stats["max_items"] = self.MAX_ITEMS
+        stats["weight"] = getattr(self, "weight", 0)
+        stats["latency"] = {name: histogram.snapshot()
+                            for name, histogram in self.latency.items()}
+        return stats
+
+
+METRICS = (
+    ("hits_total", "counter", "Lookups that found their key."),
+    ("misses_total", "counter", "Lookups that did not find their key."),
+    ("puts_total", "counter", "Items stored, updates included."),
+    ("updates_total", "counter", "Items stored over a cached key."),
+    ("evictions_total", "counter", "Items evicted, by reason."),
+    ("items", "gauge", "Items in the cache."),
+    ("max_items", "gauge", "Maximum number of items in the cache."),
+    ("weight", "gauge", "Total weight of the items in the cache."),
+)
+
+
+def label(value: object) -> str:
+    """Escapes a value for use as a Prometheus label value.
+
+    Args:
+        value (object): The value of the label.
+
+    Returns:
+        str: The value, with backslashes, quotes and newlines escaped.
+    """
+    return str(value).replace("\\", "\\\\").replace(
+        '"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(caches: Mapping[str, InstrumentedCache],
+                    prefix: str = "cache") -> str:
+    """Formats the statistics of caches in Prometheus text format.
+
+    Args:
+        caches (Mapping[str, InstrumentedCache]): The caches, by the
+            value of their "cache" label.
+        prefix (str): The prefix of the metric names.
+
+    Returns:
+        str: The metrics, one family after another.
+    """
+    snapshots = {label(name): cache.stats()
+                 for name, cache in caches.items()}
+    lines = []  # type: List[str]
+    for metric, kind, text in METRICS:
+        name = "{}_{}".format(prefix, metric)
+        lines.append("# HELP {} {}".format(name, text))
+        lines.append("# TYPE {} {}".format(name, kind))
+        field = metric[:-len("_total")] if kind == "counter" else metric
+        for cache, stats in snapshots.items():
+            if field == "evictions":
+                for reason, count in sorted(stats["evictions"].items()):
+                    lines.append('{}{{cache="{}",reason="{}"}} {}'.format(
+                        name, cache, reason, count))
+            else:
+                lines.append('{}{{cache="{}"}} {}'.format(
+                    name, cache, stats[field]))
+    for method in ("get", "put"):
+        name = "{}_{}_latency_seconds".format(prefix, method)
+        sampled = [(cache, stats["latency"][method])
+                   for cache, stats in snapshots.items()
+                   if method in stats["latency"]]
+        if not sampled:
+            continue
+        lines.append("# HELP {} Sampled {} latency.".format(name, method))
+        lines.append("# TYPE {} histogram".format(name))
+        for cache, histogram in sampled:
+            for bound, count in histogram["buckets"]:
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append('{}_bucket{{cache="{}",le="{}"}} {}'.format(
+                    name, cache, le, count))
+            lines.append('{}_sum{{cache="{}"}} {!r}'.format(
+                name, cache, histogram["sum"]))
+            lines.append('{}_count{{cache="{}"}} {}'.format(
+                name, cache, histogram["count"]))
+    return "\n".join(lines) + "\n"
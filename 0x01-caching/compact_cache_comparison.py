@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Compares the OrderedDict and array-backed LRU and MRU caches.
+
+For every capacity, prints the memory the cache structures take per
+item, besides the keys and items themselves, and the put and get
+throughput of a full cache:
+
+    ./compact_cache_comparison.py [capacity ...]
+"""
+import contextlib
+import io
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Type
+
+compact = __import__('105-compact_lru_cache')
+CACHES = {
+    "LRUCache": __import__('3-lru_cache').LRUCache,
+    "CompactLRUCache": compact.CompactLRUCache,
+    "MRUCache": __import__('4-mru_cache').MRUCache,
+    "CompactMRUCache": compact.CompactMRUCache,
+}
+
+
+def measure(cache_class: Type, capacity: int,
+            operations: int = 200000) -> Dict[str, float]:
+    """Fills a cache, then times puts that evict and gets that hit.
+
+    Args:
+        cache_class (Type): The cache class to instantiate.
+        capacity (int): The maximum number of items of the cache.
+        operations (int): The number of timed puts and gets.
+
+    Returns:
+        Dict[str, float]: The bytes per item, and the puts and gets
+        per second.
+    """
+    keys = list(range(capacity + operations))
+    item = object()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    cache = cache_class()
+    cache.MAX_ITEMS = capacity
+    for key in keys[:capacity]:
+        cache.put(key, item)
+    per_item = (tracemalloc.get_traced_memory()[0] - base) / capacity
+    tracemalloc.stop()
+
+    hot = keys[:capacity] * (operations // capacity + 1)
+    hot = hot[:operations]
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for key in hot:
+            cache.get(key)
+        gets = operations / (time.perf_counter() - start)
+        start = time.perf_counter()
+        for key in keys[capacity:]:
+            cache.put(key, item)
+        puts = operations / (time.perf_counter() - start)
+    return {"bytes_per_item": per_item, "puts": puts, "gets": gets}
+
+
+def main(capacities: List[int]):
+    """Prints the measures of every cache for every capacity.
+
+    Args:
+        capacities (List[int]): The capacities to measure.
+    """
+    print("{:<16} {:>10} {:>10} {:>12} {:>12}".format(
+        "cache", "capacity", "B/item", "puts/s", "gets/s"))
+    for capacity in capacities:
+        for name, cache_class in CACHES.items():
+            result = measure(cache_class, capacity)
+            print("{:<16} {:>10,} {:>10.1f} {:>12,.0f} {:>12,.0f}".format(
+                name, capacity, result["bytes_per_item"], result["puts"],
+                result["gets"]))
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 1000000])
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Compares the throughput of sharded and globally locked caches.
+"""
+import contextlib
+import io
+import random
+import sys
+import threading
+import time
+from typing import List, Type
+
+concurrent_cache = __import__('101-concurrent_cache')
+
+
+def throughput(cache_class: Type, threads: int,
+               operations: int = 100000) -> float:
+    """Measures the operations per second of threads sharing a cache.
+
+    Every thread runs `operations` calls, 90% gets and 10% puts, on
+    keys drawn from a skewed distribution.
+
+    Args:
+        cache_class (Type): The cache class to instantiate.
+        threads (int): The number of threads.
+        operations (int): The number of calls per thread.
+
+    Returns:
+        float: The total number of calls per second.
+    """
+    cache = cache_class()
+    workloads = []
+    for seed in range(threads):
+        rng = random.Random(seed)
+        workloads.append([(rng.random() < 0.1,
+                           int(rng.paretovariate(1.2)) % 50000)
+                          for _ in range(operations)])
+    barrier = threading.Barrier(threads + 1)
+
+    def work(workload: List[tuple]):
+        """Replays a workload on the shared cache."""
+        put, get = cache.put, cache.get
+        barrier.wait()
+        for is_put, key in workload:
+            if is_put:
+                put(key, key)
+            else:
+                get(key)
+
+    workers = [threading.Thread(target=work, args=(workload,))
+               for workload in workloads]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for worker in workers:
+            worker.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+    return threads * operations / elapsed
+
+
+def main(capacity: int = 10000):
+    """Prints the throughput of every cache for 1 to 8 threads.
+
+    Args:
+        capacity (int): The maximum number of items of every cache.
+    """
+    caches = []
+    for name in ("FIFO", "LRU", "LFU"):
+        policy = getattr(concurrent_cache, name + "Cache")
+        for base in (concurrent_cache.LockedCache,
+                     concurrent_cache.ShardedCache):
+            label = "{} {}".format(name, base.__name__)
+            caches.append((label, type(label.replace(" ", ""), (base,), {
+                "POLICY": policy, "MAX_ITEMS": capacity})))
+    counts = (1, 2, 4, 8)
+    print("{:<20}".format("ops/s") +
+          "".join("{:>12}".format("{} thr".format(n)) for n in counts))
+    for label, cache_class in caches:
+        print("{:<20}".format(label) + "".join(
+            "{:>12,.0f}".format(throughput(cache_class, n)) for n in counts))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Eviction listeners caching module.
+
+A cache reports the items its policy discards to its `on_discard`
+listener: any callable taking the list of evicted (key, item) pairs,
+in eviction order. A batch of evictions is reported in a single call.
+Setting `on_discard` to None reports nothing.
+"""
+import threading
+from collections import deque
+from typing import List, Tuple
+
+Evicted = List[Tuple[str, object]]
+
+
+def print_discards(evicted: Evicted):
+    """Prints "DISCARD:" with every evicted key, in one write.
+
+    Args:
+        evicted (List[Tuple[str, object]]): The evicted keys and items.
+    """
+    print("".join("DISCARD: {}\n".format(key) for key, _ in evicted),
+          end="")
+
+
+class DiscardCounter:
+    """Listener counting the evicted items."""
+
+    def __init__(self):
+        """Initializes the count."""
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, evicted: Evicted):
+        """Adds the evicted items to the count.
+
+        Args:
+            evicted (List[Tuple[str, object]]): The evicted keys and
+                items.
+        """
+        with self.lock:
+            self.count += len(evicted)
+
+
+class DiscardQueue:
+    """Listener buffering the evicted items for another thread.
+
+    Evictions are appended to a bounded queue that a consumer drains at
+    its own pace, such as a thread writing them to a remote sink; when
+    the consumer falls behind, the oldest evictions are dropped and
+    counted rather than slowing the cache down.
+    """
+
+    def __init__(self, maxlen: int = 65536):
+        """Initializes an empty queue.
+
+        Args:
+            maxlen (int): The number of evictions kept before the
+                oldest are dropped.
+        """
+        self.queue = deque(maxlen=maxlen)  # type: deque
+        self.dropped = 0
+
+    def __call__(self, evicted: Evicted):
+        """Queues the evicted items.
+
+        Args:
+            evicted (List[Tuple[str, object]]): The evicted keys and
+                items.
+        """
+        overflow = len(self.queue) + len(evicted) - self.queue.maxlen
+        if overflow > 0:
+            self.dropped += overflow
+        self.queue.extend(evicted)
+
+    def drain(self) -> Evicted:
+        """Removes and returns the queued evictions, oldest first.
+
+        Returns:
+            List[Tuple[str, object]]: The evicted keys and items.
+        """
+        evicted = []
+        popleft = self.queue.popleft
+        try:
+            while True:
+                evicted.append(popleft())
+        except IndexError:
+            return evicted
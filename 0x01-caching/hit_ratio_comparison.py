@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Compares the hit ratios of caching policies on synthetic traces.
+
+The traces draw keys from a Zipf distribution, optionally interrupted
+by scans of keys that are read once and never again:
+
+    ./hit_ratio_comparison.py [capacity ...]
+"""
+import contextlib
+import io
+import itertools
+import random
+import sys
+from typing import Dict, Iterable, List, Type
+
+POLICIES = {
+    "LRU": __import__('3-lru_cache').LRUCache,
+    "LFU": __import__('100-lfu_cache').LFUCache,
+    "W-TinyLFU": __import__('102-tinylfu_cache').TinyLFUCache,
+    "ARC": __import__('103-arc_cache').ARCCache,
+}
+
+
+def zipf_trace(length: int, keys: int, s: float = 0.9,
+               seed: int = 0) -> List[int]:
+    """Returns keys drawn with probability proportional to 1 / rank^s.
+
+    Args:
+        length (int): The number of accesses.
+        keys (int): The number of distinct keys.
+        s (float): The skew of the distribution.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        List[int]: The accessed keys.
+    """
+    rng = random.Random(seed)
+    weights = list(itertools.accumulate(
+        1 / rank ** s for rank in range(1, keys + 1)))
+    ranks = rng.choices(range(keys), cum_weights=weights, k=length)
+    # Scatter the popular keys over the key space
+    keys_of = list(range(keys))
+    rng.shuffle(keys_of)
+    return [keys_of[rank] for rank in ranks]
+
+
+def with_scans(trace: List[int], every: int, length: int) -> List[int]:
+    """Inserts a scan of unique keys into a trace at regular intervals.
+
+    Args:
+        trace (List[int]): The accesses, all non negative keys.
+        every (int): The number of accesses between two scans.
+        length (int): The number of keys of every scan.
+
+    Returns:
+        List[int]: The accesses, with negative keys for the scans.
+    """
+    scanned = itertools.count(-1, -1)
+    result = []
+    for start in range(0, len(trace), every):
+        result.extend(trace[start:start + every])
+        result.extend(itertools.islice(scanned, length))
+    return result
+
+
+def hit_ratio(cache_class: Type, capacity: int,
+              trace: Iterable[int]) -> float:
+    """Replays a trace, caching every missed key.
+
+    Args:
+        cache_class (Type): The cache class to instantiate.
+        capacity (int): The maximum number of items of the cache.
+        trace (Iterable[int]): The accessed keys.
+
+    Returns:
+        float: The share of accesses that were hits.
+    """
+    cache = cache_class()
+    cache.MAX_ITEMS = capacity
+    hits = accesses = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for key in trace:
+            accesses += 1
+            if cache.get(key) is not None:
+                hits += 1
+            else:
+                cache.put(key, key)
+    return hits / max(accesses, 1)
+
+
+def main(capacities: List[int], keys: int = 10000, length: int = 200000):
+    """Prints the hit ratio of every policy for every capacity.
+
+    Args:
+        capacities (List[int]): The cache capacities to compare.
+        keys (int): The number of distinct keys of the Zipf traces.
+        length (int): The number of Zipf accesses of every trace.
+    """
+    zipf = zipf_trace(length, keys)
+    traces = {
+        "zipf": zipf,
+        "zipf+scan": with_scans(zipf, 10000, 2000),
+    }  # type: Dict[str, List[int]]
+    print("{:<10} {:>9}".format("trace", "capacity") +
+          "".join("{:>11}".format(name) for name in POLICIES))
+    for (name, trace), capacity in itertools.product(traces.items(),
+                                                     capacities):
+        print("{:<10} {:>9,}".format(name, capacity) + "".join(
+            "{:>11.2%}".format(hit_ratio(policy, capacity, trace))
+            for policy in POLICIES.values()))
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100, 500, 1000, 2500])
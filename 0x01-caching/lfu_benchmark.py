@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Measures LFUCache put/get latency as the capacity grows.
+"""
+import contextlib
+import io
+import random
+import sys
+import time
+from typing import Dict, List
+
+LFUCache = __import__('100-lfu_cache').LFUCache
+
+
+def measure(capacity: int, operations: int = 200000) -> Dict[str, float]:
+    """Times puts that evict and gets on a full cache.
+
+    Args:
+        capacity (int): The maximum number of items of the cache.
+        operations (int): The number of timed puts and gets.
+
+    Returns:
+        Dict[str, float]: The mean put and get latency in nanoseconds.
+    """
+    cache = LFUCache()
+    cache.MAX_ITEMS = capacity
+    rng = random.Random(0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for key in range(capacity):
+            cache.put(key, key)
+        hot = [rng.randrange(capacity) for _ in range(operations)]
+        fresh = range(capacity, capacity + operations)
+
+        start = time.perf_counter()
+        for key in hot:
+            cache.get(key)
+        get_ns = (time.perf_counter() - start) / operations * 1e9
+
+        # Every put of a new key evicts one
+        start = time.perf_counter()
+        for key in fresh:
+            cache.put(key, key)
+        put_ns = (time.perf_counter() - start) / operations * 1e9
+    return {"capacity": capacity, "put_ns": put_ns, "get_ns": get_ns}
+
+
+def main(capacities: List[int]):
+    """Prints the latencies of LFUCache for every capacity.
+
+    Args:
+        capacities (List[int]): The capacities to measure.
+    """
+    print("{:>10} {:>10} {:>10}".format("capacity", "put (ns)", "get (ns)"))
+    for capacity in capacities:
+        result = measure(capacity)
+        print("{capacity:>10,} {put_ns:>10.0f} {get_ns:>10.0f}".format(
+            **result))
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or
+         [4, 100, 10000, 100000, 500000])
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""Memoization module, backed by the caching policies.
+
+    @memoize(LFUCache(), ttl=60, stale=30)
+    def profile(user_id):
+        ...
+
+Concurrent calls missing the same key share a single computation. With
+a `ttl`, a value is fresh for `ttl` seconds, then served as is for
+`stale` more seconds while a single call refreshes it in the background,
+so hot keys never expire under their callers.
+"""
+import asyncio
+import functools
+import threading
+import time
+import types
+import weakref
+from typing import Callable, Dict, Hashable, Optional, Tuple
+from base_caching import BaseCaching
+
+LRUCache = __import__('3-lru_cache').LRUCache
+
+KWARGS = "__kwargs__"  # Separates the positional and keyword arguments
+LOCKS = weakref.WeakKeyDictionary()  # Lock of every cache memoizing
+LOCKS_LOCK = threading.Lock()
+
+
+def make_key(*args, **kwargs) -> Hashable:
+    """Builds a cache key from the arguments of a call.
+
+    Args:
+        *args: The positional arguments.
+        **kwargs: The keyword arguments.
+
+    Returns:
+        Hashable: The only argument if it is a string or an integer, or
+        else a tuple of the arguments.
+    """
+    if kwargs:
+        return args + (KWARGS,) + tuple(sorted(kwargs.items()))
+    if len(args) == 1 and type(args[0]) in (str, int):
+        return args[0]
+    return args
+
+
+def lock_of(cache: BaseCaching) -> threading.Lock:
+    """Returns the lock guarding a cache.
+
+    Every function memoized with the same cache uses it through the same
+    lock, as the caches are not safe for concurrent use.
+
+    Args:
+        cache (BaseCaching): The cache.
+
+    Returns:
+        threading.Lock: The lock of the cache.
+    """
+    with LOCKS_LOCK:
+        lock = LOCKS.get(cache)
+        if lock is None:
+            lock = LOCKS[cache] = threading.Lock()
+        return lock
+
+
+class Flight:
+    """Computation of a key, awaited by every caller missing it."""
+
+    def __init__(self):
+        """Initializes a computation under way."""
+        self.done = threading.Event()
+        self.value = None
+        self.error = None  # type: Optional[BaseException]
+
+
+class MemoizedBase:
+    """Function whose results are kept in a cache.
+
+    Values are cached as (value, fresh until, stale until) entries, so
+    that None results are cached too. The keys are prefixed with the
+    name of the function, so that several functions can share a cache,
+    which they all use under its `lock_of` lock.
+    """
+
+    def __init__(self, func: Callable, cache: BaseCaching,
+                 key: Callable[..., Hashable], ttl: Optional[float],
+                 stale: float, clock: Callable[[], float]):
+        """Wraps a function.
+
+        Args:
+            func (Callable): The function to memoize.
+            cache (BaseCaching): The cache keeping its results.
+            key (Callable[..., Hashable]): Builds the key of a call from
+                its arguments.
+            ttl (float): The seconds a value stays fresh; forever when
+                None.
+            stale (float): The seconds a value is still served after
+                that, while it is refreshed.
+            clock (Callable[[], float]): The source of the current time,
+                in seconds.
+        """
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.cache = cache
+        self.key = key
+        self.ttl = ttl
+        self.stale = stale
+        self.clock = clock
+        self.name = "{}.{}".format(func.__module__, func.__qualname__)
+        self.lock = lock_of(cache)
+
+    def __get__(self, instance, owner=None):
+        """Binds the memoized function when it is a method."""
+        if instance is None:
+            return self
+        return types.MethodType(self, instance)
+
+    def key_of(self, args: tuple, kwargs: dict) -> Hashable:
+        """Returns the cache key of a call.
+
+        Args:
+            args (tuple): The positional arguments.
+            kwargs (dict): The keyword arguments.
+
+        Returns:
+            Hashable: The key.
+        """
+        return self.name, self.key(*args, **kwargs)
+
+    def entry(self, value: object) -> Tuple[object, float, float]:
+        """Returns the cache entry of a value computed now.
+
+        Args:
+            value (object): The value.
+
+        Returns:
+            tuple: The value and the times it stops being fresh, and
+            stops being served.
+        """
+        if self.ttl is None:
+            return value, float("inf"), float("inf")
+        fresh = self.clock() + self.ttl
+        return value, fresh, fresh + self.stale
+
+    def lookup(self, key: Hashable) -> Tuple[object, Optional[bool]]:
+        """Looks a key up in the cache.
+
+        Args:
+            key (Hashable): The key.
+
+        Returns:
+            tuple: The value and whether it is fresh, or a None value
+            and state if the key is missing or expired.
+        """
+        with self.lock:
+            return self.peek(key)
+
+    def peek(self, key: Hashable) -> Tuple[object, Optional[bool]]:
+        """Looks a key up in the cache, whose lock the caller holds.
+
+        Args:
+            key (Hashable): The key.
+
+        Returns:
+            tuple: The value and whether it is fresh, as `lookup` does.
+        """
+        entry = self.cache.get(key)
+        if entry is None:
+            return None, None
+        value, fresh, stale = entry
+        now = self.clock()
+        if now < fresh:
+            return value, True
+        if now < stale:
+            return value, False
+        return None, None
+
+    def keep(self, key: Hashable, value: object):
+        """Caches a value computed now.
+
+        Args:
+            key (Hashable): The key.
+            value (object): The value.
+        """
+        with self.lock:
+            self.cache.put(key, self.entry(value))
+
+    def invalidate(self, *args, **kwargs):
+        """Removes the cached value of a call.
+
+        A cache without a `delete` method has the item removed from its
+        `cache_data`.
+
+        Args:
+            *args: The positional arguments of the call.
+            **kwargs: The keyword arguments of the call.
+        """
+        key = self.key_of(args, kwargs)
+        with self.lock:
+            if hasattr(self.cache, "delete"):
+                self.cache.delete(key)
+            else:
+                self.cache.cache_data.pop(key, None)
+
+
+class Memoized(MemoizedBase):
+    """Memoized function, sharing computations between threads."""
+
+    def __init__(self, *args, **kwargs):
+        """Wraps a function; see `MemoizedBase`."""
+        super().__init__(*args, **kwargs)
+        self.flights = {}  # type: Dict[Hashable, Flight]
+
+    def __call__(self, *args, **kwargs) -> object:
+        """Returns the cached value of a call, computing it if needed.
+
+        Returns:
+            object: The value.
+        """
+        key = self.key_of(args, kwargs)
+        value, fresh = self.lookup(key)
+        if fresh is not None:
+            if not fresh:
+                flight, leader = self.__flight(key, refresh=True)
+                if leader:
+                    threading.Thread(
+                        target=self.__run, daemon=True,
+                        args=(key, flight, args, kwargs)).start()
+            return value
+
+        flight, leader = self.__flight(key)
+        if leader:
+            self.__run(key, flight, args, kwargs)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def __flight(self, key: Hashable, refresh: bool = False
+                 ) -> Tuple[Flight, bool]:
+        """Returns the computation of a key, and whether it is new.
+
+        A computation that ended since the key was looked up left its
+        value in the cache: that value is returned, as a computation
+        already done, rather than being computed again.
+        """
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is not None:
+                return flight, False
+            value, fresh = self.peek(key)
+            if fresh or (fresh is not None and not refresh):
+                flight = Flight()
+                flight.value = value
+                flight.done.set()
+                return flight, False
+            flight = self.flights[key] = Flight()
+            return flight, True
+
+    def __run(self, key: Hashable, flight: Flight, args: tuple,
+              kwargs: dict):
+        """Computes the value of a key for every caller awaiting it."""
+        try:
+            flight.value = self.func(*args, **kwargs)
+            self.keep(key, flight.value)
+        except BaseException as error:
+            flight.error = error
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+
+
+class AsyncMemoized(MemoizedBase):
+    """Memoized coroutine function, sharing computations between tasks.
+
+    A computation runs in a task of its own, so that a caller being
+    cancelled does not cancel it for the others.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Wraps a coroutine function; see `MemoizedBase`."""
+        super().__init__(*args, **kwargs)
+        self.flights = {}  # type: Dict[Hashable, asyncio.Future]
+
+    async def __call__(self, *args, **kwargs) -> object:
+        """Returns the cached value of a call, computing it if needed.
+
+        Returns:
+            object: The value.
+        """
+        key = self.key_of(args, kwargs)
+        value, fresh = self.lookup(key)
+        if fresh is not None:
+            if not fresh and key not in self.flights:
+                self.__start(key, args, kwargs)
+            return value
+
+        flight = self.flights.get(key)
+        if flight is None:
+            flight = self.__start(key, args, kwargs)
+        return await asyncio.shield(flight)
+
+    def __start(self, key: Hashable, args: tuple, kwargs: dict
+                ) -> asyncio.Future:
+        """Starts computing the value of a key."""
+        flight = asyncio.ensure_future(self.__run(key, args, kwargs))
+        # Retrieve the error of a refresh nobody awaits
+        flight.add_done_callback(
+            lambda done: done.cancelled() or done.exception())
+        self.flights[key] = flight
+        return flight
+
+    async def __run(self, key: Hashable, args: tuple, kwargs: dict
+                    ) -> object:
+        """Computes and caches the value of a key."""
+        try:
+            value = await self.func(*args, **kwargs)
+            self.keep(key, value)
+            return value
+        finally:
+            del self.flights[key]
+
+
+def memoize(cache: BaseCaching = None, key: Callable[..., Hashable] = None,
+            ttl: float = None, stale: float = 0.0,
+            clock: Callable[[], float] = time.monotonic,
+            max_items: int = 1024) -> Callable:
+    """Returns a decorator memoizing a function or coroutine function.
+
+    Args:
+        cache (BaseCaching): The cache keeping the results, of any
+            policy; a new `LRUCache` of `max_items` items discarding
+            silently by default.
+        key (Callable[..., Hashable]): Builds the key of a call from its
+            arguments; `make_key` by default.
+        ttl (float): The seconds a value stays fresh; forever when None.
+        stale (float): The seconds an expired value is still served
+            while a single call refreshes it.
+        clock (Callable[[], float]): The source of the current time, in
+            seconds.
+        max_items (int): The capacity of the default cache.
+
+    Returns:
+        Callable: The decorator.
+    """
+    def decorate(func: Callable) -> MemoizedBase:
+        """Memoizes a function."""
+        store = cache
+        if store is None:
+            store = LRUCache()
+            store.MAX_ITEMS = max_items
+            store.on_discard = None
+        memoized = (AsyncMemoized if asyncio.iscoroutinefunction(func)
+                    else Memoized)
+        return memoized(func, store, key or make_key, ttl, stale, clock)
+
+    return decorate
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Tests of the Adaptive Replacement cache against a reference model.
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+ARCCache = __import__('103-arc_cache').ARCCache
+
+
+class ReferenceARC:
+    """ARC as described by Megiddo and Modha, on plain lists.
+
+    The lists are kept from the least to the most recently used key.
+    A delete removes a key from T1 or T2 without a ghost, and a key is
+    only evicted by REPLACE while the cache is full, so that deletes
+    leave room to fill first.
+    """
+
+    def __init__(self, capacity: int):
+        """Initializes empty lists."""
+        self.c = capacity
+        self.p = 0.0
+        self.t1, self.t2, self.b1, self.b2 = [], [], [], []
+        self.items = {}
+        self.discarded = []
+
+    def __evict(self, key: object):
+        """Drops the item of a key leaving the cache."""
+        self.discarded.append((key, self.items.pop(key)))
+
+    def __replace(self, in_b2: bool):
+        """REPLACE(x, p) of the paper."""
+        if self.t1 and (len(self.t1) > self.p or
+                        (in_b2 and len(self.t1) == self.p)):
+            key = self.t1.pop(0)
+            self.b1.append(key)
+        else:
+            key = self.t2.pop(0)
+            self.b2.append(key)
+        self.__evict(key)
+
+    def get(self, key: object) -> object:
+        """Case I on a hit; a miss changes nothing."""
+        if key not in self.items:
+            return None
+        self.__hit(key)
+        return self.items[key]
+
+    def __hit(self, key: object):
+        """Case I: moves a cached key to the MRU end of T2."""
+        (self.t1 if key in self.t1 else self.t2).remove(key)
+        self.t2.append(key)
+
+    def put(self, key: object, item: object):
+        """Cases I to IV of the paper."""
+        full = len(self.items) >= self.c
+        if key in self.items:
+            self.__hit(key)
+        elif key in self.b1:
+            # Case II
+            delta = 1 if len(self.b1) >= len(self.b2) else \
+                len(self.b2) / len(self.b1)
+            self.p = min(self.p + delta, self.c)
+            if full:
+                self.__replace(False)
+            self.b1.remove(key)
+            self.t2.append(key)
+        elif key in self.b2:
+            # Case III
+            delta = 1 if len(self.b2) >= len(self.b1) else \
+                len(self.b1) / len(self.b2)
+            self.p = max(self.p - delta, 0.0)
+            if full:
+                self.__replace(True)
+            self.b2.remove(key)
+            self.t2.append(key)
+        else:
+            # Case IV
+            l1 = len(self.t1) + len(self.b1)
+            l2 = len(self.t2) + len(self.b2)
+            if l1 == self.c:
+                if len(self.t1) < self.c:
+                    self.b1.pop(0)
+                    if full:
+                        self.__replace(False)
+                else:
+                    self.__evict(self.t1.pop(0))
+            else:
+                if l1 + l2 >= 2 * self.c:
+                    self.b2.pop(0)
+                if full:
+                    self.__replace(False)
+            self.t1.append(key)
+        self.items[key] = item
+
+    def delete(self, key: object) -> object:
+        """Removes a cached key, without a ghost."""
+        if key not in self.items:
+            return None
+        (self.t1 if key in self.t1 else self.t2).remove(key)
+        return self.items.pop(key)
+
+
+class TestARCCache(unittest.TestCase):
+    """Tests ARCCache step by step against the reference model."""
+
+    def check_state(self, cache: ARCCache, model: ReferenceARC):
+        """Checks the lists, target and items of the cache."""
+        self.assertEqual(list(cache.recent), model.t1)
+        self.assertEqual(list(cache.frequent), model.t2)
+        self.assertEqual(list(cache.recent_ghosts), model.b1)
+        self.assertEqual(list(cache.frequent_ghosts), model.b2)
+        self.assertEqual(cache.target, model.p)
+        self.assertEqual(dict(cache.cache_data), model.items)
+        capacity = model.c
+        self.assertLessEqual(len(cache.cache_data), capacity)
+        self.assertLessEqual(len(cache.recent) + len(cache.recent_ghosts),
+                             capacity)
+        self.assertLessEqual(len(cache.cache_data) +
+                             len(cache.recent_ghosts) +
+                             len(cache.frequent_ghosts), 2 * capacity)
+
+    def test_against_reference(self):
+        """Every capacity agrees with the model, deletes included."""
+        rng = random.Random(0)
+        for capacity in range(1, 13):
+            class Bounded(ARCCache):
+                MAX_ITEMS = capacity
+
+            for trial in range(3):
+                cache, model = Bounded(), ReferenceARC(capacity)
+                discarded = []
+                cache.on_discard = discarded.extend
+                keys = rng.choice((2, 3, 4)) * capacity
+                for step in range(1000):
+                    with self.subTest(capacity=capacity, trial=trial,
+                                      step=step):
+                        key = rng.randrange(keys)
+                        operation = rng.random()
+                        if operation < 0.4:
+                            self.assertEqual(cache.get(key), model.get(key))
+                        elif operation < 0.85:
+                            cache.put(key, step)
+                            model.put(key, step)
+                        else:
+                            self.assertEqual(cache.delete(key),
+                                             model.delete(key))
+                        self.assertEqual(discarded, model.discarded)
+                        self.check_state(cache, model)
+
+
+if __name__ == "__main__":
+    unittest.main()
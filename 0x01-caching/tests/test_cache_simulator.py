@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""Tests of the synthetic traces of the cache simulator.
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from cache_simulator import shifting_trace  # noqa: E402
+
+
+class TestTraces(unittest.TestCase):
+    """Tests the lengths and keys of the synthetic traces."""
+
+    def test_shifting_length(self):
+        """A shifting trace has the requested length, even when it
+        doesn't divide in phases."""
+        for length in (0, 3, 4, 5, 7, 1001):
+            for phases in (1, 2, 3, 4):
+                with self.subTest(length=length, phases=phases):
+                    trace = shifting_trace(length, 10, phases=phases)
+                    self.assertEqual(len(trace), length)
+
+    def test_shifting_phases(self):
+        """Every phase draws from its own window of keys."""
+        trace = shifting_trace(1003, 10, phases=4)
+        last = trace[3 * 250:]
+        self.assertEqual(len(last), 253)
+        self.assertTrue(all(15 <= key < 25 for key in last))
+
+
+if __name__ == "__main__":
+    unittest.main()
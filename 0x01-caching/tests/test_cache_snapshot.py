@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Tests of saving caches to snapshot files and warming them up.
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+import cache_snapshot  # noqa: E402
+
+POLICIES = [
+    __import__('1-fifo_cache').FIFOCache,
+    __import__('2-lifo_cache').LIFOCache,
+    __import__('3-lru_cache').LRUCache,
+    __import__('4-mru_cache').MRUCache,
+    __import__('100-lfu_cache').LFUCache,
+]
+
+
+def bounded(policy: type, capacity: int) -> type:
+    """Returns a policy of a given capacity, keeping its evictions."""
+    class Bounded(policy):
+        MAX_ITEMS = capacity
+
+        def __init__(self):
+            super().__init__()
+            self.discarded = []
+            self.on_discard = self.discarded.extend
+
+    return Bounded
+
+
+def replay(cache, operations: list):
+    """Gets or puts keys in a cache."""
+    for get, key in operations:
+        if get:
+            cache.get(key)
+        else:
+            cache.put(key, key * 3)
+
+
+def operations(rng: random.Random, length: int) -> list:
+    """Returns random gets and puts of keys of skewed popularity."""
+    return [(rng.random() < 0.6, int(rng.paretovariate(1.2)) % 120)
+            for _ in range(length)]
+
+
+class TestCacheSnapshot(unittest.TestCase):
+    """Tests snapshot files of every policy."""
+
+    def setUp(self):
+        """Picks the path of a snapshot file."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "cache.snap")
+
+    def tearDown(self):
+        """Removes the snapshot files."""
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        """A restored cache holds the same items and evicts the same."""
+        rng = random.Random(3)
+        for policy in POLICIES:
+            Bounded = bounded(policy, 50)
+            for _ in range(20):
+                with self.subTest(policy=policy.__name__):
+                    saved = Bounded()
+                    replay(saved, operations(rng, 300))
+                    count = cache_snapshot.dump(saved, self.path)
+                    restored = Bounded()
+                    self.assertEqual(
+                        cache_snapshot.load(restored, self.path), count)
+                    self.assertEqual(count, len(saved.cache_data))
+                    self.assertEqual(dict(restored.cache_data),
+                                     dict(saved.cache_data))
+                    self.assertEqual(restored.entries(), saved.entries())
+                    saved.discarded.clear()
+                    future = operations(rng, 300)
+                    replay(saved, future)
+                    replay(restored, future)
+                    self.assertEqual(restored.discarded, saved.discarded)
+                    self.assertEqual(restored.entries(), saved.entries())
+
+    def test_load_keeps_live_items(self):
+        """Restored items only fill the room the cache has left."""
+        Bounded = bounded(POLICIES[2], 10)
+        saved = Bounded()
+        replay(saved, [(False, key) for key in range(10)])
+        cache_snapshot.dump(saved, self.path)
+        live = Bounded()
+        replay(live, [(False, key) for key in range(100, 104)])
+        self.assertEqual(cache_snapshot.load(live, self.path), 6)
+        self.assertEqual(len(live.cache_data), 10)
+        for key in range(100, 104):
+            self.assertIn(key, live.cache_data)
+        self.assertEqual(live.discarded, [])
+
+    def test_truncated(self):
+        """Reading a truncated snapshot raises ValueError."""
+        Bounded = bounded(POLICIES[2], 10000)
+        saved = Bounded()
+        replay(saved, [(False, key) for key in range(10000)])
+        cache_snapshot.dump(saved, self.path)
+        with open(self.path, "rb") as file:
+            content = file.read()
+        for size in (3, cache_snapshot.HEADER.size + 2, len(content) // 2,
+                     len(content) - 1):
+            with open(self.path, "wb") as file:
+                file.write(content[:size])
+            with self.assertRaises(ValueError):
+                cache_snapshot.load(Bounded(), self.path)
+
+    def test_failed_dump(self):
+        """A failed dump leaves the previous snapshot and no file."""
+        Bounded = bounded(POLICIES[2], 10)
+        saved = Bounded()
+        replay(saved, [(False, key) for key in range(10)])
+        cache_snapshot.dump(saved, self.path)
+        saved.put(10, 30)
+        with mock.patch("os.fsync", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                cache_snapshot.dump(saved, self.path)
+        self.assertEqual(os.listdir(self.directory), ["cache.snap"])
+        restored = Bounded()
+        cache_snapshot.load(restored, self.path)
+        self.assertEqual(sorted(restored.cache_data), list(range(10)))
+
+
+if __name__ == "__main__":
+    unittest.main()
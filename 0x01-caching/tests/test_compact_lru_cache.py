@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Tests of the array-backed LRU and MRU caches.
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+compact = __import__('105-compact_lru_cache')
+LRUCache = __import__('3-lru_cache').LRUCache
+MRUCache = __import__('4-mru_cache').MRUCache
+
+
+def bounded(policy: type, capacity: int) -> type:
+    """Returns a policy of a given capacity, keeping its discards."""
+    class Bounded(policy):
+        MAX_ITEMS = capacity
+
+        def __init__(self):
+            super().__init__()
+            self.discarded = []
+            self.on_discard = self.discarded.extend
+
+    return Bounded
+
+
+class TestCompactLRUCache(unittest.TestCase):
+    """Tests the compact caches against the dict-based ones."""
+
+    def test_same_as_reference(self):
+        """Every operation returns and discards what the reference does.
+        """
+        rng = random.Random(0)
+        for policy, reference in ((compact.CompactLRUCache, LRUCache),
+                                  (compact.CompactMRUCache, MRUCache)):
+            for capacity in range(1, 9):
+                with self.subTest(policy=policy.__name__,
+                                  capacity=capacity):
+                    cache = bounded(policy, capacity)()
+                    model = bounded(reference, capacity)()
+                    for _ in range(2000):
+                        key = rng.randrange(3 * capacity)
+                        operation = rng.random()
+                        if operation < 0.4:
+                            self.assertEqual(cache.get(key), model.get(key))
+                        elif operation < 0.9:
+                            cache.put(key, key * 2)
+                            model.put(key, key * 2)
+                        else:
+                            self.assertEqual(cache.delete(key),
+                                             model.delete(key))
+                        self.assertEqual(cache.discarded, model.discarded)
+                        self.assertEqual(list(cache.cache_data),
+                                         list(model.cache_data))
+
+    def test_zero_capacity(self):
+        """A cache of no item discards every item put."""
+        for policy in (compact.CompactLRUCache, compact.CompactMRUCache):
+            with self.subTest(policy=policy.__name__):
+                cache = bounded(policy, 0)()
+                cache.put("a", 1)
+                cache.put("b", 2)
+                self.assertEqual(cache.discarded, [("a", 1), ("b", 2)])
+                self.assertIsNone(cache.get("a"))
+                self.assertIsNone(cache.delete("a"))
+                self.assertEqual(len(cache.cache_data), 0)
+                self.assertEqual(cache.stats()["evictions"], {"size": 2})
+
+    def test_negative_capacity(self):
+        """A negative capacity is rejected."""
+        with self.assertRaises(ValueError):
+            bounded(compact.CompactLRUCache, -1)()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Tests of the LFU cache against a reference model.
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+LFUCache = __import__('100-lfu_cache').LFUCache
+
+
+class ReferenceLFU:
+    """LFU that scans every key for the victim.
+
+    Each key keeps its frequency and the step it last changed bucket;
+    the victim has the lowest frequency, then the oldest step.
+    """
+
+    def __init__(self, capacity: int):
+        """Initializes an empty cache."""
+        self.capacity = capacity
+        self.items = {}
+        self.uses = {}  # key: [frequency, step]
+        self.step = 0
+        self.discarded = []
+
+    def __use(self, key: object, count: int):
+        """Raises the frequency of a key by `count`."""
+        self.step += 1
+        self.uses[key] = [self.uses[key][0] + count, self.step]
+
+    def victims(self, count: int, key: object = None) -> list:
+        """Returns the `count` keys evicted first, `key` left out."""
+        keys = sorted((uses, k) for k, uses in self.uses.items()
+                      if k != key)
+        return [k for _, k in keys[:count]]
+
+    def get(self, key: object) -> object:
+        """Returns the item of a key, using it."""
+        if key not in self.items:
+            return None
+        self.__use(key, 1)
+        return self.items[key]
+
+    def get_many(self, keys: list) -> dict:
+        """Uses each cached key once, by its number of uses."""
+        counts = {}
+        for key in keys:
+            if key in self.items:
+                counts[key] = counts.get(key, 0) + 1
+        for key, count in counts.items():
+            self.__use(key, count)
+        return {key: self.items[key] for key in counts}
+
+    def put(self, key: object, item: object):
+        """Caches an item, evicting the victims while full."""
+        if key in self.items:
+            self.__use(key, 1)
+        else:
+            while len(self.items) >= self.capacity:
+                victim = self.victims(1, key)[0]
+                del self.uses[victim]
+                self.discarded.append((victim, self.items.pop(victim)))
+            self.step += 1
+            self.uses[key] = [1, self.step]
+        self.items[key] = item
+
+    def delete(self, key: object) -> object:
+        """Removes a key and its frequency."""
+        self.uses.pop(key, None)
+        return self.items.pop(key, None)
+
+
+class TestLFUCache(unittest.TestCase):
+    """Tests LFUCache step by step against the reference model."""
+
+    def test_against_reference(self):
+        """Every capacity agrees with the model, deletes included."""
+        rng = random.Random(0)
+        for capacity in range(1, 10):
+            class Bounded(LFUCache):
+                MAX_ITEMS = capacity
+
+            for trial in range(3):
+                cache, model = Bounded(), ReferenceLFU(capacity)
+                discarded = []
+                cache.on_discard = discarded.extend
+                keys = rng.choice((2, 3, 4)) * capacity
+                for step in range(1000):
+                    with self.subTest(capacity=capacity, trial=trial,
+                                      step=step):
+                        key = rng.randrange(keys)
+                        operation = rng.random()
+                        if operation < 0.35:
+                            self.assertEqual(cache.get(key), model.get(key))
+                        elif operation < 0.45:
+                            batch = [rng.randrange(keys) for _ in range(4)]
+                            self.assertEqual(cache.get_many(batch),
+                                             model.get_many(batch))
+                        elif operation < 0.8:
+                            cache.put(key, step)
+                            model.put(key, step)
+                        else:
+                            self.assertEqual(cache.delete(key),
+                                             model.delete(key))
+                        self.assertEqual(discarded, model.discarded)
+                        self.assertEqual(dict(cache.cache_data), model.items)
+                        self.assertEqual(cache.victims(capacity),
+                                         model.victims(capacity))
+                        self.assertLessEqual(len(cache.freqs), 2 * capacity)
+
+    def test_deleted_lowest_bucket(self):
+        """Once the lowest frequency buckets are emptied by deletes, the
+        lowest bucket left is evicted from."""
+        class Bounded(LFUCache):
+            MAX_ITEMS = 3
+
+        cache = Bounded()
+        cache.on_discard = None
+        for key, uses in (("a", 1), ("b", 5), ("c", 3)):
+            cache.put(key, key)
+            for _ in range(uses):
+                cache.get(key)
+        cache.delete("a")
+        cache.put("d", "d")
+        cache.get("d")
+        cache.get("d")
+        cache.delete("d")
+        cache.put("e", "e")
+        for _ in range(4):
+            cache.get("e")
+        cache.put("f", "f")
+        self.assertEqual(sorted(cache.cache_data), ["b", "e", "f"])
+
+
+if __name__ == "__main__":
+    unittest.main()
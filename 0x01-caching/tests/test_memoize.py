@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""Tests of memoized functions and coroutine functions.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from memoize import memoize  # noqa: E402
+
+
+class Clock:
+    """Clock that only moves when told to."""
+
+    def __init__(self):
+        """Starts the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Returns the current time."""
+        return self.now
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    """Polls a condition until it holds or the timeout passes."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+class TestMemoized(unittest.TestCase):
+    """Tests memoized functions called from several threads."""
+
+    def call_in_threads(self, func, count: int = 8) -> list:
+        """Calls a function from several threads at once.
+
+        Returns:
+            list: The value or error of every call.
+        """
+        outcomes = []
+        lock = threading.Lock()
+
+        def call():
+            """Calls the function, keeping its outcome."""
+            try:
+                outcome = func()
+            except Exception as error:
+                outcome = error
+            with lock:
+                outcomes.append(outcome)
+
+        threads = [threading.Thread(target=call) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_single_flight(self):
+        """Concurrent misses of a key share a single computation."""
+        calls = []
+        release = threading.Event()
+
+        @memoize()
+        def double(number):
+            calls.append(number)
+            release.wait()
+            return number * 2
+
+        threading.Timer(0.1, release.set).start()
+        self.assertEqual(self.call_in_threads(lambda: double(21)), [42] * 8)
+        self.assertEqual(calls, [21])
+        self.assertEqual(double(21), 42)
+        self.assertEqual(calls, [21])
+
+    def test_late_caller(self):
+        """A caller missing a key just computed does not compute it."""
+        calls = []
+
+        @memoize()
+        def double(number):
+            calls.append(number)
+            return number * 2
+
+        self.assertEqual(double(21), 42)
+        # The computation ended between the lookup and the flight
+        with mock.patch.object(double, "lookup", return_value=(None, None)):
+            self.assertEqual(double(21), 42)
+        self.assertEqual(calls, [21])
+
+    def test_error_propagation(self):
+        """Every caller awaiting a failed computation gets its error."""
+        calls = []
+        release = threading.Event()
+
+        @memoize()
+        def fail(number):
+            calls.append(number)
+            release.wait()
+            raise KeyError(number)
+
+        threading.Timer(0.1, release.set).start()
+        outcomes = self.call_in_threads(lambda: fail(1))
+        self.assertEqual(len(outcomes), 8)
+        for outcome in outcomes:
+            self.assertIsInstance(outcome, KeyError)
+        self.assertEqual(calls, [1])
+        with self.assertRaises(KeyError):
+            fail(1)
+        self.assertEqual(calls, [1, 1])
+
+    def test_stale_while_revalidate(self):
+        """A stale value is served while a single call refreshes it."""
+        clock = Clock()
+        calls = []
+        release = threading.Event()
+
+        @memoize(ttl=10, stale=5, clock=clock)
+        def version(name):
+            calls.append(name)
+            if len(calls) > 1:
+                release.wait()
+            return len(calls)
+
+        self.assertEqual(version("a"), 1)
+        clock.now = 12
+        self.assertEqual(self.call_in_threads(lambda: version("a")), [1] * 8)
+        release.set()
+        self.assertTrue(wait_for(lambda: version("a") == 2))
+        self.assertEqual(calls, ["a", "a"])
+        clock.now = 30
+        self.assertEqual(version("a"), 3)
+
+    def test_default_capacity(self):
+        """The default cache keeps more than a handful of results."""
+        calls = []
+
+        @memoize(max_items=100)
+        def square(number):
+            calls.append(number)
+            return number * number
+
+        for _ in range(2):
+            for number in range(100):
+                self.assertEqual(square(number), number * number)
+        self.assertEqual(calls, list(range(100)))
+
+
+class TestAsyncMemoized(unittest.TestCase):
+    """Tests memoized coroutine functions called from several tasks."""
+
+    def test_single_flight(self):
+        """Concurrent misses of a key share a single computation."""
+        calls = []
+
+        @memoize()
+        async def double(number):
+            calls.append(number)
+            await asyncio.sleep(0.05)
+            return number * 2
+
+        async def main():
+            values = await asyncio.gather(*[double(21) for _ in range(8)])
+            self.assertEqual(values, [42] * 8)
+            self.assertEqual(await double(21), 42)
+
+        asyncio.run(main())
+        self.assertEqual(calls, [21])
+
+    def test_error_propagation(self):
+        """Every task awaiting a failed computation gets its error."""
+        calls = []
+
+        @memoize()
+        async def fail(number):
+            calls.append(number)
+            await asyncio.sleep(0.05)
+            raise KeyError(number)
+
+        async def main():
+            outcomes = await asyncio.gather(
+                *[fail(1) for _ in range(8)], return_exceptions=True)
+            self.assertEqual(len(outcomes), 8)
+            for outcome in outcomes:
+                self.assertIsInstance(outcome, KeyError)
+            with self.assertRaises(KeyError):
+                await fail(1)
+
+        asyncio.run(main())
+        self.assertEqual(calls, [1, 1])
+
+    def test_cancelled_caller(self):
+        """Cancelling a caller does not cancel the others."""
+        @memoize()
+        async def double(number):
+            await asyncio.sleep(0.05)
+            return number * 2
+
+        async def main():
+            first = asyncio.ensure_future(double(21))
+            await asyncio.sleep(0.01)
+            second = asyncio.ensure_future(double(21))
+            first.cancel()
+            self.assertEqual(await second, 42)
+
+        asyncio.run(main())
+
+    def test_stale_while_revalidate(self):
+        """A stale value is served while a single task refreshes it."""
+        clock = Clock()
+        calls = []
+
+        @memoize(ttl=10, stale=5, clock=clock)
+        async def version(name):
+            calls.append(name)
+            await asyncio.sleep(0.05)
+            return len(calls)
+
+        async def main():
+            self.assertEqual(await version("a"), 1)
+            clock.now = 12
+            values = await asyncio.gather(*[version("a") for _ in range(8)])
+            self.assertEqual(values, [1] * 8)
+            await asyncio.sleep(0.1)
+            self.assertEqual(await version("a"), 2)
+            clock.now = 30
+            self.assertEqual(await version("a"), 3)
+
+        asyncio.run(main())
+        self.assertEqual(calls, ["a"] * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
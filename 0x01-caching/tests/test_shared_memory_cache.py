@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Tests of the cache shared by processes through shared memory.
+"""
+import multiprocessing
+import os
+import random
+import struct
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+SharedMemoryCache = __import__('107-shared_memory_cache').SharedMemoryCache
+
+
+class Shared(SharedMemoryCache):
+    """Shared memory cache of 500 items, discarding silently."""
+
+    MAX_ITEMS = 500
+    on_discard = None
+
+
+def value_of(key: int) -> tuple:
+    """Returns the only item ever cached for a key."""
+    return key, str(key) * (key % 20)
+
+
+def hammer(cache: Shared, seed: int, queue):
+    """Mixes reads, writes, deletes and scans, counting torn reads."""
+    rng = random.Random(seed)
+    torn = 0
+    for step in range(20000):
+        key = rng.randrange(2000)
+        item = cache.get(key)
+        if item is None:
+            cache.put(key, value_of(key))
+        elif item != value_of(key):
+            torn += 1
+        if rng.random() < 0.02:
+            cache.delete(key)
+        if step % 2000 == 0:
+            for _, key, item in cache.slots():
+                if item != value_of(key):
+                    torn += 1
+    queue.put(torn)
+
+
+class TestSharedMemoryCache(unittest.TestCase):
+    """Tests the lock-free reads of a shared memory cache."""
+
+    def setUp(self):
+        """Creates a segment."""
+        self.cache = Shared()
+
+    def tearDown(self):
+        """Destroys the segment."""
+        self.cache.close()
+        self.cache.unlink()
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(),
+                         "needs forked workers")
+    def test_no_torn_reads(self):
+        """Four forked workers only ever read whole items."""
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        workers = [context.Process(target=hammer,
+                                   args=(self.cache, seed, queue))
+                   for seed in range(4)]
+        for worker in workers:
+            worker.start()
+        torn = [queue.get(timeout=120) for _ in workers]
+        for worker in workers:
+            worker.join()
+            self.assertEqual(worker.exitcode, 0)
+        self.assertEqual(torn, [0] * 4)
+        keys = list(self.cache.cache_data)
+        self.assertEqual(len(keys), len(self.cache))
+        self.assertEqual(len(set(keys)), len(keys))
+        for key in keys:
+            self.assertEqual(self.cache.get(key), value_of(key))
+
+    def test_dead_writer(self):
+        """A slot left mid-write by a dead writer reads as a miss."""
+        for key in range(10):
+            self.cache.put(key, value_of(key))
+        slot = next(slot for slot, key, _ in self.cache.slots() if key == 3)
+        offset = self.cache.base + slot * self.cache.slot_size
+        version, = struct.unpack_from("<I", self.cache.buf, offset)
+        struct.pack_into("<I", self.cache.buf, offset, version + 1)
+
+        self.assertIsNone(self.cache.get(3))
+        self.assertEqual(len(self.cache), 9)
+        self.assertEqual(sorted(self.cache.cache_data),
+                         [0, 1, 2, 4, 5, 6, 7, 8, 9])
+        for key in (0, 1, 2, 4, 5, 6, 7, 8, 9):
+            self.assertEqual(self.cache.get(key), value_of(key))
+        self.cache.put(3, value_of(3))
+        self.assertEqual(self.cache.get(3), value_of(3))
+        self.assertEqual(len(self.cache), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
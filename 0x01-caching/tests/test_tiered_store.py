@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Tests of the tiered cache over a store server on a Unix socket.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from tiered_store import SocketStore, StoreServer  # noqa: E402
+
+TieredLRUCache = __import__('106-tiered_cache').TieredLRUCache
+
+
+class Tiered(TieredLRUCache):
+    """Tiered cache discarding silently."""
+
+    MAX_ITEMS = 100
+    on_discard = None
+
+
+def eventually(condition, timeout: float = 5.0) -> bool:
+    """Polls a condition until it holds or the timeout passes."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class TestTieredStore(unittest.TestCase):
+    """Tests caches sharing a store server."""
+
+    def setUp(self):
+        """Starts a store server and two caches using it."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "store.sock")
+        self.server = self.serve()
+        self.first = Tiered(SocketStore(self.path))
+        self.second = Tiered(SocketStore(self.path))
+
+    def tearDown(self):
+        """Closes the caches and stops the server."""
+        self.first.close()
+        self.second.close()
+        self.stop(self.server)
+        shutil.rmtree(self.directory)
+
+    def serve(self) -> StoreServer:
+        """Starts a store server on the socket path."""
+        server = StoreServer(self.path)
+        server.serve_in_thread()
+        return server
+
+    @staticmethod
+    def stop(server: StoreServer):
+        """Stops a store server and closes its connections."""
+        server.shutdown()
+        server.server_close()
+
+    def write(self, writer: Tiered, reader: Tiered, key: str,
+              item: object):
+        """Writes an item, waiting for another cache to be told."""
+        generation = reader.generation
+        writer.put(key, item)
+        self.assertTrue(eventually(lambda: reader.generation > generation))
+
+    def run_with_timeout(self, target, timeout: float = 30.0):
+        """Runs a function in a thread, failing if it does not return."""
+        errors = []
+
+        def run():
+            """Runs the function, keeping its error."""
+            try:
+                target()
+            except BaseException as error:
+                errors.append(error)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(timeout)
+        self.assertFalse(thread.is_alive(), "deadlocked")
+        if errors:
+            raise errors[0]
+
+    def test_pipelined_batches_larger_than_socket_buffers(self):
+        """Large batches of large keys and items are not deadlocked."""
+        items = {"{:064d}".format(i): "x" * 1000 for i in range(20000)}
+        store = SocketStore(self.path)
+        found = {}
+
+        def exchange():
+            """Writes the items and reads them back."""
+            store.put_many(items)
+            found.update(store.get_many(items))
+
+        try:
+            self.run_with_timeout(exchange)
+        finally:
+            store.close()
+        self.assertEqual(found, items)
+
+    def test_invalidation_across_clients(self):
+        """A write drops the copies other caches hold."""
+        self.write(self.first, self.second, "key", 1)
+        self.assertEqual(self.second.get("key"), 1)
+        self.assertIn("key", self.second.cache_data)
+        self.write(self.first, self.second, "key", 2)
+        self.assertNotIn("key", self.second.cache_data)
+        self.assertEqual(self.second.get("key"), 2)
+        self.second.delete("key")
+        self.assertTrue(eventually(
+            lambda: "key" not in self.first.cache_data))
+        self.assertIsNone(self.first.get("key"))
+
+    def test_server_shutdown(self):
+        """Copies are dropped and bypassed until the store is back."""
+        self.write(self.first, self.second, "key", 1)
+        self.assertEqual(self.second.get("key"), 1)
+        self.stop(self.server)
+        self.assertTrue(eventually(lambda: not self.second.subscribed))
+        self.assertEqual(self.second.cache_data, {})
+        with self.assertRaises(OSError):
+            self.second.get("key")
+
+        self.server = self.serve()
+        self.assertTrue(eventually(
+            lambda: self.first.subscribed and self.second.subscribed))
+        self.write(self.second, self.first, "key", 2)
+        self.assertEqual(self.first.get("key"), 2)
+        self.assertIn("key", self.first.cache_data)
+        self.write(self.second, self.first, "key", 3)
+        self.assertNotIn("key", self.first.cache_data)
+        self.assertEqual(self.first.get("key"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
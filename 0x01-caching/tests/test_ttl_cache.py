@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Tests of the caches whose items expire, on a fake clock.
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+ttl_cache = __import__('104-ttl_cache')
+
+# Lifetimes in ticks on both sides of the level boundaries of the wheel,
+# the last ones beyond its top level
+BOUNDARIES = (64, 64 ** 2, 64 ** 3, 64 ** 4)
+LIFETIMES = tuple(lifetime + delta for lifetime in (1,) + BOUNDARIES
+                  for delta in (-1, 0, 1) if lifetime + delta > 0) + \
+    (3 * 64 ** 4 + 5,)
+
+
+class Clock:
+    """Clock that only moves when told to."""
+
+    def __init__(self, now: float = 0.0):
+        """Starts the clock."""
+        self.now = now
+
+    def __call__(self) -> float:
+        """Returns the current time."""
+        return self.now
+
+
+class TTLBasic(ttl_cache.TTLBasicCache):
+    """Unbounded cache of one second ticks, discarding silently."""
+
+    RESOLUTION = 1.0
+    on_discard = None
+
+
+class TTLLRU(ttl_cache.TTLLRUCache):
+    """LRU cache of 8 items and one second ticks, discarding silently."""
+
+    MAX_ITEMS = 8
+    RESOLUTION = 1.0
+    on_discard = None
+
+
+class TestTTLCache(unittest.TestCase):
+    """Tests TTL caches against a model of deadlines."""
+
+    def check_model(self, start: float):
+        """Replays random operations, comparing every read to a model.
+
+        Args:
+            start (float): The time the clock starts at, so that the
+                wheel starts at any offset within its levels.
+        """
+        rng = random.Random(int(start))
+        clock = Clock(start)
+        cache = TTLBasic(clock=clock)
+        model = {}  # key: (item, deadline tick)
+        for step in range(3000):
+            now = int(clock.now)
+            key = rng.randrange(40)
+            operation = rng.random()
+            with self.subTest(start=start, step=step):
+                if operation < 0.35:
+                    lifetime = rng.choice(LIFETIMES)
+                    cache.put(key, step, ttl=lifetime)
+                    model[key] = (step, now + lifetime)
+                elif operation < 0.65:
+                    item, deadline = model.get(key, (None, None))
+                    expected = item if deadline is not None and \
+                        deadline > now else None
+                    self.assertEqual(cache.get(key), expected)
+                elif operation < 0.7:
+                    item, deadline = model.pop(key, (None, None))
+                    removed = cache.delete(key)
+                    if deadline is not None and deadline > now:
+                        self.assertEqual(removed, item)
+                elif operation < 0.8:
+                    item, deadline = model.get(key, (None, None))
+                    left = cache.ttl(key)
+                    if deadline is not None and deadline > now:
+                        self.assertEqual(left, deadline - clock.now)
+                    else:
+                        self.assertIn(left, (None, 0.0))
+                else:
+                    # Land before, on or after a level boundary
+                    boundary = rng.choice(BOUNDARIES)
+                    clock.now += rng.choice((
+                        rng.randrange(1, 8), boundary - now % boundary - 1,
+                        boundary - now % boundary,
+                        boundary - now % boundary + 1,
+                        rng.randrange(boundary)))
+                self.assertLessEqual(cache.wheel.tick, int(clock.now))
+                self.assertLessEqual(set(cache.wheel.slots),
+                                     set(cache.cache_data))
+
+        cache.expire()
+        now = int(clock.now)
+        live = {key: item for key, (item, deadline) in model.items()
+                if deadline > now}
+        self.assertEqual(dict(cache.cache_data), live)
+        self.assertEqual(len(cache.wheel), len(live))
+
+    def test_model(self):
+        """Reads agree with the model from any offset of the wheel."""
+        for start in (0.0, 62.0, 64.0 ** 2 - 3, 64.0 ** 3 - 2,
+                      64.0 ** 4 - 1, 123456789.0):
+            self.check_model(start)
+
+    def test_reap_limit(self):
+        """A call reaps at most `REAP_TICKS` ticks, reads stay exact."""
+        clock = Clock()
+        cache = TTLBasic(clock=clock)
+        for key in range(1000):
+            cache.put(key, key, ttl=1 + key)
+        clock.now = 2000.0
+        self.assertIsNone(cache.get(999))
+        self.assertLessEqual(cache.wheel.tick, TTLBasic.REAP_TICKS)
+        self.assertGreater(len(cache), 900)
+        self.assertEqual(cache.get_many(range(1000)), {})
+        cache.expire()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats()["evictions"], {"expired": 1000})
+
+    def test_evictions_unschedule(self):
+        """Items the policy evicts leave the wheel too."""
+        clock = Clock()
+        cache = TTLLRU(clock=clock)
+        for key in range(100):
+            cache.put(key, key, ttl=10 + key * 100)
+            self.assertEqual(set(cache.wheel.slots), set(cache.cache_data))
+        self.assertEqual(len(cache.wheel), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
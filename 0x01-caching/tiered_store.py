@@ -0,0 +1,665 @@
+#!/usr/bin/env python3
+"""Shared stores backing the second tier of a tiered cache.
+
+A store holds items shared by several caches, such as the caches of
+every worker process of a service, and tells each of them about the
+keys the others write or delete so that they drop their own copies.
+
+Run as a script, it serves a store on a Unix socket:
+    ./tiered_store.py /tmp/cache.sock
+"""
+import os
+import pickle
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, \
+    Set, Tuple, Union
+
+Items = Union[Mapping[str, object], Iterable[Tuple[str, object]]]
+Invalidation = Callable[[List[str]], None]
+Reset = Callable[[bool], None]
+HEADER = struct.Struct("!I")
+
+
+class Store:
+    """Interface of the shared stores.
+
+    Items written or deleted through a store are invalidated in the
+    subscribers of every other store sharing them.
+    """
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Retrieves the items of several keys.
+
+        Args:
+            keys (Iterable[str]): The keys of the items.
+
+        Returns:
+            Dict[str, object]: The stored items by key; keys that don't
+            exist are left out.
+        """
+        raise NotImplementedError(
+            "get_many must be implemented in your store class")
+
+    def put_many(self, items: Items):
+        """Stores several items.
+
+        Args:
+            items (Mapping or Iterable): The items by key, or pairs of
+                keys and items.
+        """
+        raise NotImplementedError(
+            "put_many must be implemented in your store class")
+
+    def delete_many(self, keys: Iterable[str]):
+        """Removes the items of several keys.
+
+        Args:
+            keys (Iterable[str]): The keys of the items.
+        """
+        raise NotImplementedError(
+            "delete_many must be implemented in your store class")
+
+    def subscribe(self, callback: Invalidation, reset: Reset = None):
+        """Registers a callback for the keys other stores change.
+
+        Args:
+            callback (Callable[[List[str]], None]): Called with the keys
+                written or deleted through another store.
+            reset (Callable[[bool], None]): Called with False when the
+                invalidations may stop coming, so that any copy may be
+                stale, and with True once they come again.
+        """
+        raise NotImplementedError(
+            "subscribe must be implemented in your store class")
+
+    def close(self):
+        """Releases the resources of the store."""
+
+
+def pairs(items: Items) -> List[Tuple[str, object]]:
+    """Returns the key and item pairs of a batch, without None ones.
+
+    Args:
+        items (Mapping or Iterable): The items by key, or pairs of keys
+            and items.
+
+    Returns:
+        List[Tuple[str, object]]: The pairs.
+    """
+    if isinstance(items, Mapping):
+        items = items.items()
+    return [(key, item) for key, item in items
+            if key is not None and item is not None]
+
+
+class MemoryStore(Store):
+    """Store keeping the items in a dict of this process.
+
+    Stores made by `connect` share the items and invalidate each other
+    like clients of one server, which makes it a stand-in for a remote
+    store in tests and single-process setups.
+    """
+
+    def __init__(self):
+        """Initializes an empty store."""
+        self.data = {}  # type: Dict[str, object]
+        self.lock = threading.Lock()
+        self.peers = [self]  # type: List[MemoryStore]
+        self.callbacks = []  # type: List[Invalidation]
+
+    def connect(self) -> 'MemoryStore':
+        """Returns a new store sharing the items of this one.
+
+        Returns:
+            MemoryStore: The store.
+        """
+        peer = MemoryStore()
+        peer.data, peer.lock, peer.peers = self.data, self.lock, self.peers
+        with self.lock:
+            self.peers.append(peer)
+        return peer
+
+    def __invalidate(self, keys: List[str]):
+        """Tells the subscribers of the other stores about changed keys.
+        """
+        for peer in self.peers:
+            if peer is not self:
+                for callback in peer.callbacks:
+                    callback(keys)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Retrieves the items of several keys.
+
+        Args:
+            keys (Iterable[str]): The keys of the items.
+
+        Returns:
+            Dict[str, object]: The stored items by key.
+        """
+        with self.lock:
+            return {key: self.data[key] for key in keys if key in self.data}
+
+    def put_many(self, items: Items):
+        """Stores several items.
+
+        Args:
+            items (Mapping or Iterable): The items by key, or pairs of
+                keys and items.
+        """
+        batch = pairs(items)
+        with self.lock:
+            self.data.update(batch)
+        if batch:
+            self.__invalidate([key for key, _ in batch])
+
+    def delete_many(self, keys: Iterable[str]):
+        """Removes the items of several keys.
+
+        Args:
+            keys (Iterable[str]): The keys of the items.
+        """
+        keys = [key for key in keys if key is not None]
+        with self.lock:
+            for key in keys:
+                self.data.pop(key, None)
+        if keys:
+            self.__invalidate(keys)
+
+    def subscribe(self, callback: Invalidation, reset: Reset = None):
+        """Registers a callback for the keys other stores change.
+
+        Args:
+            callback (Callable[[List[str]], None]): Called with the keys,
+                in the thread of the store that changed them.
+            reset (Callable[[bool], None]): Never called, as the stores
+                of a process never miss an invalidation.
+        """
+        self.callbacks.append(callback)
+
+
+class Connection:
+    """Connection to a store server, exchanging length-prefixed pickles.
+
+    Pickles are only exchanged with a server on a local socket, whose
+    peers are trusted.
+    """
+
+    def __init__(self, path: str):
+        """Connects to a store server.
+
+        Args:
+            path (str): The path of the Unix socket of the server.
+        """
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.sock.connect(path)
+        except OSError:
+            self.sock.close()
+            raise
+        self.rfile = self.sock.makefile("rb")
+        self.used = False  # Whether a request got its reply
+
+    def send(self, messages: Iterable[tuple]):
+        """Sends several messages in a single write.
+
+        Args:
+            messages (Iterable[tuple]): The messages.
+        """
+        self.sock.sendall(frames(messages))
+
+    def receive(self) -> object:
+        """Reads the next message.
+
+        Returns:
+            object: The message.
+        """
+        return read_frame(self.rfile)
+
+    def close(self):
+        """Closes the connection."""
+        self.rfile.close()
+        self.sock.close()
+
+
+def frames(messages: Iterable[tuple]) -> bytes:
+    """Encodes messages as length-prefixed pickles.
+
+    Args:
+        messages (Iterable[tuple]): The messages.
+
+    Returns:
+        bytes: The frames of the messages, one after another.
+    """
+    chunks = []
+    for message in messages:
+        payload = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+        chunks.append(HEADER.pack(len(payload)))
+        chunks.append(payload)
+    return b"".join(chunks)
+
+
+def read_frame(rfile) -> object:
+    """Reads a length-prefixed pickle.
+
+    Args:
+        rfile (BufferedReader): The stream to read from.
+
+    Returns:
+        object: The message.
+
+    Raises:
+        EOFError: If the stream ends before the message.
+    """
+    header = rfile.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise EOFError("connection closed")
+    size, = HEADER.unpack(header)
+    payload = rfile.read(size)
+    if len(payload) < size:
+        raise EOFError("connection closed")
+    return pickle.loads(payload)
+
+
+class ConnectionPool:
+    """Pool of connections to a store server.
+
+    At most `size` connections are open at once; a thread asking for one
+    while they are all in use waits until another thread is done.
+    """
+
+    def __init__(self, path: str, size: int = 4):
+        """Initializes an empty pool.
+
+        Args:
+            path (str): The path of the Unix socket of the server.
+            size (int): The maximum number of open connections.
+        """
+        self.path = path
+        self.idle = []  # type: List[Connection]
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self) -> Iterator[Connection]:
+        """Lends a connection, opening one if none is idle.
+
+        A connection that fails while in use is closed rather than
+        returned to the pool.
+
+        Yields:
+            Connection: The connection.
+        """
+        with self.slots:
+            with self.lock:
+                conn = self.idle.pop() if self.idle else None
+            if conn is None:
+                conn = Connection(self.path)
+            try:
+                yield conn
+            except BaseException:
+                conn.close()
+                raise
+            with self.lock:
+                self.idle.append(conn)
+
+    def close(self):
+        """Closes the idle connections."""
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for conn in idle:
+            conn.close()
+
+
+class SocketStore(Store):
+    """Client of a store server on a Unix socket.
+
+    Requests go through a pool of connections. A batch is split into
+    requests of `BATCH` keys that are written while the replies are
+    read, so a large batch costs one round trip rather than one per
+    request. A request failing on a pooled connection, which a server
+    restart may have closed, is sent again on a new one.
+    Invalidations are pushed by the server on a connection of their
+    own, read by a daemon thread. When that connection drops, the
+    subscribers are reset, and the thread subscribes again, retrying
+    every `RETRY` seconds, doubled up to `MAX_RETRY`, until it succeeds.
+    """
+
+    BATCH = 256
+    RETRY = 0.05
+    MAX_RETRY = 2.0
+
+    def __init__(self, path: str, pool_size: int = 4):
+        """Initializes the client.
+
+        Args:
+            path (str): The path of the Unix socket of the server.
+            pool_size (int): The maximum number of pooled connections.
+        """
+        self.path = path
+        self.pool = ConnectionPool(path, pool_size)
+        self.origin = uuid.uuid4().hex  # Tells the server who writes
+        self.callbacks = []  # type: List[Invalidation]
+        self.resets = []  # type: List[Reset]
+        self.listener = None  # type: Connection
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def __pipeline(self, op: str, batch: list) -> list:
+        """Sends a batch in pipelined requests and returns the replies."""
+        requests = [(op, self.origin, batch[i:i + self.BATCH])
+                    for i in range(0, len(batch), self.BATCH)]
+        if not requests:
+            return []
+        for attempt in range(2):
+            reused = False
+            try:
+                with self.pool.connection() as conn:
+                    reused = conn.used
+                    replies = self.__replies(conn, requests)
+                    conn.used = True
+                    return replies
+            except (EOFError, OSError):
+                # The server may have closed a pooled connection since
+                if not reused or attempt:
+                    raise
+
+    def __replies(self, conn: Connection, requests: List[tuple]) -> list:
+        """Sends requests on a connection and reads the replies."""
+        if len(requests) == 1:
+            conn.send(requests)
+            return [conn.receive()]
+        # Write from another thread while the replies are read: when
+        # both are large, the server blocks writing replies until
+        # they are, and stops reading the requests meanwhile
+        writer = threading.Thread(target=self.__send,
+                                  args=(conn, requests), daemon=True)
+        writer.start()
+        try:
+            return [conn.receive() for _ in requests]
+        except BaseException:
+            try:
+                conn.sock.shutdown(socket.SHUT_RDWR)  # Unblocks the writer
+            except OSError:
+                pass
+            raise
+        finally:
+            writer.join()
+
+    @staticmethod
+    def __send(conn: Connection, requests: List[tuple]):
+        """Writes requests, a failure showing up as a missing reply."""
+        try:
+            conn.send(requests)
+        except OSError:
+            pass
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Retrieves the items of several keys.
+
+        Args:
+            keys (Iterable[str]): The keys of the items.
+
+        Returns:
+            Dict[str, object]: The stored items by key.
+        """
+        found = {}
+        for reply in self.__pipeline(
+                "get", [key for key in keys if key is not None]):
+            found.update(reply)
+        return found
+
+    def put_many(self, items: Items):
+        """Stores several items.
+
+        Args:
+            items (Mapping or Iterable): The items by key, or pairs of
+                keys and items.
+        """
+        self.__pipeline("put", pairs(items))
+
+    def delete_many(self, keys: Iterable[str]):
+        """Removes the items of several keys.
+
+        Args:
+            keys (Iterable[str]): The keys of the items.
+        """
+        self.__pipeline("delete", [key for key in keys if key is not None])
+
+    def subscribe(self, callback: Invalidation, reset: Reset = None):
+        """Registers a callback for the keys other stores change.
+
+        Args:
+            callback (Callable[[List[str]], None]): Called with the keys,
+                in the listener thread.
+            reset (Callable[[bool], None]): Called with False, in the
+                listener thread, when the subscription drops, and with
+                True once it is back.
+        """
+        with self.lock:
+            self.callbacks.append(callback)
+            if reset is not None:
+                self.resets.append(reset)
+            if self.listener is not None:
+                return
+            self.listener = self.__subscribed()
+        threading.Thread(target=self.__listen, daemon=True).start()
+
+    def __subscribed(self) -> Connection:
+        """Opens a connection and subscribes it to the invalidations."""
+        conn = Connection(self.path)
+        try:
+            conn.send([("subscribe", self.origin, None)])
+            # Wait for the server to register the subscription
+            conn.receive()
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    def __notify(self, handlers: list, argument: object):
+        """Calls handlers, reporting their errors without stopping."""
+        for handler in handlers:
+            try:
+                handler(argument)
+            except Exception:
+                traceback.print_exc()
+
+    def __listen(self):
+        """Passes the pushed invalidations on to the callbacks.
+
+        When the subscription drops, the subscribers are reset while
+        the thread subscribes again.
+        """
+        while True:
+            try:
+                while True:
+                    self.__notify(self.callbacks, self.listener.receive())
+            except (EOFError, OSError, ValueError):
+                self.listener.close()
+            if self.closed:
+                return
+            self.__notify(self.resets, False)
+            delay = self.RETRY
+            while True:
+                try:
+                    listener = self.__subscribed()
+                    break
+                except (EOFError, OSError):
+                    if self.closed:
+                        return
+                    time.sleep(delay)
+                    delay = min(delay * 2, self.MAX_RETRY)
+            with self.lock:
+                if self.closed:
+                    listener.close()
+                    return
+                self.listener = listener
+            self.__notify(self.resets, True)
+
+    def close(self):
+        """Closes the pooled connections and the listener."""
+        with self.lock:
+            self.closed = True
+            listener = self.listener
+        self.pool.close()
+        if listener is not None:
+            try:
+                listener.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            listener.close()
+
+
+class StoreHandler(socketserver.StreamRequestHandler):
+    """Serves the requests of one connection to a store server."""
+
+    def setup(self):
+        """Registers the connection, for the server to close it."""
+        super().setup()
+        with self.server.lock:
+            self.server.connections.add(self.connection)
+
+    def finish(self):
+        """Forgets the connection."""
+        with self.server.lock:
+            self.server.connections.discard(self.connection)
+        super().finish()
+
+    def handle(self):
+        """Replies to the requests in order until the client leaves."""
+        server = self.server
+        while True:
+            try:
+                op, origin, batch = read_frame(self.rfile)
+            except EOFError:
+                return
+            if op == "subscribe":
+                server.subscribe(origin, self.wfile)
+                try:
+                    # Nothing more is read: wait for the client to leave
+                    self.rfile.read()
+                finally:
+                    server.unsubscribe(origin)
+                return
+            if op == "get":
+                with server.lock:
+                    reply = {key: server.data[key] for key in batch
+                             if key in server.data}
+            elif op == "put":
+                with server.lock:
+                    server.data.update(batch)
+                reply = None
+                server.invalidate(origin, [key for key, _ in batch])
+            else:
+                with server.lock:
+                    for key in batch:
+                        server.data.pop(key, None)
+                reply = None
+                server.invalidate(origin, batch)
+            self.wfile.write(frames([reply]))
+
+
+class StoreServer(socketserver.ThreadingMixIn,
+                  socketserver.UnixStreamServer):
+    """Store server on a Unix socket, serving every client in a thread.
+
+    It stands in for a shared out-of-process store such as a cache
+    server: the items live in the server process, and every write or
+    delete is pushed to the subscribers of the other clients. Closing
+    the server closes the connections of every client too, as a server
+    going away would.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path: str):
+        """Binds the server to a socket, replacing any stale one.
+
+        Args:
+            path (str): The path of the Unix socket.
+        """
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, StoreHandler)
+        self.data = {}  # type: Dict[str, object]
+        self.lock = threading.Lock()
+        self.subscribers = {}  # type: Dict[str, tuple]
+        self.connections = set()  # type: Set[socket.socket]
+
+    def subscribe(self, origin: str, wfile):
+        """Registers the invalidation stream of a client and acknowledges
+        it, before any key is pushed to it.
+
+        Args:
+            origin (str): The id of the client.
+            wfile (BufferedWriter): The stream to push the keys to.
+        """
+        lock = threading.Lock()
+        with lock:
+            with self.lock:
+                self.subscribers[origin] = (wfile, lock)
+            wfile.write(frames([None]))
+
+    def unsubscribe(self, origin: str):
+        """Forgets the invalidation stream of a client.
+
+        Args:
+            origin (str): The id of the client.
+        """
+        with self.lock:
+            self.subscribers.pop(origin, None)
+
+    def invalidate(self, origin: str, keys: List[str]):
+        """Pushes changed keys to every client but the one changing them.
+
+        Args:
+            origin (str): The id of the client changing the keys.
+            keys (List[str]): The keys.
+        """
+        if not keys:
+            return
+        frame = frames([keys])
+        with self.lock:
+            subscribers = [stream for key, stream in
+                           self.subscribers.items() if key != origin]
+        for wfile, lock in subscribers:
+            try:
+                with lock:
+                    wfile.write(frame)
+            except OSError:
+                continue
+
+    def server_close(self):
+        """Closes the socket of the server and every client connection.
+        """
+        super().server_close()
+        with self.lock:
+            connections = list(self.connections)
+        for conn in connections:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def serve_in_thread(self) -> threading.Thread:
+        """Serves requests from a daemon thread.
+
+        Returns:
+            threading.Thread: The thread.
+        """
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+if __name__ == "__main__":
+    with StoreServer(sys.argv[1]) as server:
+        server.serve_forever()
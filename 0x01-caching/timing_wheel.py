@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Hierarchical timing wheel module.
+"""
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class TimingWheel:
+    """Schedules keys to expire at integer ticks.
+
+    Level 0 has one slot per tick, and every higher level has one slot
+    per full turn of the level below, so four levels of 64 slots cover
+    64^4 ticks. A key is kept in the lowest level where its deadline
+    and the current tick differ; when the current tick enters a slot
+    of a higher level, its keys cascade down to lower levels. Deadlines
+    beyond the top level wait in an overflow list until it turns.
+    Scheduling, cancelling and expiring a key all take constant time.
+    """
+
+    BITS = 6
+    SLOTS = 1 << BITS
+    LEVELS = 4
+
+    def __init__(self, tick: int = 0):
+        """Initializes an empty wheel.
+
+        Args:
+            tick (int): The current tick.
+        """
+        self.tick = tick
+        self.wheels = [[{} for _ in range(self.SLOTS)]
+                       for _ in range(self.LEVELS)]
+        self.overflow = {}  # type: Dict[Hashable, int]
+        self.counts = [0] * self.LEVELS
+        # Slot of every scheduled key, as (level, slot); level -1 is
+        # the overflow list
+        self.slots = {}  # type: Dict[Hashable, Tuple[int, int]]
+        self.deadlines = {}  # type: Dict[Hashable, int]
+
+    def __len__(self) -> int:
+        """Returns the number of scheduled keys."""
+        return len(self.slots)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Returns whether a key is scheduled."""
+        return key in self.slots
+
+    def __bucket(self, level: int, slot: int) -> dict:
+        """Returns the keys of a slot, with their deadlines."""
+        if level < 0:
+            return self.overflow
+        return self.wheels[level][slot]
+
+    def __insert(self, key: Hashable, deadline: int):
+        """Places a key in the slot of a future deadline."""
+        level = 0
+        while level < self.LEVELS and (
+                deadline >> (self.BITS * (level + 1)) !=
+                self.tick >> (self.BITS * (level + 1))):
+            level += 1
+        if level == self.LEVELS:
+            self.overflow[key] = deadline
+            self.slots[key] = (-1, 0)
+            return
+        slot = (deadline >> (self.BITS * level)) & (self.SLOTS - 1)
+        self.wheels[level][slot][key] = deadline
+        self.counts[level] += 1
+        self.slots[key] = (level, slot)
+
+    def deadline(self, key: Hashable) -> Optional[int]:
+        """Returns the tick a key expires at.
+
+        Args:
+            key (Hashable): The scheduled key.
+
+        Returns:
+            int: The deadline, or None if the key is not scheduled.
+        """
+        return self.deadlines.get(key)
+
+    def schedule(self, key: Hashable, deadline: int) -> bool:
+        """Schedules a key, replacing its previous deadline.
+
+        Args:
+            key (Hashable): The key to expire.
+            deadline (int): The tick it expires at.
+
+        Returns:
+            bool: False if the deadline has already passed, in which
+            case the key is not scheduled.
+        """
+        self.cancel(key)
+        if deadline <= self.tick:
+            return False
+        self.deadlines[key] = deadline
+        self.__insert(key, deadline)
+        return True
+
+    def cancel(self, key: Hashable) -> Optional[int]:
+        """Unschedules a key.
+
+        Args:
+            key (Hashable): The key to unschedule.
+
+        Returns:
+            int: Its deadline, or None if it was not scheduled.
+        """
+        location = self.slots.pop(key, None)
+        if location is None:
+            return None
+        if location[0] >= 0:
+            self.counts[location[0]] -= 1
+        self.__bucket(*location).pop(key)
+        return self.deadlines.pop(key)
+
+    def advance(self, tick: int, limit: int = None) -> List[Hashable]:
+        """Moves the wheel forward and collects the expired keys.
+
+        Empty ticks are skipped, up to the next occupied slot or the
+        next turn of the lowest occupied level, so that idle periods
+        cost little.
+
+        Args:
+            tick (int): The tick to move to.
+            limit (int): The maximum number of ticks to process, so that
+                a single call does a bounded amount of work.
+
+        Returns:
+            List[Hashable]: The keys whose deadline is now reached.
+        """
+        expired = []
+        mask = self.SLOTS - 1
+        while self.tick < tick and limit != 0:
+            if not self.slots:
+                self.tick = tick
+                break
+            # Jump to the tick before the next occupied level 0 slot, or
+            # before the next turn of the lowest occupied level
+            level = 0
+            while level < self.LEVELS and not self.counts[level]:
+                level += 1
+            skip = self.tick | ((1 << (self.BITS * max(level, 1))) - 1)
+            if level == 0:
+                wheel = self.wheels[0]
+                for slot in range((self.tick & mask) + 1, self.SLOTS):
+                    if wheel[slot]:
+                        skip = (self.tick & ~mask) + slot - 1
+                        break
+            self.tick = min(tick - 1, skip)
+            self.tick += 1
+            if limit is not None:
+                limit -= 1
+            for level in range(self.LEVELS, 0, -1):
+                if self.tick & ((1 << (self.BITS * level)) - 1):
+                    continue
+                if level == self.LEVELS:
+                    bucket, self.overflow = self.overflow, {}
+                else:
+                    slot = (self.tick >> (self.BITS * level)) & mask
+                    bucket = self.wheels[level][slot]
+                    self.wheels[level][slot] = {}
+                    self.counts[level] -= len(bucket)
+                for key, deadline in bucket.items():
+                    if deadline <= self.tick:
+                        del self.slots[key]
+                        del self.deadlines[key]
+                        expired.append(key)
+                    else:
+                        self.__insert(key, deadline)
+            bucket = self.wheels[0][self.tick & mask]
+            if bucket:
+                self.wheels[0][self.tick & mask] = {}
+                self.counts[0] -= len(bucket)
+                for key in bucket:
+                    del self.slots[key]
+                    del self.deadlines[key]
+                expired.extend(bucket)
+        return expired